@@ -24,6 +24,22 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+def get_token_payload(token: str = Depends(oauth2_scheme)) -> TokenPayload:
+    """
+    Validate the access token without loading the user (for cacheable reads)
+    """
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+        return TokenPayload(**payload)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
 def get_current_user(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
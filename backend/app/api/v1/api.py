@@ -1,10 +1,11 @@
 # backend/app/api/v1/api.py (FastAPI version)
 from fastapi import APIRouter
-from .endpoints import auth, appointments, availability
+from .endpoints import auth, appointments, availability, chat
 
 api_router = APIRouter()
 
 # Include routers
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
-api_router.include_router(availability.router, prefix="/availability", tags=["availability"])
\ No newline at end of file
+api_router.include_router(availability.router, prefix="/availability", tags=["availability"])
+api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
\ No newline at end of file
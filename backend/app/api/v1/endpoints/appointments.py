@@ -1,25 +1,81 @@
 # backend/app/api/v1/endpoints/appointments.py
-from datetime import datetime, timedelta
-from typing import Any, List, Dict, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, List, Dict, Iterator, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.api import deps
+from app.crud.crud_appointment import appointment as crud_appointment
+from app.core.config import settings
+from app.db.session import SessionLocal
 from app.models.user import UserType, User
 from app.models.appointment import Appointment, AppointmentStatus, AppointmentUrgency
+from app.services.conditions import condition_index
+from app.services.idempotency import (
+    IdempotencyKeyReused,
+    IdempotencyTimeout,
+    StoredResponse,
+    fingerprint as request_fingerprint,
+    idempotency_store,
+)
+from app.services.recurrence import expand_recurrence
+from app.services.schedule import load_schedule
+from app.services.slot_calendar import DayCalendar, slot_calendar
+from app.services.slot_holds import slot_holds
+from app.services.slot_search import earliest_free_slots
+from app.services.slots import MAX_APPOINTMENT_MINUTES
+from app.services.triage import URGENCY_URGENT, TriageResult, symptom_analyzer, rules_reloader, build_recommendations
 
 router = APIRouter()
 
+# Upper bound on texts per batch analysis request
+MAX_ANALYSIS_BATCH_SIZE = 100
+
+# Upper bound on results of an earliest-slot search
+MAX_EARLIEST_SLOTS = 50
+
+# Upper bound on visits booked by one recurring booking request
+MAX_RECURRING_OCCURRENCES = 52
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
 # Pydantic models for request/response
 class SymptomAnalysisRequest(BaseModel):
     symptoms: str
 
+class RelatedCondition(BaseModel):
+    name: str
+    specialty: str
+    score: float
+    follow_up_questions: List[str]
+
+class EarliestSlot(BaseModel):
+    doctor_id: int
+    doctor_name: str
+    specialty: str
+    date: str
+    time: str
+    duration: str
+
 class SymptomAnalysisResponse(BaseModel):
     urgency: str
     specialty: str
     recommendations: List[str]
     confidence: float
+    rules_version: Optional[str] = None
+    related_conditions: Optional[List[RelatedCondition]] = None
+    # Filled in for urgent cases: first free slots with any doctor of the specialty
+    earliest_slots: Optional[List[EarliestSlot]] = None
+
+class SymptomAnalysisBatchRequest(BaseModel):
+    symptoms: List[str] = Field(..., min_length=1, max_length=MAX_ANALYSIS_BATCH_SIZE)
+
+class SymptomAnalysisBatchResponse(BaseModel):
+    results: List[SymptomAnalysisResponse]
 
 class DoctorAvailability(BaseModel):
     doctor_id: int
@@ -33,9 +89,44 @@ class AppointmentBookingRequest(BaseModel):
     doctor_id: int
     appointment_date: str
     appointment_time: str
-    duration: int = 30
+    duration: int = Field(30, ge=5, le=MAX_APPOINTMENT_MINUTES)
     symptoms: str
-    urgency: str = "routine"
+    urgency: AppointmentUrgency = AppointmentUrgency.ROUTINE
+    hold_token: Optional[str] = None  # from POST /holds
+
+class SlotHoldRequest(BaseModel):
+    doctor_id: int
+    appointment_date: str
+    appointment_time: str
+    duration: int = Field(30, ge=5, le=MAX_APPOINTMENT_MINUTES)
+
+class SlotHoldResponse(BaseModel):
+    hold_token: str
+    doctor_id: int
+    appointment_datetime: datetime
+    duration: int
+    expires_in: int  # seconds
+
+class BookingOccurrence(BaseModel):
+    appointment_date: str
+    appointment_time: str
+
+class RecurrencePattern(BaseModel):
+    frequency: str  # daily, weekly or monthly
+    interval: int = Field(1, ge=1, le=12)
+    count: Optional[int] = None
+    until: Optional[str] = None  # YYYY-MM-DD, inclusive
+
+class RecurringBookingRequest(BaseModel):
+    doctor_id: int
+    duration: int = Field(30, ge=5, le=MAX_APPOINTMENT_MINUTES)
+    symptoms: str
+    urgency: AppointmentUrgency = AppointmentUrgency.ROUTINE
+    # Either explicit occurrences, or the first one plus a recurrence pattern
+    occurrences: List[BookingOccurrence] = Field([], max_length=MAX_RECURRING_OCCURRENCES)
+    appointment_date: Optional[str] = None
+    appointment_time: Optional[str] = None
+    recurrence: Optional[RecurrencePattern] = None
 
 class AppointmentResponse(BaseModel):
     id: int
@@ -71,74 +162,254 @@ def analyze_symptoms(
             detail="Only patients can analyze symptoms"
         )
     
-    # Simple keyword-based analysis (replace with real AI/ML model)
-    symptoms_lower = request.symptoms.lower()
-    
-    # Determine urgency
-    urgent_keywords = ["chest pain", "severe pain", "difficulty breathing", "blood", "emergency", "heart attack"]
-    emergency_keywords = ["unconscious", "not breathing", "stroke", "overdose"]
+    response = run_symptom_analysis(request.symptoms)
+    if response.urgency == URGENCY_URGENT:
+        response.earliest_slots = find_earliest_slots(db, response.specialty, settings.URGENT_EARLIEST_SLOTS)
     
-    if any(keyword in symptoms_lower for keyword in emergency_keywords):
-        urgency = "emergency"
-    elif any(keyword in symptoms_lower for keyword in urgent_keywords):
-        urgency = "urgent"
-    else:
-        urgency = "routine"
-    
-    # Determine specialty
-    specialty_mapping = {
-        "heart": "Cardiology",
-        "chest": "Cardiology", 
-        "cardiac": "Cardiology",
-        "skin": "Dermatology",
-        "rash": "Dermatology",
-        "acne": "Dermatology",
-        "bone": "Orthopedics",
-        "joint": "Orthopedics",
-        "fracture": "Orthopedics",
-        "mental": "Psychiatry",
-        "anxiety": "Psychiatry",
-        "depression": "Psychiatry",
-        "eye": "Ophthalmology",
-        "vision": "Ophthalmology",
-        "ear": "ENT",
-        "throat": "ENT",
-        "nose": "ENT"
-    }
+    return response
+
+@router.post("/analyze-symptoms/batch", response_model=SymptomAnalysisBatchResponse)
+def analyze_symptoms_batch(
+    request: SymptomAnalysisBatchRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Analyze many symptom texts in one request (intake kiosks, triage queues)
+    """
+    # Nurses and admins triage on behalf of patients; doctors have no use for it
+    if current_user.user_type is UserType.DOCTOR:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Doctors cannot run batch symptom analysis"
+        )
     
-    specialty = "General Practice"  # default
-    for keyword, spec in specialty_mapping.items():
-        if keyword in symptoms_lower:
-            specialty = spec
-            break
+    # One engine call for the whole batch
+    results = symptom_analyzer.analyze_many(request.symptoms)
     
-    # Generate recommendations based on urgency
-    if urgency == "emergency":
-        recommendations = [
-            "This appears to be an emergency case - please seek immediate medical attention",
-            "Consider visiting the emergency room or calling emergency services",
-            "If available, I'll help you find urgent care options"
-        ]
-    elif urgency == "urgent":
-        recommendations = [
-            f"Based on your symptoms, this appears to be an urgent case",
-            f"I recommend consulting with a {specialty} specialist as soon as possible",
-            "I'll help you find the earliest available appointments"
+    return SymptomAnalysisBatchResponse(
+        results=[
+            build_analysis_response(result, find_related_conditions(text))
+            for text, result in zip(request.symptoms, results)
         ]
-    else:
-        recommendations = [
-            f"Based on your symptoms, this appears to be a routine consultation",
-            f"I recommend consulting with a {specialty} specialist",
-            "I'll help you find convenient appointment times"
-        ]
-    
+    )
+
+def run_symptom_analysis(symptoms: str) -> SymptomAnalysisResponse:
+    """
+    Run triage on a single symptom text and build the API response
+    """
+    return build_analysis_response(
+        symptom_analyzer.analyze(symptoms),
+        find_related_conditions(symptoms)
+    )
+
+def find_related_conditions(symptoms: str) -> Optional[List[RelatedCondition]]:
+    """
+    Top-k knowledge base conditions for a symptom text (None if no knowledge base is built)
+    """
+    if condition_index is None:
+        return None
+    return [
+        RelatedCondition(**vars(match))
+        for match in condition_index.search(symptoms, k=settings.CONDITION_TOP_K)
+    ]
+
+def build_analysis_response(
+    result: TriageResult,
+    related_conditions: Optional[List[RelatedCondition]] = None
+) -> SymptomAnalysisResponse:
+    """
+    Convert a triage result into the API response
+    """
     return SymptomAnalysisResponse(
-        urgency=urgency,
-        specialty=specialty,
-        recommendations=recommendations,
-        confidence=0.85  # Mock confidence score
+        urgency=result.urgency,
+        specialty=result.specialty,
+        recommendations=build_recommendations(result.urgency, result.specialty),
+        confidence=round(result.confidence, 4),
+        rules_version=result.rules_version,
+        related_conditions=related_conditions
+    )
+
+@router.post("/analyze-symptoms/stream")
+def analyze_symptoms_stream(
+    request: SymptomAnalysisRequest,
+    date: Optional[str] = None,
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Server-Sent Events variant of analyze-symptoms for the chatbot.
+    
+    Emits the triage verdict as soon as it is computed, then the
+    recommendations, then one event per matching doctor (with earliest
+    slots) as each doctor's availability resolves, and finally "done".
+    """
+    if current_user.user_type is not UserType.PATIENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only patients can analyze symptoms"
+        )
+    
+    return StreamingResponse(
+        stream_symptom_analysis(request.symptoms, date),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode one Server-Sent Event
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_symptom_analysis(symptoms: str, date: Optional[str]) -> Iterator[str]:
+    """
+    Generate the SSE stream for analyze_symptoms_stream
+    """
+    result = symptom_analyzer.analyze(symptoms)
+    yield format_sse("triage", {
+        "urgency": result.urgency,
+        "specialty": result.specialty,
+        "confidence": round(result.confidence, 4),
+        "rules_version": result.rules_version
+    })
+    yield format_sse("recommendations", build_recommendations(result.urgency, result.specialty))
+    
+    related_conditions = find_related_conditions(symptoms)
+    if related_conditions is not None:
+        yield format_sse("conditions", [condition.model_dump() for condition in related_conditions])
+    
+    # The request-scoped session may already be closed while the body
+    # streams, so the generator owns its own session
+    db = SessionLocal()
+    try:
+        if result.urgency == URGENCY_URGENT:
+            earliest = find_earliest_slots(db, result.specialty, settings.URGENT_EARLIEST_SLOTS, date)
+            yield format_sse("earliest", [slot.model_dump() for slot in earliest])
+        
+        doctors = get_candidate_doctors(db, result.specialty)
+        slots_by_doctor = get_doctors_availability(db, [doctor.id for doctor in doctors], date)
+        for doctor in doctors:
+            available_slots = slots_by_doctor[doctor.id]
+            if available_slots:
+                yield format_sse("doctor", build_doctor_availability(doctor, available_slots).model_dump())
+    except ValueError:
+        yield format_sse("error", {"detail": "Invalid date format. Use YYYY-MM-DD"})
+    finally:
+        db.close()
+    
+    yield format_sse("done", {})
+
+@router.get("/analyze-symptoms/cache-stats")
+def get_symptom_cache_stats(
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Hit/miss/eviction counters of the symptom analysis cache (admins only)
+    """
+    if current_user.user_type is not UserType.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view cache statistics"
+        )
+    
+    return symptom_analyzer.cache.stats()
+
+@router.get("/triage-rules")
+def get_triage_rules(
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Active triage rule set (admins only)
+    """
+    if current_user.user_type is not UserType.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view triage rules"
+        )
+    
+    rules = symptom_analyzer.engine.rules
+    return {
+        "version": rules.version,
+        "urgent_keywords": rules.urgent_keywords,
+        "emergency_keywords": rules.emergency_keywords,
+        "specialty_keywords": {kw: {"specialty": spec, "weight": weight} for kw, (spec, weight) in rules.specialty_keywords.items()}
+    }
+
+@router.post("/triage-rules/reload")
+def reload_triage_rules(
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Recompile the triage rules file and swap it in without a restart (admins only).
+    Other workers pick the change up through the file watcher.
+    """
+    if current_user.user_type is not UserType.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can reload triage rules"
+        )
+    
+    try:
+        rules_reloader.reload(force=True)
+    except (OSError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid triage rules file: {str(e)}"
+        )
+    
+    return {
+        "message": "Triage rules reloaded",
+        "version": symptom_analyzer.engine.version
+    }
+
+@router.get("/earliest-slots", response_model=List[EarliestSlot])
+def get_earliest_slots(
+    specialty: str = "General Practice",
+    limit: int = 5,
+    date: Optional[str] = None,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    First free slots with any doctor of a specialty, earliest first
+    """
+    if not 1 <= limit <= MAX_EARLIEST_SLOTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {MAX_EARLIEST_SLOTS}"
+        )
+    
+    try:
+        return find_earliest_slots(db, specialty, limit, date)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+
+def find_earliest_slots(db: Session, specialty: str, limit: int, target_date: Optional[str] = None) -> List[EarliestSlot]:
+    """
+    Earliest free slots across the candidate doctors of a specialty
+    """
+    not_before = datetime.now()
+    if target_date:
+        not_before = max(not_before, datetime.strptime(target_date, "%Y-%m-%d"))
+    
+    doctors = {doctor.id: doctor for doctor in get_candidate_doctors(db, specialty)}
+    offers = earliest_free_slots(db, list(doctors), limit, not_before, settings.EARLIEST_SLOT_HORIZON_DAYS)
+    
+    return [
+        EarliestSlot(
+            doctor_id=offer.doctor_id,
+            doctor_name=doctors[offer.doctor_id].full_name,
+            specialty=doctors[offer.doctor_id].specialization or "General Practice",
+            date=offer.start.strftime("%Y-%m-%d"),
+            time=offer.start.strftime("%I:%M %p"),
+            duration=f"{offer.minutes} min"
+        )
+        for offer in offers
+    ]
+
 @router.get("/available-doctors", response_model=List[DoctorAvailability])
 def get_available_doctors(
     specialty: str = "General Practice",
@@ -149,7 +420,23 @@ def get_available_doctors(
     """
     Get list of available doctors for a given specialty and date
     """
-    # Get doctors by specialty
+    available_doctors = []
+    
+    doctors = get_candidate_doctors(db, specialty)
+    # Availability of every doctor for the next 7 days in one grouped load
+    slots_by_doctor = get_doctors_availability(db, [doctor.id for doctor in doctors], date)
+    
+    for doctor in doctors:
+        available_slots = slots_by_doctor[doctor.id]
+        if available_slots:  # Only include doctors with available slots
+            available_doctors.append(build_doctor_availability(doctor, available_slots))
+    
+    return available_doctors
+
+def get_candidate_doctors(db: Session, specialty: str) -> List[User]:
+    """
+    Active, verified doctors for a specialty (all doctors if none match)
+    """
     doctors_query = db.query(User).filter(
         User.user_type == UserType.DOCTOR,
         User.is_active == True,
@@ -169,86 +456,236 @@ def get_available_doctors(
             User.is_verified == True
         ).all()
     
-    available_doctors = []
-    
-    for doctor in doctors:
-        # Get doctor's availability for the next 7 days
-        available_slots = get_doctor_availability(db, doctor.id, date)
-        
-        if available_slots:  # Only include doctors with available slots
-            # Fix the type issues here
-            years_exp = getattr(doctor, 'years_experience', None)
-            rating = getattr(doctor, 'rating', None)
-            
-            available_doctors.append(DoctorAvailability(
-                doctor_id=doctor.id,
-                doctor_name=doctor.full_name,
-                specialty=doctor.specialization or "General Practice",
-                experience=f"{years_exp or 5} years",
-                rating=rating or 4.5,
-                available_slots=available_slots
-            ))
-    
-    return available_doctors
+    return doctors
+
+def build_doctor_availability(doctor: User, available_slots: List[dict]) -> DoctorAvailability:
+    """
+    Doctor card with its available slots
+    """
+    # Fix the type issues here
+    years_exp = getattr(doctor, 'years_experience', None)
+    rating = getattr(doctor, 'rating', None)
+    
+    return DoctorAvailability(
+        doctor_id=doctor.id,
+        doctor_name=doctor.full_name,
+        specialty=doctor.specialization or "General Practice",
+        experience=f"{years_exp or 5} years",
+        rating=rating or 4.5,
+        available_slots=available_slots
+    )
 
-def get_doctor_availability(db: Session, doctor_id: int, target_date: Optional[str] = None) -> List[dict]:
+def get_doctors_availability(db: Session, doctor_ids: List[int], target_date: Optional[str] = None) -> Dict[int, List[dict]]:
     """
-    Get available time slots for a doctor
+    Get available time slots for several doctors, loaded together
     """
     base_date = datetime.now().date() if not target_date else datetime.strptime(target_date, "%Y-%m-%d").date()
     
+    # Slot calendars (the doctors' schedules) for the next 7 days, one grouped load
+    calendars = slot_calendar.get_days_many(db, doctor_ids, base_date, 7)
+    return {doctor_id: first_free_slots(calendars[doctor_id]) for doctor_id in doctor_ids}
+
+def first_free_slots(days: Dict[date, DayCalendar], limit: int = 6) -> List[dict]:
+    """
+    First free slots of a doctor's calendar days
+    """
     available_slots = []
     
-    # Generate slots for next 7 days
-    for day_offset in range(7):
-        current_date = base_date + timedelta(days=day_offset)
-        
-        # Skip weekends (simple logic)
-        if current_date.weekday() >= 5:
-            continue
-            
-        # Mock time slots (9 AM to 5 PM)
-        time_slots = [
-            "09:00 AM", "09:30 AM", "10:00 AM", "10:30 AM", "11:00 AM", "11:30 AM",
-            "02:00 PM", "02:30 PM", "03:00 PM", "03:30 PM", "04:00 PM", "04:30 PM"
-        ]
-        
-        # Check existing appointments
-        start_datetime = datetime.combine(current_date, datetime.min.time())
-        end_datetime = datetime.combine(current_date + timedelta(days=1), datetime.min.time())
-        
-        existing_appointments = db.query(Appointment).filter(
-            Appointment.doctor_id == doctor_id,
-            Appointment.appointment_datetime >= start_datetime,
-            Appointment.appointment_datetime < end_datetime,
-            Appointment.status == AppointmentStatus.CONFIRMED
-        ).all()
-        
-        booked_times = [apt.appointment_datetime.strftime("%I:%M %p") for apt in existing_appointments]
-        
+    for current_date, day in days.items():
         # Add available slots
-        for time_slot in time_slots:
-            if time_slot not in booked_times:
+        for slot_start, minutes in day.slots():
+            if day.is_free(slot_start, minutes):
                 available_slots.append({
                     "date": current_date.strftime("%Y-%m-%d"),
-                    "time": time_slot,
-                    "duration": "30 min"
+                    "time": slot_start.strftime("%I:%M %p"),
+                    "duration": f"{minutes} min"
                 })
                 
-        # Limit to max 6 slots to keep response manageable
-        if len(available_slots) >= 6:
+        # Limit to max slots to keep response manageable
+        if len(available_slots) >= limit:
             break
     
-    return available_slots[:6]
+    return available_slots[:limit]
+
+def parse_appointment_datetime(appointment_date: str, appointment_time: str) -> datetime:
+    """
+    Parse a booking's date (YYYY-MM-DD) and time (HH:MM AM/PM)
+    """
+    try:
+        return datetime.strptime(f"{appointment_date} {appointment_time}", "%Y-%m-%d %I:%M %p")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date or time format"
+        )
+
+def get_active_doctor(db: Session, doctor_id: int) -> User:
+    """
+    The doctor being booked, or 404 if there is no such active doctor
+    """
+    doctor = db.query(User).filter(
+        User.id == doctor_id,
+        User.user_type == UserType.DOCTOR,
+        User.is_active == True
+    ).first()
+    
+    if not doctor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found or inactive"
+        )
+    return doctor
+
+def get_bookable_day(db: Session, doctor_id: int, start: datetime, duration: int) -> DayCalendar:
+    """
+    The calendar day of a slot a patient wants to hold or book; rejects
+    slots in the past or outside the doctor's working hours
+    """
+    if start <= datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Appointment time must be in the future"
+        )
+    
+    day = start.date()
+    calendar = slot_calendar.get_days(db, doctor_id, day, 1)[day]
+    if not calendar.is_open(start, duration):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Time slot is outside the doctor's working hours"
+        )
+    return calendar
+
+@router.post("/holds", response_model=SlotHoldResponse)
+def hold_slot(
+    request: SlotHoldRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Hold a free slot for a few minutes while the patient confirms
+    
+    Held slots are shown as taken to everyone else. Holding the same slot
+    again renews the hold; book-appointment with the hold_token (or the
+    same slot) turns it into the appointment. Holds are kept in the worker
+    process that created them (see app/services/slot_holds.py).
+    """
+    if current_user.user_type is not UserType.PATIENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only patients can hold slots"
+        )
+    
+    get_active_doctor(db, request.doctor_id)
+    appointment_datetime = parse_appointment_datetime(request.appointment_date, request.appointment_time)
+    calendar = get_bookable_day(db, request.doctor_id, appointment_datetime, request.duration)
+    # The patient's own hold makes the slot look taken; renewing it is fine
+    renewing = any(
+        hold.patient_id == current_user.id and hold.start == appointment_datetime
+        for hold in slot_holds.doctor_holds(request.doctor_id)
+    )
+    if not renewing and not calendar.is_free(appointment_datetime, request.duration):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Time slot is not available"
+        )
+    
+    hold = slot_holds.hold(request.doctor_id, current_user.id, appointment_datetime, request.duration)
+    if hold is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Time slot is held by another patient"
+        )
+    
+    return SlotHoldResponse(
+        hold_token=hold.token,
+        doctor_id=hold.doctor_id,
+        appointment_datetime=hold.start,
+        duration=hold.minutes,
+        expires_in=int(hold.expires_in())
+    )
+
+@router.delete("/holds/{hold_token}")
+def release_slot_hold(
+    hold_token: str,
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Release a slot hold before it expires
+    """
+    hold = slot_holds.get(hold_token)
+    if hold is None or hold.patient_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hold not found"
+        )
+    
+    slot_holds.release(hold_token)
+    return {"message": "Hold released"}
+
+def run_idempotent(
+    idempotency_key: Optional[str], scope: Tuple[Any, ...], payload: Any, handler: Callable[[], Any]
+) -> Any:
+    """
+    Run handler once per (scope, Idempotency-Key): later requests with the
+    key get the first response back (errors included, except 5xx) and
+    concurrent ones wait for it. Without a key handler just runs.
+    """
+    if idempotency_key is None:
+        return handler()
+    if not 1 <= len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+    
+    def respond() -> StoredResponse:
+        try:
+            return StoredResponse(status_code=status.HTTP_200_OK, body=jsonable_encoder(handler()))
+        except HTTPException as e:
+            if e.status_code >= 500:
+                raise
+            return StoredResponse(status_code=e.status_code, body={"detail": jsonable_encoder(e.detail)})
+    
+    try:
+        response, replayed = idempotency_store.run(
+            (*scope, idempotency_key), request_fingerprint(payload), respond
+        )
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    except IdempotencyTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed"
+        )
+    
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return JSONResponse(status_code=response.status_code, content=response.body, headers=headers)
 
 @router.post("/book-appointment")
 def book_appointment(
     request: AppointmentBookingRequest,
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user)
 ) -> Any:
     """
     Book an appointment with a doctor
+    
+    Retries with the same Idempotency-Key header get the first response
+    back instead of booking again.
+    """
+    return run_idempotent(
+        idempotency_key, ("book-appointment", current_user.id), request.model_dump(),
+        lambda: create_booking(request, db, current_user)
+    )
+
+def create_booking(request: AppointmentBookingRequest, db: Session, current_user: User) -> Dict[str, Any]:
+    """
+    The work of book_appointment
     """
     # Ensure only patients can book appointments
     if current_user.user_type is not UserType.PATIENT:
@@ -257,37 +694,35 @@ def book_appointment(
             detail="Only patients can book appointments"
         )
     
-    # Validate doctor exists and is active
-    doctor = db.query(User).filter(
-        User.id == request.doctor_id,
-        User.user_type == UserType.DOCTOR,
-        User.is_active == True
-    ).first()
-    
-    if not doctor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doctor not found or inactive"
-        )
+    doctor = get_active_doctor(db, request.doctor_id)
     
     # Parse appointment datetime
-    try:
-        appointment_datetime = datetime.strptime(
-            f"{request.appointment_date} {request.appointment_time}", 
-            "%Y-%m-%d %I:%M %p"
-        )
-    except ValueError:
+    appointment_datetime = parse_appointment_datetime(request.appointment_date, request.appointment_time)
+    get_bookable_day(db, request.doctor_id, appointment_datetime, request.duration)
+    
+    if request.hold_token:
+        hold = slot_holds.get(request.hold_token)
+        # An expired hold is no error: the booking goes ahead if the slot is still free
+        if hold is not None and (
+            hold.patient_id != current_user.id
+            or hold.doctor_id != request.doctor_id
+            or hold.start != appointment_datetime
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Hold does not match this appointment"
+            )
+    
+    if slot_holds.conflict(request.doctor_id, appointment_datetime, request.duration, patient_id=current_user.id):
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid date or time format"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Time slot is held by another patient"
         )
     
-    # Check if slot is still available
-    existing_appointment = db.query(Appointment).filter(
-        Appointment.doctor_id == request.doctor_id,
-        Appointment.appointment_datetime == appointment_datetime,
-        Appointment.status == AppointmentStatus.CONFIRMED
-    ).first()
+    # Check the time is still free for the whole duration
+    existing_appointment = crud_appointment.get_overlapping_appointment(
+        db, doctor_id=request.doctor_id, start=appointment_datetime, duration=request.duration
+    )
     
     if existing_appointment:
         raise HTTPException(
@@ -295,23 +730,28 @@ def book_appointment(
             detail="Time slot is no longer available"
         )
     
-    # Create appointment
-    appointment = Appointment(
-        patient_id=current_user.id,
-        doctor_id=request.doctor_id,
-        appointment_datetime=appointment_datetime,
-        duration=request.duration,
-        symptoms=request.symptoms,
-        urgency=AppointmentUrgency(request.urgency),
-        status=AppointmentStatus.CONFIRMED
-    )
+    # Create appointment; the unique index settles a race for the same slot
+    appointment = crud_appointment.create_confirmed(db, obj_in={
+        "patient_id": current_user.id,
+        "doctor_id": request.doctor_id,
+        "appointment_datetime": appointment_datetime,
+        "duration": request.duration,
+        "symptoms": request.symptoms,
+        "urgency": request.urgency
+    })
+    
+    if appointment is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Time slot is no longer available"
+        )
     
-    db.add(appointment)
     db.commit()
-    db.refresh(appointment)
+    slot_calendar.add_booking(appointment)
+    slot_holds.release_slot(request.doctor_id, current_user.id, appointment_datetime)
     
     # TODO: Send confirmation email/SMS
-    # TODO: Add to doctor's calendar
     # TODO: Send notification to doctor
     
     return {
@@ -322,6 +762,146 @@ def book_appointment(
         "confirmation_code": f"APT{appointment.id:06d}"
     }
 
+@router.post("/book-recurring")
+def book_recurring_appointments(
+    request: RecurringBookingRequest,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Book a series of appointments with one doctor (e.g. weekly follow-ups)
+    
+    All or nothing: conflicts of every occurrence are checked with one
+    query, all rows are inserted in one statement and one transaction, and
+    if any occurrence is taken nothing is booked and each conflict is
+    reported. Honours Idempotency-Key like book-appointment.
+    """
+    return run_idempotent(
+        idempotency_key, ("book-recurring", current_user.id), request.model_dump(),
+        lambda: create_recurring_bookings(request, db, current_user)
+    )
+
+def create_recurring_bookings(request: RecurringBookingRequest, db: Session, current_user: User) -> Dict[str, Any]:
+    """
+    The work of book_recurring_appointments
+    """
+    if current_user.user_type is not UserType.PATIENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only patients can book appointments"
+        )
+    
+    doctor = get_active_doctor(db, request.doctor_id)
+    
+    if request.recurrence and request.occurrences:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give either occurrences or a recurrence, not both"
+        )
+    
+    if request.recurrence:
+        first = parse_appointment_datetime(request.appointment_date or "", request.appointment_time or "")
+        try:
+            until = datetime.strptime(request.recurrence.until, '%Y-%m-%d').date() if request.recurrence.until else None
+            starts = expand_recurrence(
+                first,
+                request.recurrence.frequency,
+                interval=request.recurrence.interval,
+                count=request.recurrence.count,
+                until=until,
+                limit=MAX_RECURRING_OCCURRENCES
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid recurrence: {str(e)}"
+            )
+    else:
+        starts = [
+            parse_appointment_datetime(occurrence.appointment_date, occurrence.appointment_time)
+            for occurrence in request.occurrences
+        ]
+    
+    if not starts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No occurrences to book"
+        )
+    starts.sort()
+    
+    # Every conflict of every occurrence, so the patient can fix them all at once
+    conflicts = []
+    length = timedelta(minutes=request.duration)
+    for previous, start in zip(starts, starts[1:]):
+        if start < previous + length:
+            conflicts.append((start, "overlaps another occurrence"))
+    booked = crud_appointment.get_overlapping_appointments(
+        db, doctor_id=request.doctor_id, starts=starts, duration=request.duration
+    )
+    schedule = load_schedule(db, request.doctor_id, starts[0].date(), starts[-1].date())
+    now = datetime.now()
+    for start in starts:
+        if start <= now:
+            conflicts.append((start, "in the past"))
+        elif not DayCalendar.from_windows(start.date(), schedule.windows(start.date())).is_open(start, request.duration):
+            conflicts.append((start, "outside working hours"))
+        elif start in booked:
+            conflicts.append((start, "already booked"))
+        elif slot_holds.conflict(request.doctor_id, start, request.duration, patient_id=current_user.id):
+            conflicts.append((start, "held by another patient"))
+    
+    appointments = []
+    if not conflicts:
+        appointments = crud_appointment.create_confirmed_many(db, objs_in=[
+            {
+                "patient_id": current_user.id,
+                "doctor_id": request.doctor_id,
+                "appointment_datetime": start,
+                "duration": request.duration,
+                "symptoms": request.symptoms,
+                "urgency": request.urgency
+            }
+            for start in starts
+        ])
+        # Lost a race for some slot to a concurrent booking
+        inserted = {appointment.appointment_datetime for appointment in appointments}
+        conflicts = [(start, "already booked") for start in starts if start not in inserted]
+    
+    if conflicts:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Some occurrences are not available; nothing was booked",
+                "conflicts": [
+                    {"appointment_datetime": start.isoformat(), "reason": reason}
+                    for start, reason in sorted(conflicts)
+                ]
+            }
+        )
+    
+    # Keep the loaded rows usable after commit without reloading each one
+    for appointment in appointments:
+        db.expunge(appointment)
+    db.commit()
+    for appointment in appointments:
+        slot_calendar.add_booking(appointment)
+        slot_holds.release_slot(request.doctor_id, current_user.id, appointment.appointment_datetime)
+    
+    return {
+        "message": f"{len(appointments)} appointments booked successfully",
+        "doctor_name": doctor.full_name,
+        "appointments": [
+            {
+                "appointment_id": appointment.id,
+                "appointment_datetime": appointment.appointment_datetime.isoformat(),
+                "confirmation_code": f"APT{appointment.id:06d}"
+            }
+            for appointment in sorted(appointments, key=lambda a: a.appointment_datetime)
+        ]
+    }
+
 @router.get("/my-appointments", response_model=AppointmentListResponse)
 def get_my_appointments(
     db: Session = Depends(deps.get_db),
@@ -369,11 +949,23 @@ def get_my_appointments(
 @router.put("/appointments/{appointment_id}/cancel")
 def cancel_appointment(
     appointment_id: int,
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user)
 ) -> Any:
     """
     Cancel an appointment
+    
+    Honours Idempotency-Key like book-appointment.
+    """
+    return run_idempotent(
+        idempotency_key, ("cancel", current_user.id), {"appointment_id": appointment_id},
+        lambda: cancel_booking(appointment_id, db, current_user)
+    )
+
+def cancel_booking(appointment_id: int, db: Session, current_user: User) -> Dict[str, Any]:
+    """
+    The work of cancel_appointment
     """
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
     
@@ -394,5 +986,6 @@ def cancel_appointment(
     # Update appointment status
     appointment.status = AppointmentStatus.CANCELLED
     db.commit()
+    slot_calendar.remove_booking(appointment)
     
     return {"message": "Appointment cancelled successfully"}
\ No newline at end of file
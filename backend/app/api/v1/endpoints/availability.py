@@ -1,21 +1,54 @@
 # backend/app/api/v1/endpoints/availability.py
+import json
+from collections import Counter
 from datetime import datetime, timedelta, date, time
-from typing import Any, List, Dict, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, List, Dict, Iterator, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
 from app.api import deps
+from app.db.session import SessionLocal
 from app.models.user import UserType, User
 from app.models.appointment import Appointment, AppointmentStatus
+from app.schemas.auth import TokenPayload
+from app.services.availability_cache import etag_matches, public_availability_cache
+from app.services.availability_matrix import iter_free_counts
+from app.services.schedule import (
+    DEFAULT_WEEK,
+    Window,
+    load_schedule,
+    load_weekly,
+    merge_slots,
+    profile_windows,
+    replace_exceptions,
+    replace_weekly,
+    windows_slots,
+)
+from app.services.slot_calendar import (
+    SLOT_BLOCKED,
+    SLOT_BOOKED,
+    TICK_MINUTES,
+    Booking,
+    DayCalendar,
+    encode_ticks,
+    slot_calendar,
+    to_tick,
+)
+from app.services.slots import DEFAULT_SLOT_MINUTES, iter_days, slot_id
 
 router = APIRouter()
 
+MAX_BULK_AVAILABILITY_DAYS = 366
+MAX_AVAILABILITY_MATRIX_DAYS = 56
+COMPACT_AVAILABILITY_MEDIA_TYPE = "application/vnd.availability.compact+json"
+
 # Pydantic models for request/response
 class TimeSlot(BaseModel):
     id: Optional[int] = None
     time: str
-    duration: int
+    duration: int = Field(30, ge=5, le=240)
     isBooked: bool = False
     patientId: Optional[int] = None
 
@@ -28,6 +61,50 @@ class AvailabilityResponse(BaseModel):
     message: str
     availability: Optional[Dict[str, List[TimeSlot]]] = None
 
+class AvailabilityDay(BaseModel):
+    date: str  # YYYY-MM-DD format
+    slots: List[TimeSlot]
+
+class BulkAvailabilityRequest(BaseModel):
+    # Explicit days, and/or the same slots for every date of a range
+    days: List[AvailabilityDay] = []
+    startDate: Optional[str] = None
+    endDate: Optional[str] = None  # inclusive
+    weekdays: Optional[List[int]] = None  # Monday = 0; all days of the range if omitted
+    slots: List[TimeSlot] = []
+
+    @field_validator('weekdays')
+    def check_weekdays(cls, v):
+        if v is not None and any(day < 0 or day > 6 for day in v):
+            raise ValueError('Weekdays are 0 (Monday) to 6 (Sunday)')
+        return v
+
+class WeeklyRule(BaseModel):
+    weekday: int = Field(..., ge=0, le=6)  # Monday = 0
+    start: str  # HH:MM
+    end: str  # HH:MM
+    slotMinutes: int = Field(30, ge=5, le=240)
+
+class WeeklyScheduleRequest(BaseModel):
+    rules: List[WeeklyRule]
+
+class BreakPeriod(BaseModel):
+    start: str  # HH:MM
+    end: str  # HH:MM
+
+class ScheduleProfileRequest(BaseModel):
+    workingDays: List[int] = Field([0, 1, 2, 3, 4], max_length=7)  # Monday = 0
+    start: str = "09:00"
+    end: str = "17:00"
+    slotMinutes: int = Field(30, ge=5, le=240)
+    breaks: List[BreakPeriod] = []
+
+    @field_validator('workingDays')
+    def check_working_days(cls, v):
+        if any(day < 0 or day > 6 for day in v):
+            raise ValueError('Working days are 0 (Monday) to 6 (Sunday)')
+        return v
+
 class DoctorPublicInfo(BaseModel):
     id: int
     full_name: str
@@ -38,11 +115,18 @@ class DoctorPublicInfo(BaseModel):
 
 @router.get("/doctor/availability", response_model=AvailabilityResponse)
 def get_doctor_availability(
+    response: Response,
+    format: Optional[str] = None,
+    accept: Optional[str] = Header(None),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user)
 ) -> Any:
     """
     Get doctor's availability schedule
+    
+    format=compact (or Accept: application/vnd.availability.compact+json)
+    returns one bitmask per day instead of a list of slot objects, see
+    build_compact_availability.
     """
     # Ensure only doctors can access their availability
     if current_user.user_type is not UserType.DOCTOR:
@@ -51,72 +135,41 @@ def get_doctor_availability(
             detail="Only doctors can access availability settings"
         )
     
+    compact = format == "compact" or COMPACT_AVAILABILITY_MEDIA_TYPE in (accept or "")
     try:
         # Get next 30 days of availability
         start_date = datetime.now().date()
-        end_date = start_date + timedelta(days=30)
+        days = slot_calendar.get_days(db, current_user.id, start_date, 30)
         
-        # Get existing appointments to determine availability
-        appointments = db.query(Appointment).filter(
-            Appointment.doctor_id == current_user.id,
-            Appointment.appointment_datetime >= datetime.combine(start_date, time.min),
-            Appointment.appointment_datetime <= datetime.combine(end_date, time.max),
-            Appointment.status == AppointmentStatus.CONFIRMED
-        ).all()
+        if compact:
+            return JSONResponse(
+                content=build_compact_availability(start_date, days),
+                media_type=COMPACT_AVAILABILITY_MEDIA_TYPE,
+                headers={"Vary": "Accept"}
+            )
+        response.headers["Vary"] = "Accept"
         
         # Create availability dictionary
         availability_dict = {}
         
-        # Generate available slots for each day
-        for day_offset in range(30):
-            current_date = start_date + timedelta(days=day_offset)
-            date_key = current_date.strftime('%Y-%m-%d')
+        # Slots of the doctor's schedule for each day
+        for current_date, day in days.items():
+            daily_slots = []
+            for index, (slot_start, minutes) in enumerate(day.slots(), start=1):
+                state = day.slot_state(slot_start, minutes)
+                if state == SLOT_BLOCKED:
+                    continue
+                booking = day.booking_at(slot_start, minutes) if state == SLOT_BOOKED else None
+                daily_slots.append(TimeSlot(
+                    id=slot_id(current_date, index),
+                    time=slot_start.strftime('%H:%M'),
+                    duration=minutes,
+                    isBooked=booking is not None,
+                    patientId=booking.patient_id if booking else None
+                ))
             
-            # Skip weekends for now (can be customized later)
-            if current_date.weekday() < 5:  # Monday = 0, Friday = 4
-                # Generate default time slots (9 AM to 5 PM, 30-minute intervals)
-                daily_slots = []
-                start_hour = 9
-                end_hour = 17
-                
-                current_time = datetime.combine(current_date, time(start_hour, 0))
-                end_time = datetime.combine(current_date, time(end_hour, 0))
-                
-                slot_id = 1
-                while current_time < end_time:
-                    time_str = current_time.strftime('%H:%M')
-                    
-                    # Check if this slot is booked
-                    is_booked = any(
-                        apt.appointment_datetime.date() == current_date and
-                        apt.appointment_datetime.time() == current_time.time()
-                        for apt in appointments
-                    )
-                    
-                    # Find patient ID if booked
-                    patient_id = None
-                    if is_booked:
-                        booked_apt = next(
-                            (apt for apt in appointments 
-                             if apt.appointment_datetime.date() == current_date and
-                             apt.appointment_datetime.time() == current_time.time()),
-                            None
-                        )
-                        if booked_apt and booked_apt.patient_id:
-                            patient_id = booked_apt.patient_id
-                    
-                    daily_slots.append(TimeSlot(
-                        id=int(f"{current_date.strftime('%Y%m%d')}{slot_id:02d}"),
-                        time=time_str,
-                        duration=30,
-                        isBooked=is_booked,
-                        patientId=patient_id
-                    ))
-                    
-                    current_time += timedelta(minutes=30)
-                    slot_id += 1
-                
-                availability_dict[date_key] = daily_slots
+            if daily_slots:
+                availability_dict[current_date.strftime('%Y-%m-%d')] = daily_slots
         
         return AvailabilityResponse(
             success=True,
@@ -130,6 +183,76 @@ def get_doctor_availability(
             detail=f"Error retrieving availability: {str(e)}"
         )
 
+def build_compact_availability(start_date: date, days: Dict[date, DayCalendar]) -> Dict[str, Any]:
+    """
+    Compact form of the doctor's availability view
+    
+    The grid (tick and usual slot length) is sent once. Per day, "slots" is
+    the base64 tick mask of the slots shown in the full view (bit n of byte
+    k set = a slot starts 5 * (8k + n) minutes after midnight), "booked"
+    lists [tick, patientId] of the booked ones and "durations" lists
+    [tick, minutes] of slots whose length differs from the grid's.
+    """
+    shown: Dict[date, List[Tuple[int, int, Optional[Booking]]]] = {}
+    lengths: Counter = Counter()
+    for current_date, day in days.items():
+        for slot_start, minutes in day.slots():
+            state = day.slot_state(slot_start, minutes)
+            if state == SLOT_BLOCKED:
+                continue
+            booking = day.booking_at(slot_start, minutes) if state == SLOT_BOOKED else None
+            shown.setdefault(current_date, []).append((to_tick(slot_start.time()), minutes, booking))
+            lengths[minutes] += 1
+    slot_minutes = lengths.most_common(1)[0][0] if lengths else DEFAULT_SLOT_MINUTES
+    
+    compact_days = {}
+    for current_date, slots in shown.items():
+        mask = 0
+        for tick, _, _ in slots:
+            mask |= 1 << tick
+        compact_day = {
+            'slots': encode_ticks(mask),
+            'booked': [[tick, booking.patient_id] for tick, _, booking in slots if booking is not None]
+        }
+        durations = [[tick, minutes] for tick, minutes, _ in slots if minutes != slot_minutes]
+        if durations:
+            compact_day['durations'] = durations
+        compact_days[current_date.strftime('%Y-%m-%d')] = compact_day
+    
+    return {
+        'success': True,
+        'format': 'compact',
+        'grid': {
+            'startDate': start_date.strftime('%Y-%m-%d'),
+            'days': len(days),
+            'tickMinutes': TICK_MINUTES,
+            'slotMinutes': slot_minutes
+        },
+        'availability': compact_days
+    }
+
+def slot_windows(slots: List[TimeSlot]) -> List[Window]:
+    """
+    Schedule windows covering a day's slots (400 for a bad time or a slot not ending by midnight)
+    """
+    parsed = []
+    for slot in slots:
+        try:
+            start = datetime.strptime(slot.time, '%H:%M').time()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid time {slot.time!r}. Use HH:MM"
+            )
+        # Windows are times of day, so a slot must end before midnight
+        if start.hour * 60 + start.minute + slot.duration >= 24 * 60:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The {slot.duration} minute slot at {slot.time} must end before midnight"
+            )
+        parsed.append((start, slot.duration))
+    return merge_slots(parsed)
+
 @router.post("/doctor/availability", response_model=AvailabilityResponse)
 def save_doctor_availability(
     request: AvailabilityRequest,
@@ -146,43 +269,17 @@ def save_doctor_availability(
             detail="Only doctors can save availability"
         )
     
+    # The day's slots (booked ones included - they are still working time)
+    # become a schedule exception overriding the weekly rules for this date
+    windows = slot_windows(request.slots)
+    
     try:
         # Parse the date
         availability_date = datetime.strptime(request.date, '%Y-%m-%d').date()
         
-        # For now, we'll store availability as appointments with special status
-        # In a production app, you might want a separate availability table
-        
-        # Remove existing "availability" appointments for this date
-        existing_availability = db.query(Appointment).filter(
-            Appointment.doctor_id == current_user.id,
-            Appointment.appointment_datetime >= datetime.combine(availability_date, time.min),
-            Appointment.appointment_datetime < datetime.combine(availability_date + timedelta(days=1), time.min),
-            Appointment.status == AppointmentStatus.AVAILABLE
-        ).all()
-        
-        for apt in existing_availability:
-            db.delete(apt)
-        
-        # Create new availability slots
-        for slot in request.slots:
-            if not slot.isBooked:  # Only create availability for non-booked slots
-                slot_time = datetime.strptime(slot.time, '%H:%M').time()
-                slot_datetime = datetime.combine(availability_date, slot_time)
-                
-                # Create availability entry
-                availability_appointment = Appointment(
-                    doctor_id=current_user.id,
-                    patient_id=None,
-                    appointment_datetime=slot_datetime,
-                    duration=slot.duration,
-                    status=AppointmentStatus.AVAILABLE,
-                    symptoms="AVAILABILITY_SLOT"  # Marker to identify availability slots
-                )
-                
-                db.add(availability_appointment)
-        
+        replace_exceptions(db, current_user.id, {availability_date: windows})
         db.commit()
+        slot_calendar.set_windows(current_user.id, availability_date, windows)
         
         return AvailabilityResponse(
             success=True,
@@ -201,15 +298,296 @@ def save_doctor_availability(
             detail=f"Error saving availability: {str(e)}"
         )
 
+def stranded_appointments(db: Session, doctor_id: int, new_windows: Dict[date, List[Window]]) -> List[Appointment]:
+    """
+    Confirmed appointments on the given days that the new windows would no longer cover
+    """
+    if not new_windows:
+        return []
+    appointments = db.query(Appointment).filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.status == AppointmentStatus.CONFIRMED,
+        Appointment.appointment_datetime >= datetime.combine(min(new_windows), time.min),
+        Appointment.appointment_datetime < datetime.combine(max(new_windows) + timedelta(days=1), time.min)
+    ).order_by(Appointment.appointment_datetime).all()
+    
+    days = {}
+    stranded = []
+    for apt in appointments:
+        day = apt.appointment_datetime.date()
+        if day not in new_windows:
+            continue
+        if day not in days:
+            days[day] = DayCalendar.from_windows(day, tuple(new_windows[day]))
+        if not days[day].is_open(apt.appointment_datetime, apt.duration or DEFAULT_SLOT_MINUTES):
+            stranded.append(apt)
+    return stranded
+
+@router.post("/doctor/availability/bulk")
+def save_doctor_availability_bulk(
+    request: BulkAvailabilityRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Save availability for many days at once and return what changed
+    
+    All or nothing: if the new availability no longer covers a confirmed
+    appointment, nothing is saved and the appointments are listed (409).
+    """
+    if current_user.user_type is not UserType.DOCTOR:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can save availability"
+        )
+    
+    try:
+        requested: Dict[date, List[TimeSlot]] = {}
+        if request.startDate or request.endDate:
+            range_start = datetime.strptime(request.startDate or request.endDate, '%Y-%m-%d').date()
+            range_end = datetime.strptime(request.endDate or request.startDate, '%Y-%m-%d').date()
+            for day in iter_days(range_start, (range_end - range_start).days + 1):
+                if request.weekdays is None or day.weekday() in request.weekdays:
+                    requested[day] = request.slots
+        # Explicit days win over the range
+        for item in request.days:
+            requested[datetime.strptime(item.date, '%Y-%m-%d').date()] = item.slots
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+    
+    new_windows = {day: slot_windows(slots) for day, slots in requested.items()}
+    
+    if not new_windows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide days or a startDate/endDate range"
+        )
+    if len(new_windows) > MAX_BULK_AVAILABILITY_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_AVAILABILITY_DAYS} days can be saved at once"
+        )
+    
+    # Diff against the schedule currently in effect, and only write days that change
+    current = load_schedule(db, current_user.id, min(new_windows), max(new_windows))
+    changes = {}
+    changed_windows = {}
+    for day in sorted(new_windows):
+        before = set(current.day_slots(day))
+        after = set(windows_slots(day, new_windows[day]))
+        if before == after:
+            continue
+        changed_windows[day] = new_windows[day]
+        changes[day.strftime('%Y-%m-%d')] = {
+            'added': [start.strftime('%H:%M') for start, _ in sorted(after - before)],
+            'removed': [start.strftime('%H:%M') for start, _ in sorted(before - after)]
+        }
+    
+    # Closing time that patients have already booked must not go unnoticed:
+    # nothing is saved and every affected appointment is listed
+    stranded = stranded_appointments(db, current_user.id, changed_windows)
+    if stranded:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Some confirmed appointments fall outside the new availability; nothing was saved",
+                "conflicts": [
+                    {
+                        "appointmentId": apt.id,
+                        "date": apt.appointment_datetime.strftime('%Y-%m-%d'),
+                        "time": apt.appointment_datetime.strftime('%H:%M'),
+                        "duration": apt.duration or DEFAULT_SLOT_MINUTES
+                    }
+                    for apt in stranded
+                ]
+            }
+        )
+    
+    try:
+        replace_exceptions(db, current_user.id, changed_windows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error saving availability: {str(e)}"
+        )
+    
+    for day, windows in changed_windows.items():
+        slot_calendar.set_windows(current_user.id, day, windows)
+    
+    return {
+        'success': True,
+        'message': f"Availability saved for {len(changed_windows)} day(s)",
+        'summary': {
+            'daysChanged': len(changed_windows),
+            'daysUnchanged': len(new_windows) - len(changed_windows),
+            'slotsAdded': sum(len(change['added']) for change in changes.values()),
+            'slotsRemoved': sum(len(change['removed']) for change in changes.values())
+        },
+        'changes': changes
+    }
+
+@router.get("/doctor/schedule")
+def get_weekly_schedule(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Get the doctor's recurring weekly schedule
+    """
+    if current_user.user_type is not UserType.DOCTOR:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can access availability settings"
+        )
+    
+    weekly = load_weekly(db, current_user.id)
+    rules = [
+        WeeklyRule(
+            weekday=weekday,
+            start=window.start.strftime('%H:%M'),
+            end=window.end.strftime('%H:%M'),
+            slotMinutes=window.slot_minutes
+        )
+        for weekday in sorted(weekly)
+        for window in weekly[weekday]
+    ]
+    return {'success': True, 'isDefault': weekly is DEFAULT_WEEK, 'rules': rules}
+
+@router.put("/doctor/schedule")
+def save_weekly_schedule(
+    request: WeeklyScheduleRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Replace the doctor's recurring weekly schedule
+    """
+    if current_user.user_type is not UserType.DOCTOR:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can save availability"
+        )
+    
+    try:
+        weekly: Dict[int, List[Window]] = {}
+        for rule in request.rules:
+            start_time = datetime.strptime(rule.start, '%H:%M').time()
+            end_time = datetime.strptime(rule.end, '%H:%M').time()
+            if end_time <= start_time:
+                raise ValueError(f"Rule for weekday {rule.weekday} ends before it starts")
+            weekly.setdefault(rule.weekday, []).append(Window(start_time, end_time, rule.slotMinutes))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid schedule rule: {str(e)}"
+        )
+    
+    replace_weekly(db, current_user.id, weekly)
+    db.commit()
+    # Every loaded day may change, so reload the doctor's calendar lazily
+    slot_calendar.rebuild(current_user.id)
+    
+    return {'success': True, 'message': 'Weekly schedule saved successfully'}
+
+@router.put("/doctor/schedule/profile")
+def save_schedule_profile(
+    request: ScheduleProfileRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Set the doctor's weekly schedule from working days, hours, slot length and breaks
+    """
+    if current_user.user_type is not UserType.DOCTOR:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can save availability"
+        )
+    
+    try:
+        start_time = datetime.strptime(request.start, '%H:%M').time()
+        end_time = datetime.strptime(request.end, '%H:%M').time()
+        if end_time <= start_time:
+            raise ValueError("Working hours end before they start")
+        breaks = []
+        for period in request.breaks:
+            break_start = datetime.strptime(period.start, '%H:%M').time()
+            break_end = datetime.strptime(period.end, '%H:%M').time()
+            if break_end <= break_start:
+                raise ValueError(f"Break {period.start}-{period.end} ends before it starts")
+            breaks.append((break_start, break_end))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid schedule profile: {str(e)}"
+        )
+    
+    windows = profile_windows(start_time, end_time, request.slotMinutes, breaks)
+    if not any(window.offsets().shape[0] for window in windows):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid schedule profile: no slot fits in the working hours"
+        )
+    replace_weekly(db, current_user.id, {weekday: windows for weekday in set(request.workingDays)})
+    db.commit()
+    slot_calendar.rebuild(current_user.id)
+    
+    return {
+        'success': True,
+        'message': 'Weekly schedule saved successfully',
+        'windows': [
+            {'start': window.start.strftime('%H:%M'), 'end': window.end.strftime('%H:%M'), 'slotMinutes': window.slot_minutes}
+            for window in windows
+        ]
+    }
+
 @router.get("/doctor/{doctor_id}/availability")
 def get_doctor_public_availability(
     doctor_id: int,
     date: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user)
+    token: TokenPayload = Depends(deps.get_token_payload)
 ) -> Any:
     """
     Get a doctor's public availability (for patients to view)
+    
+    Served from a cache invalidated by bookings, cancellations and
+    availability changes; If-None-Match with the current ETag gets a 304
+    without touching the database.
+    """
+    try:
+        # Get availability for next 7 days from specified date or today
+        start_date = datetime.now().date()
+        if date:
+            start_date = datetime.strptime(date, '%Y-%m-%d').date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+    
+    cached = public_availability_cache.get(doctor_id, start_date)
+    if cached is None:
+        # Taken before reading, so a change made meanwhile isn't cached under it
+        generation = public_availability_cache.generation(doctor_id)
+        cached = public_availability_cache.set(
+            doctor_id, start_date, generation, build_public_availability(db, doctor_id, start_date)
+        )
+    
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+def build_public_availability(db: Session, doctor_id: int, start_date: date) -> Dict[str, Any]:
+    """
+    Free slots of an active doctor for the 7 days from start_date
     """
     # Verify doctor exists
     doctor = db.query(User).filter(
@@ -225,61 +603,27 @@ def get_doctor_public_availability(
         )
     
     try:
-        # Get availability for next 7 days from specified date or today
-        start_date = datetime.now().date()
-        if date:
-            start_date = datetime.strptime(date, '%Y-%m-%d').date()
-        
-        end_date = start_date + timedelta(days=7)
-        
-        # Get confirmed appointments (booked slots)
-        booked_appointments = db.query(Appointment).filter(
-            Appointment.doctor_id == doctor_id,
-            Appointment.appointment_datetime >= datetime.combine(start_date, time.min),
-            Appointment.appointment_datetime <= datetime.combine(end_date, time.max),
-            Appointment.status == AppointmentStatus.CONFIRMED
-        ).all()
+        days = slot_calendar.get_days(db, doctor_id, start_date, 7)
         
         # Generate availability
         availability_dict = {}
         
-        for day_offset in range(7):
-            current_date = start_date + timedelta(days=day_offset)
-            date_key = current_date.strftime('%Y-%m-%d')
+        for current_date, day in days.items():
+            # Scheduled slots, only the ones still free
+            available_slots = [
+                {
+                    'id': slot_id(current_date, index),
+                    'time': slot_start.strftime('%H:%M'),
+                    'duration': minutes,
+                    'isBooked': False,
+                    'patientId': None
+                }
+                for index, (slot_start, minutes) in enumerate(day.slots(), start=1)
+                if day.is_free(slot_start, minutes)
+            ]
             
-            # Skip weekends
-            if current_date.weekday() < 5:
-                available_slots = []
-                
-                # Generate time slots (9 AM to 5 PM)
-                start_hour = 9
-                end_hour = 17
-                
-                current_time = datetime.combine(current_date, time(start_hour, 0))
-                end_time = datetime.combine(current_date, time(end_hour, 0))
-                
-                slot_id = 1
-                while current_time < end_time:
-                    # Check if this slot is booked
-                    is_booked = any(
-                        apt.appointment_datetime == current_time
-                        for apt in booked_appointments
-                    )
-                    
-                    if not is_booked:  # Only return available slots
-                        available_slots.append({
-                            'id': int(f"{current_date.strftime('%Y%m%d')}{slot_id:02d}"),
-                            'time': current_time.strftime('%H:%M'),
-                            'duration': 30,
-                            'isBooked': False,
-                            'patientId': None
-                        })
-                    
-                    current_time += timedelta(minutes=30)
-                    slot_id += 1
-                
-                if available_slots:  # Only include days with available slots
-                    availability_dict[date_key] = available_slots
+            if available_slots:  # Only include days with available slots
+                availability_dict[current_date.strftime('%Y-%m-%d')] = available_slots
         
         return {
             'success': True,
@@ -348,4 +692,96 @@ def get_doctors_by_specialty(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving doctors: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/specialty/{specialty}/matrix")
+def get_specialty_availability_matrix(
+    specialty: str,
+    date: Optional[str] = None,
+    days: int = 28,
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Free slot counts per day for every doctor of a specialty (staff only)
+    
+    Streamed as NDJSON: a first line with the dates, then one line per
+    doctor as soon as that doctor's counts are computed.
+    """
+    if current_user.user_type is UserType.PATIENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only staff can view the availability matrix"
+        )
+    
+    if not 1 <= days <= MAX_AVAILABILITY_MATRIX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"days must be between 1 and {MAX_AVAILABILITY_MATRIX_DAYS}"
+        )
+    
+    try:
+        start_date = datetime.now().date()
+        if date:
+            start_date = datetime.strptime(date, '%Y-%m-%d').date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+    
+    return StreamingResponse(
+        stream_availability_matrix(specialty, start_date, days),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def stream_availability_matrix(specialty: str, start_date: date, n_days: int) -> Iterator[str]:
+    """
+    Generate the NDJSON lines for get_specialty_availability_matrix
+    """
+    yield json.dumps({
+        'specialty': specialty,
+        'dates': [day.strftime('%Y-%m-%d') for day in iter_days(start_date, n_days)]
+    }) + "\n"
+    
+    # The request-scoped session may already be closed while the body
+    # streams, so the generator owns its own session
+    db = SessionLocal()
+    try:
+        doctors_query = db.query(User.id, User.full_name).filter(
+            User.user_type == UserType.DOCTOR,
+            User.is_active == True,
+            User.is_verified == True
+        )
+        if specialty.lower() != "general practice":
+            doctors_query = doctors_query.filter(User.specialization.ilike(f"%{specialty}%"))
+        names = dict(doctors_query.order_by(User.id).all())
+        
+        for doctor_id, counts in iter_free_counts(db, list(names), start_date, n_days):
+            yield json.dumps({
+                'doctorId': doctor_id,
+                'fullName': names[doctor_id],
+                'counts': counts,
+                'total': sum(counts)
+            }) + "\n"
+    except Exception as e:
+        yield json.dumps({'error': f"Error computing availability matrix: {str(e)}"}) + "\n"
+    finally:
+        db.close()
+
+@router.post("/calendar/rebuild")
+def rebuild_slot_calendar(
+    doctor_id: Optional[int] = None,
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Drop the in-memory slot calendar (one doctor or all) so it is rebuilt from the database (admins only)
+    """
+    if current_user.user_type is not UserType.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can rebuild the slot calendar"
+        )
+    
+    slot_calendar.rebuild(doctor_id)
+    return {"success": True, "stats": slot_calendar.stats()}
@@ -0,0 +1,111 @@
+# backend/app/api/v1/endpoints/chat.py
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+
+from app.api import deps
+from app.models.user import UserType, User
+from app.api.v1.endpoints.appointments import SymptomAnalysisResponse, build_analysis_response
+from app.services.chat_sessions import ChatSession, chat_sessions
+
+router = APIRouter()
+
+# Pydantic models for request/response
+class ChatMessageRequest(BaseModel):
+    message: str
+
+class ChatTurn(BaseModel):
+    text: str
+    urgency: str
+    specialty: str
+    at: float
+
+class ChatSessionResponse(BaseModel):
+    session_id: str
+    turns_analyzed: int
+    analysis: Optional[SymptomAnalysisResponse] = None
+    recent_turns: List[ChatTurn] = []
+
+def get_own_session(session_id: str, current_user: User) -> ChatSession:
+    """
+    Look up a session belonging to the current user or raise 404
+    """
+    session = chat_sessions.get(session_id, current_user.id)
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found or expired"
+        )
+    return session
+
+@router.post("/sessions", response_model=ChatSessionResponse)
+def create_chat_session(
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Start a new chatbot session
+    """
+    if current_user.user_type is not UserType.PATIENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only patients can use the symptom chatbot"
+        )
+
+    session = chat_sessions.create(current_user.id)
+    return ChatSessionResponse(session_id=session.id, turns_analyzed=0)
+
+@router.post("/sessions/{session_id}/messages", response_model=ChatSessionResponse)
+def post_chat_message(
+    session_id: str,
+    request: ChatMessageRequest,
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Add a message to a session. Only the new message is analyzed; its result
+    is merged into the session's running triage state.
+    """
+    session = get_own_session(session_id, current_user)
+    verdict = chat_sessions.add_message(session, request.message)
+
+    return ChatSessionResponse(
+        session_id=session.id,
+        turns_analyzed=session.state.turns_analyzed,
+        analysis=build_analysis_response(verdict)
+    )
+
+@router.get("/sessions/{session_id}", response_model=ChatSessionResponse)
+def get_chat_session(
+    session_id: str,
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Current triage state and the most recent turns of a session
+    """
+    session = get_own_session(session_id, current_user)
+    turns = chat_sessions.recent_turns(session)
+    analysis = None
+    if session.state.turns_analyzed:
+        analysis = build_analysis_response(session.state.verdict(chat_sessions.analyzer))
+
+    return ChatSessionResponse(
+        session_id=session.id,
+        turns_analyzed=session.state.turns_analyzed,
+        analysis=analysis,
+        recent_turns=[ChatTurn(**turn) for turn in turns]
+    )
+
+@router.delete("/sessions/{session_id}")
+def delete_chat_session(
+    session_id: str,
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    End a chatbot session
+    """
+    if not chat_sessions.delete(session_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found or expired"
+        )
+
+    return {"message": "Chat session ended"}
@@ -1,8 +1,12 @@
 # backend/app/core/config.py
+import os
 from typing import List, Any
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
 
+# backend/ directory, so data file defaults don't depend on the working directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class Settings(BaseSettings):
     # API Settings
     API_V1_STR: str = "/api/v1"
@@ -23,6 +27,42 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: str = "development"
     
+    # Symptom triage (rules file, trained specialty model - see train_triage_model.py)
+    TRIAGE_RULES_PATH: str = os.path.join(BACKEND_DIR, "triage_rules.json")
+    # Real words are never typo-corrected into keywords (see build_english_words.py)
+    TRIAGE_ENGLISH_WORDS_PATH: str = os.path.join(BACKEND_DIR, "english_words.txt")
+    TRIAGE_RULES_WATCH_INTERVAL_SECONDS: int = 10  # 0 disables the file watcher
+    TRIAGE_MODEL_DIR: str = os.path.join(BACKEND_DIR, "models", "triage")
+    TRIAGE_CACHE_SIZE: int = 10000
+    TRIAGE_CACHE_TTL_SECONDS: int = 3600
+    
+    # Condition knowledge base (see build_condition_kb.py)
+    CONDITION_KB_DIR: str = os.path.join(BACKEND_DIR, "models", "conditions")
+    CONDITION_TOP_K: int = 3
+    
+    # Chatbot sessions
+    CHAT_MAX_SESSIONS: int = 5000
+    CHAT_MAX_TURNS: int = 50
+    CHAT_SESSION_IDLE_TTL_SECONDS: int = 1800
+    
+    # In-memory slot calendar (see app/services/slot_calendar.py)
+    SLOT_CALENDAR_MAX_DOCTORS: int = 2000
+    SLOT_CALENDAR_TTL_SECONDS: int = 300  # bounds drift from bookings made by other workers
+    EARLIEST_SLOT_HORIZON_DAYS: int = 28  # how far ahead the earliest-slot search looks
+    URGENT_EARLIEST_SLOTS: int = 3  # earliest slots attached to urgent triage results
+    PUBLIC_AVAILABILITY_CACHE_SIZE: int = 5000
+    PUBLIC_AVAILABILITY_CACHE_TTL_SECONDS: int = 60  # bounds staleness from changes made by other workers
+    
+    # Slot holds while a patient confirms (see app/services/slot_holds.py)
+    SLOT_HOLD_TTL_SECONDS: int = 300
+    SLOT_HOLD_MAX_PER_PATIENT: int = 2
+    SLOT_HOLD_REAP_INTERVAL_SECONDS: int = 15
+    
+    # Idempotency-Key replay for booking and cancellation (see app/services/idempotency.py)
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_WAIT_SECONDS: int = 30  # how long a duplicate waits for the request still running
+    
     # Email (optional)
     # SMTP_TLS: bool = True
     # SMTP_PORT: int = 587
@@ -1,11 +1,15 @@
 # backend/app/crud/crud_appointment.py
-from typing import List, Optional
-from datetime import datetime, date
+from typing import Dict, List, Optional, Sequence
+from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 
 from app.models.appointment import Appointment, AppointmentStatus
 from app.models.user import User
+from app.services.booking_index import Booking, BookingIndex
+from app.services.slots import DEFAULT_SLOT_MINUTES, MAX_APPOINTMENT_MINUTES
 
 class CRUDAppointment:
     def create(self, db: Session, *, obj_in: dict) -> Appointment:
@@ -16,6 +20,53 @@ class CRUDAppointment:
         db.refresh(db_obj)
         return db_obj
 
+    def create_confirmed(self, db: Session, *, obj_in: dict) -> Optional[Appointment]:
+        """
+        Insert a confirmed appointment unless the doctor already has one at
+        that start time, or on PostgreSQL one overlapping it (then return
+        None). One INSERT ... ON CONFLICT DO NOTHING RETURNING round trip
+        against the partial unique index (and the exclusion constraint on
+        PostgreSQL), so concurrent bookings of the same slot can't both
+        succeed. Does not commit.
+        """
+        created = self.create_confirmed_many(db, objs_in=[obj_in])
+        return created[0] if created else None
+
+    def create_confirmed_many(self, db: Session, *, objs_in: List[dict]) -> List[Appointment]:
+        """
+        Insert confirmed appointments in one multi-row statement, skipping
+        any whose doctor and start time are already taken (on PostgreSQL,
+        any that overlap a confirmed appointment). Returns the rows
+        actually inserted; compare with objs_in to find the skipped ones.
+        Does not commit.
+        """
+        values = [{**obj_in, "status": AppointmentStatus.CONFIRMED} for obj_in in objs_in]
+        if not values:
+            return []
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            # No conflict target, so exclusion constraint violations are skipped too
+            stmt = postgresql.insert(Appointment).values(values).on_conflict_do_nothing().returning(Appointment)
+            return list(db.scalars(stmt))
+        if dialect == "sqlite":
+            stmt = sqlite.insert(Appointment).values(values).on_conflict_do_nothing(
+                index_elements=[Appointment.doctor_id, Appointment.appointment_datetime],
+                index_where=Appointment.status == AppointmentStatus.CONFIRMED
+            ).returning(Appointment)
+            return list(db.scalars(stmt))
+        
+        # Other databases: let the unique index reject rows one at a time
+        created = []
+        for row in values:
+            db_obj = Appointment(**row)
+            try:
+                with db.begin_nested():
+                    db.add(db_obj)
+            except IntegrityError:
+                continue
+            created.append(db_obj)
+        return created
+
     def get(self, db: Session, id: int) -> Optional[Appointment]:
         """Get appointment by ID"""
         return db.query(Appointment).filter(Appointment.id == id).first()
@@ -46,15 +97,53 @@ class CRUDAppointment:
             )
         ).all()
 
-    def get_appointment_by_datetime(self, db: Session, *, doctor_id: int, appointment_datetime: datetime) -> Optional[Appointment]:
-        """Check if a specific datetime slot is already booked"""
-        return db.query(Appointment).filter(
-            and_(
-                Appointment.doctor_id == doctor_id,
-                Appointment.appointment_datetime == appointment_datetime,
-                Appointment.status == AppointmentStatus.CONFIRMED
-            )
-        ).first()
+    def get_overlapping_appointment(self, db: Session, *, doctor_id: int, start: datetime, duration: int) -> Optional[Appointment]:
+        """Confirmed appointment overlapping [start, start + duration), if any"""
+        return self.get_overlapping_appointments(db, doctor_id=doctor_id, starts=[start], duration=duration).get(start)
+
+    def get_overlapping_appointments(
+        self, db: Session, *, doctor_id: int, starts: Sequence[datetime], duration: int
+    ) -> Dict[datetime, Appointment]:
+        """
+        For each start, a confirmed appointment overlapping [start, start +
+        duration) if there is one. One query whatever the number of starts.
+        """
+        if not starts:
+            return {}
+        # No appointment is longer than MAX_APPOINTMENT_MINUTES, so only
+        # ones starting that long before an interval can reach into it
+        reach = timedelta(minutes=MAX_APPOINTMENT_MINUTES)
+        candidates = db.query(Appointment).filter(
+            Appointment.doctor_id == doctor_id,
+            Appointment.status == AppointmentStatus.CONFIRMED,
+            or_(*(
+                and_(
+                    Appointment.appointment_datetime > start - reach,
+                    Appointment.appointment_datetime < start + timedelta(minutes=duration)
+                )
+                for start in starts
+            ))
+        ).all()
+        if not candidates:
+            return {}
+        
+        # Minutes after midnight of the first start's day (negative before it)
+        midnight = datetime.combine(min(starts).date(), datetime.min.time())
+        def minutes_after(value: datetime) -> int:
+            return int((value - midnight).total_seconds()) // 60
+        
+        index = BookingIndex(
+            Booking(apt.id, apt.patient_id, minutes_after(apt.appointment_datetime),
+                    minutes_after(apt.appointment_datetime) + (apt.duration or DEFAULT_SLOT_MINUTES))
+            for apt in candidates
+        )
+        by_id = {apt.id: apt for apt in candidates}
+        conflicts = {}
+        for start in starts:
+            conflict = index.conflict(minutes_after(start), minutes_after(start) + duration)
+            if conflict is not None:
+                conflicts[start] = by_id[conflict.appointment_id]
+        return conflicts
 
     def update(self, db: Session, *, db_obj: Appointment, obj_in: dict) -> Appointment:
         """Update an appointment"""
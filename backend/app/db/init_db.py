@@ -117,7 +117,7 @@ def create_tables():
     """
     from app.db.session import engine
     # Import ALL models here to ensure they are registered with SQLAlchemy
-    from app.models import user, appointment
+    from app.models import user, appointment, schedule
     
     # Import Base to create tables
     from app.db.session import Base
@@ -159,7 +159,15 @@ def add_missing_columns():
                     print("✅ patient_gender column already exists")
                 else:
                     print(f"❌ Error adding patient_gender: {e}")
-            
+
+            # Weekly rules without times mark a weekday closed
+            try:
+                conn.execute(text("ALTER TABLE doctor_schedule_rules ALTER COLUMN start_time DROP NOT NULL"))
+                conn.execute(text("ALTER TABLE doctor_schedule_rules ALTER COLUMN end_time DROP NOT NULL"))
+                print("✅ Schedule rule times are nullable")
+            except Exception as e:
+                print(f"❌ Error relaxing schedule rule times: {e}")
+
             # Commit the changes
             conn.commit()
             print("✅ Database schema updated successfully!")
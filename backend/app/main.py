@@ -3,6 +3,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.services.slot_holds import slot_holds
+from app.services.triage import rules_reloader
 
 app = FastAPI(
     title=settings.PROJECT_NAME + " API",
@@ -24,6 +26,18 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+def start_triage_rules_watcher():
+    # Each worker polls the rules file so edits reach all of them
+    if settings.TRIAGE_RULES_WATCH_INTERVAL_SECONDS > 0:
+        rules_reloader.watch(settings.TRIAGE_RULES_WATCH_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+def start_slot_hold_reaper():
+    # Expired holds already don't count; this frees them in bulk
+    if settings.SLOT_HOLD_REAP_INTERVAL_SECONDS > 0:
+        slot_holds.reap_every(settings.SLOT_HOLD_REAP_INTERVAL_SECONDS)
+
 @app.get("/")
 def root():
     return {
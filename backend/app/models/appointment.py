@@ -1,5 +1,6 @@
 # backend/app/models/appointment.py
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import DDL, Boolean, Column, Integer, String, DateTime, Text, ForeignKey, Enum, Index, event
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -49,4 +50,42 @@ class Appointment(Base):
     
     # Relationships
     patient = relationship("User", foreign_keys=[patient_id], back_populates="patient_appointments")
-    doctor = relationship("User", foreign_keys=[doctor_id], back_populates="doctor_appointments")
\ No newline at end of file
+    doctor = relationship("User", foreign_keys=[doctor_id], back_populates="doctor_appointments")
+
+    # At most one confirmed appointment per doctor and start time, enforced
+    # by the database so concurrent bookings can't both succeed. On
+    # PostgreSQL an exclusion constraint also rejects confirmed appointments
+    # whose [start, start + duration) ranges overlap (09:00/60 vs 09:30).
+    # Other databases only have the unique index, so two overlapping
+    # bookings with different starts are caught by the overlap check in
+    # the booking endpoints alone, and can race there.
+    __table_args__ = (
+        Index(
+            "uq_appointments_doctor_confirmed_start",
+            "doctor_id",
+            "appointment_datetime",
+            unique=True,
+            postgresql_where=(status == AppointmentStatus.CONFIRMED),
+            sqlite_where=(status == AppointmentStatus.CONFIRMED),
+        ),
+        ExcludeConstraint(
+            (doctor_id, "="),
+            (
+                func.tsrange(
+                    appointment_datetime,
+                    appointment_datetime + func.make_interval(0, 0, 0, 0, 0, func.coalesce(duration, 30)),
+                ),
+                "&&",
+            ),
+            name="ex_appointments_doctor_confirmed_overlap",
+            using="gist",
+            where=(status == AppointmentStatus.CONFIRMED),
+        ).ddl_if(dialect="postgresql"),
+    )
+
+# The exclusion constraint compares doctor_id with = inside a GiST index
+event.listen(
+    Appointment.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
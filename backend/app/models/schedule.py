@@ -0,0 +1,52 @@
+# backend/app/models/schedule.py
+from sqlalchemy import Column, Integer, DateTime, Date, Time, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+class ScheduleRule(Base):
+    """
+    Recurring weekly working window of a doctor (e.g. Mondays 09:00-17:00,
+    30 minute slots). A row without start/end time marks the weekday as
+    closed, so a doctor who closes every day still has rows and does not
+    fall back to the default week.
+    """
+    __tablename__ = "doctor_schedule_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    weekday = Column(Integer, nullable=False)  # Monday = 0, Sunday = 6
+    start_time = Column(Time, nullable=True)
+    end_time = Column(Time, nullable=True)
+    slot_minutes = Column(Integer, nullable=False, default=30)
+
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    doctor = relationship("User", foreign_keys=[doctor_id])
+
+class ScheduleException(Base):
+    """
+    Date-specific override of the weekly rules. When a date has exception
+    rows, they replace the weekly windows for that date; a row without
+    start/end time marks the whole day as closed.
+    """
+    __tablename__ = "doctor_schedule_exceptions"
+    __table_args__ = (
+        Index("ix_doctor_schedule_exceptions_doctor_date", "doctor_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    date = Column(Date, nullable=False)
+    start_time = Column(Time, nullable=True)
+    end_time = Column(Time, nullable=True)
+    slot_minutes = Column(Integer, nullable=False, default=30)
+
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    doctor = relationship("User", foreign_keys=[doctor_id])
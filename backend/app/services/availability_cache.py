@@ -0,0 +1,75 @@
+# backend/app/services/availability_cache.py
+"""
+Response cache for public doctor availability.
+
+Entries are keyed by (doctor, window start, doctor generation). Every
+change the slot calendar hears about for a doctor (booking, cancellation,
+availability or schedule save, rebuild), and every hold placed, released
+or reaped on their slots, bumps that doctor's generation, so their old
+entries can no longer be hit and simply age out of the LRU.
+Each entry carries a strong ETag derived from the exact response bytes.
+"""
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+from app.services.slot_calendar import slot_calendar
+from app.services.slot_holds import slot_holds
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for this header)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+class AvailabilityCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize, ttl)
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def generation(self, doctor_id: int) -> Tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._generations.get(doctor_id, 0)
+
+    def get(self, doctor_id: int, window: date) -> Optional[CachedResponse]:
+        return self.entries.get((doctor_id, window, self.generation(doctor_id)))
+
+    def set(self, doctor_id: int, window: date, generation: Tuple[int, int], payload: Any) -> CachedResponse:
+        """
+        Cache a response built at generation (taken before reading the data,
+        so a change made while it was built is never served from the cache)
+        """
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        entry = CachedResponse(body=body, etag=make_etag(body))
+        self.entries.set((doctor_id, window, generation), entry)
+        return entry
+
+    def invalidate(self, doctor_id: Optional[int] = None) -> None:
+        with self._lock:
+            if doctor_id is None:
+                self._epoch += 1
+            else:
+                self._generations[doctor_id] = self._generations.get(doctor_id, 0) + 1
+
+public_availability_cache = AvailabilityCache(
+    maxsize=settings.PUBLIC_AVAILABILITY_CACHE_SIZE,
+    ttl=settings.PUBLIC_AVAILABILITY_CACHE_TTL_SECONDS,
+)
+slot_calendar.add_listener(public_availability_cache.invalidate)
+slot_holds.add_listener(public_availability_cache.invalidate)
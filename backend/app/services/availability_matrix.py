@@ -0,0 +1,62 @@
+# backend/app/services/availability_matrix.py
+"""
+Free-slot counts per doctor and day, for many doctors at once.
+
+Schedules (a few rule and exception rows per doctor) are loaded up front;
+confirmed appointments for every doctor come from one query ordered by
+doctor and read in batches (yield_per), so only one doctor's appointments
+and day calendars are in memory at a time and each doctor's row can be
+sent before the next is computed.
+
+Counts are built with the slot calendar's own day logic (build_days) but
+straight from the database, so a large clinic does not flood the shared
+in-memory calendar.
+"""
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from operator import attrgetter
+from typing import Iterator, List, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.services.schedule import load_schedules
+from app.services.slot_calendar import apply_holds, build_days
+from app.services.slots import iter_days
+
+APPOINTMENT_BATCH_SIZE = 1000
+
+def iter_free_counts(
+    db: Session, doctor_ids: Sequence[int], start: date, n_days: int
+) -> Iterator[Tuple[int, List[int]]]:
+    """(doctor id, free slots per day for n_days from start), in doctor id order"""
+    doctor_ids = sorted(set(doctor_ids))
+    if not doctor_ids or n_days <= 0:
+        return
+    days = list(iter_days(start, n_days))
+    schedules = load_schedules(db, doctor_ids, days[0], days[-1])
+
+    rows = db.query(
+        Appointment.id,
+        Appointment.patient_id,
+        Appointment.doctor_id,
+        Appointment.appointment_datetime,
+        Appointment.duration
+    ).filter(
+        Appointment.doctor_id.in_(doctor_ids),
+        Appointment.appointment_datetime >= datetime.combine(days[0], time.min),
+        Appointment.appointment_datetime < datetime.combine(days[-1] + timedelta(days=1), time.min),
+        Appointment.status == AppointmentStatus.CONFIRMED
+    ).order_by(Appointment.doctor_id, Appointment.appointment_datetime).yield_per(APPOINTMENT_BATCH_SIZE)
+    groups = groupby(rows, key=attrgetter("doctor_id"))
+
+    # Both sides are in doctor id order: walk them together
+    group_id, group = next(groups, (None, iter(())))
+    for doctor_id in doctor_ids:
+        appointments = ()
+        if group_id == doctor_id:
+            appointments = group
+        calendars = apply_holds(doctor_id, build_days(schedules[doctor_id], appointments, days))
+        if group_id == doctor_id:
+            group_id, group = next(groups, (None, iter(())))
+        yield doctor_id, [calendars[day].free_count() for day in days]
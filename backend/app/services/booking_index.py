@@ -0,0 +1,53 @@
+# backend/app/services/booking_index.py
+"""
+Sorted-array interval index over the bookings of one doctor-day.
+
+Bookings are half-open minute intervals [start, end) kept sorted by start,
+next to a running maximum of their ends. Both arrays are non-decreasing,
+so whether an interval overlaps any booking (and which one) takes two
+binary searches, however many bookings the day has. Overlapping legacy
+bookings are handled too: the running maximum still finds them.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import accumulate
+from typing import Iterable, Iterator, Optional
+
+@dataclass(frozen=True)
+class Booking:
+    appointment_id: int
+    patient_id: Optional[int]
+    start: int  # minutes after midnight of the day it is indexed under
+    end: int
+
+def minute_of_day(value: datetime) -> int:
+    return value.hour * 60 + value.minute
+
+class BookingIndex:
+    """Immutable; build a new index to change the bookings"""
+
+    __slots__ = ("bookings", "_starts", "_max_ends")
+
+    def __init__(self, bookings: Iterable[Booking] = ()):
+        self.bookings = tuple(sorted(bookings, key=lambda b: (b.start, b.end)))
+        self._starts = [booking.start for booking in self.bookings]
+        self._max_ends = list(accumulate((booking.end for booking in self.bookings), max))
+
+    def __iter__(self) -> Iterator[Booking]:
+        return iter(self.bookings)
+
+    def __len__(self) -> int:
+        return len(self.bookings)
+
+    def conflict(self, start: int, end: int) -> Optional[Booking]:
+        """A booking overlapping [start, end), or None"""
+        # Bookings starting at or before start overlap if they end after it;
+        # the first index whose running max end passes start is such a booking
+        before = bisect_right(self._starts, start)
+        if before and self._max_ends[before - 1] > start:
+            return self.bookings[bisect_right(self._max_ends, start, 0, before)]
+        # Otherwise only the first booking starting after start can overlap
+        if before < len(self.bookings) and self._starts[before] < end:
+            return self.bookings[before]
+        return None
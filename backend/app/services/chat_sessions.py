@@ -0,0 +1,128 @@
+# backend/app/services/chat_sessions.py
+"""
+Server-side chatbot sessions.
+
+Each session keeps a bounded ring buffer of recent turns and a running
+triage state. New messages are analysed on their own and merged into the
+running state, so the cost of a turn does not grow with the conversation.
+Idle sessions expire and the least recently used are evicted when the
+store is full.
+"""
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+from app.services.triage import (
+    URGENCY_ROUTINE,
+    SymptomAnalyzer,
+    TriageResult,
+    merge_urgency,
+    symptom_analyzer,
+)
+
+class ChatTriageState:
+    """Running triage verdict merged from every turn of a session"""
+
+    def __init__(self):
+        self.urgency = URGENCY_ROUTINE
+        self.keyword_scores: Dict[str, float] = {}
+        # Accumulated model probability per predicted specialty
+        self.model_votes: Dict[str, float] = {}
+        self.turns_analyzed = 0
+
+    def merge(self, result: TriageResult, uses_model: bool) -> None:
+        """Fold one turn's result into the running state"""
+        self.urgency = merge_urgency(self.urgency, result.urgency)
+        for spec, score in result.scores.items():
+            self.keyword_scores[spec] = self.keyword_scores.get(spec, 0.0) + score
+        if uses_model:
+            self.model_votes[result.specialty] = self.model_votes.get(result.specialty, 0.0) + result.confidence
+        self.turns_analyzed += 1
+
+    def verdict(self, analyzer: SymptomAnalyzer) -> TriageResult:
+        """Current urgency, specialty and confidence for the whole conversation"""
+        engine = analyzer.engine
+        if self.model_votes:
+            specialty = max(self.model_votes, key=self.model_votes.get)
+            confidence = self.model_votes[specialty] / self.turns_analyzed
+        else:
+            specialty = engine.pick_specialty(self.keyword_scores)
+            confidence = engine.keyword_confidence(self.keyword_scores, specialty)
+        return TriageResult(
+            urgency=self.urgency,
+            specialty=specialty,
+            confidence=confidence,
+            scores=dict(self.keyword_scores),
+            rules_version=engine.version,
+        )
+
+class ChatSession:
+    def __init__(self, user_id: int, max_turns: int):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.created_at = time.time()
+        self.turns: Deque[Dict[str, Any]] = deque(maxlen=max_turns)
+        self.state = ChatTriageState()
+        # Serialises turns posted concurrently to the same session
+        self.lock = threading.Lock()
+
+class ChatSessionStore:
+    """Bounded, idle-expiring map of session id -> ChatSession"""
+
+    def __init__(self, analyzer: SymptomAnalyzer, max_sessions: int, idle_ttl: float, max_turns: int):
+        self.analyzer = analyzer
+        self.max_turns = max_turns
+        self._sessions = TTLCache(maxsize=max_sessions, ttl=idle_ttl)
+
+    def create(self, user_id: int) -> ChatSession:
+        session = ChatSession(user_id, self.max_turns)
+        self._sessions.set(session.id, session)
+        return session
+
+    def get(self, session_id: str, user_id: int) -> Optional[ChatSession]:
+        """Return the user's session, or None if unknown, expired or owned by someone else"""
+        session = self._sessions.get(session_id)
+        if session is None or session.user_id != user_id:
+            return None
+        return session
+
+    def delete(self, session_id: str, user_id: int) -> bool:
+        if self.get(session_id, user_id) is None:
+            return False
+        self._sessions.pop(session_id)
+        return True
+
+    def add_message(self, session: ChatSession, text: str) -> TriageResult:
+        """Analyse only the new message and merge it into the session state"""
+        result = self.analyzer.analyze(text)
+        uses_model = self.analyzer.engine.classifier is not None
+        with session.lock:
+            session.state.merge(result, uses_model)
+            session.turns.append({
+                "text": text,
+                "urgency": result.urgency,
+                "specialty": result.specialty,
+                "at": time.time(),
+            })
+            verdict = session.state.verdict(self.analyzer)
+        # Re-store to reset the idle timer
+        self._sessions.set(session.id, session)
+        return verdict
+
+    def recent_turns(self, session: ChatSession) -> List[Dict[str, Any]]:
+        with session.lock:
+            return list(session.turns)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._sessions.stats()
+
+chat_sessions = ChatSessionStore(
+    symptom_analyzer,
+    max_sessions=settings.CHAT_MAX_SESSIONS,
+    idle_ttl=settings.CHAT_SESSION_IDLE_TTL_SECONDS,
+    max_turns=settings.CHAT_MAX_TURNS,
+)
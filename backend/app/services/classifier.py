@@ -0,0 +1,173 @@
+# backend/app/services/classifier.py
+"""
+Pluggable specialty classifiers for symptom triage.
+
+The default model is a hashed bag-of-words TF-IDF softmax regression
+evaluated with NumPy. Its weights live in ``.npy`` files that are
+memory-mapped read-only, so every uvicorn worker shares the same pages.
+Train a model with ``python train_triage_model.py``.
+"""
+import json
+import os
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+WEIGHTS_FILE = "weights.npy"
+IDF_FILE = "idf.npy"
+META_FILE = "meta.json"
+
+DEFAULT_N_FEATURES = 2 ** 14
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word unigrams plus adjacent-word bigrams"""
+    words = _TOKEN_RE.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+def hash_features(text: str, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (feature indices, raw counts) for a text"""
+    # crc32 is stable across processes, unlike the builtin hash()
+    buckets = [zlib.crc32(token.encode("utf-8")) % n_features for token in tokenize(text)]
+    if not buckets:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    indices, counts = np.unique(np.asarray(buckets, dtype=np.int64), return_counts=True)
+    return indices, counts.astype(np.float32)
+
+def tfidf_vector(text: str, idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sublinear TF-IDF weights for a text, L2-normalised, in sparse (indices, values) form"""
+    indices, counts = hash_features(text, idf.shape[0])
+    values = (1.0 + np.log(counts)) * idf[indices]
+    norm = np.linalg.norm(values)
+    if norm > 0:
+        values = values / norm
+    return indices, values
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+class SymptomClassifier(ABC):
+    """Interface for specialty classifiers plugged into the triage engine"""
+
+    labels: List[str]
+
+    @abstractmethod
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Return an (n_texts, n_labels) matrix of class probabilities"""
+
+    def classify_many(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Return (specialty, probability) of the most likely class for each text"""
+        if not texts:
+            return []
+        probs = self.predict_proba(texts)
+        best = probs.argmax(axis=1)
+        return [(self.labels[i], float(probs[row, i])) for row, i in enumerate(best)]
+
+class HashedLinearClassifier(SymptomClassifier):
+    """Hashed TF-IDF features fed into a softmax linear layer"""
+
+    def __init__(self, weights: np.ndarray, idf: np.ndarray, labels: Sequence[str]):
+        # weights has one row per hashed feature plus a trailing bias row
+        if weights.shape != (idf.shape[0] + 1, len(labels)):
+            raise ValueError("Model weights do not match idf vector and labels")
+        self.weights = weights
+        self.idf = idf
+        self.labels = list(labels)
+
+    @property
+    def n_features(self) -> int:
+        return self.idf.shape[0]
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        bias = self.weights[-1]
+        logits = np.empty((len(texts), len(self.labels)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            indices, values = tfidf_vector(text, self.idf)
+            # Only touch the weight rows for features present in the text
+            logits[row] = values @ self.weights[indices] + bias
+        return softmax(logits)
+
+    @classmethod
+    def load(cls, model_dir: str) -> "HashedLinearClassifier":
+        """Memory-map a model saved by save()"""
+        with open(os.path.join(model_dir, META_FILE)) as f:
+            meta = json.load(f)
+        weights = np.load(os.path.join(model_dir, WEIGHTS_FILE), mmap_mode="r")
+        idf = np.load(os.path.join(model_dir, IDF_FILE), mmap_mode="r")
+        return cls(weights, idf, meta["labels"])
+
+    def save(self, model_dir: str, extra_meta: Optional[Dict] = None) -> None:
+        """Write weights, idf vector and labels to model_dir"""
+        os.makedirs(model_dir, exist_ok=True)
+        np.save(os.path.join(model_dir, WEIGHTS_FILE), np.ascontiguousarray(self.weights, dtype=np.float32))
+        np.save(os.path.join(model_dir, IDF_FILE), np.ascontiguousarray(self.idf, dtype=np.float32))
+        meta = {"labels": self.labels, "n_features": self.n_features}
+        meta.update(extra_meta or {})
+        with open(os.path.join(model_dir, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+
+def train_hashed_linear(
+    texts: Sequence[str],
+    labels: Sequence[str],
+    n_features: int = DEFAULT_N_FEATURES,
+    epochs: int = 200,
+    learning_rate: float = 0.5,
+    l2: float = 1e-4,
+) -> HashedLinearClassifier:
+    """Fit a softmax regression on hashed TF-IDF features with full-batch gradient descent"""
+    if len(texts) != len(labels) or not texts:
+        raise ValueError("Need the same, non-zero number of texts and labels")
+
+    classes = sorted(set(labels))
+    class_index = {label: i for i, label in enumerate(classes)}
+    y = np.array([class_index[label] for label in labels], dtype=np.int64)
+    n_samples, n_classes = len(texts), len(classes)
+
+    # Smoothed idf from document frequencies
+    hashed = [hash_features(text, n_features) for text in texts]
+    doc_freq = np.zeros(n_features, dtype=np.float64)
+    for indices, _ in hashed:
+        doc_freq[indices] += 1
+    idf = (np.log((1 + n_samples) / (1 + doc_freq)) + 1.0).astype(np.float32)
+
+    # Sparse design matrix in CSR-style flat arrays
+    rows, cols, vals = [], [], []
+    for row, text in enumerate(texts):
+        indices, values = tfidf_vector(text, idf)
+        rows.append(np.full(indices.shape[0], row, dtype=np.int64))
+        cols.append(indices)
+        vals.append(values)
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    vals = np.concatenate(vals).astype(np.float32)
+
+    weights = np.zeros((n_features, n_classes), dtype=np.float32)
+    bias = np.zeros(n_classes, dtype=np.float32)
+    targets = np.zeros((n_samples, n_classes), dtype=np.float32)
+    targets[np.arange(n_samples), y] = 1.0
+
+    for _ in range(epochs):
+        logits = np.zeros((n_samples, n_classes), dtype=np.float32)
+        np.add.at(logits, rows, vals[:, None] * weights[cols])
+        logits += bias
+        error = (softmax(logits) - targets) / n_samples
+
+        grad = np.zeros_like(weights)
+        np.add.at(grad, cols, vals[:, None] * error[rows])
+        grad += l2 * weights
+        weights -= learning_rate * grad
+        bias -= learning_rate * error.sum(axis=0)
+
+    return HashedLinearClassifier(np.vstack([weights, bias]), idf, classes)
+
+def load_classifier(model_dir: str) -> Optional[SymptomClassifier]:
+    """Load the trained model if one has been saved, otherwise None"""
+    if not os.path.exists(os.path.join(model_dir, WEIGHTS_FILE)):
+        return None
+    return HashedLinearClassifier.load(model_dir)
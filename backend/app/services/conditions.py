@@ -0,0 +1,157 @@
+# backend/app/services/conditions.py
+"""
+Local condition knowledge base with top-k sparse retrieval.
+
+Conditions are embedded with the same hashed TF-IDF features as the
+specialty classifier. The TF-IDF matrix is stored feature-major in CSR
+layout (i.e. an inverted index: for each hashed feature, the conditions
+that contain it and their weights) as memory-mapped ``.npy`` files. A
+query only walks the postings of its own features, and the best k are
+picked with a partial sort. Build the index with
+``python build_condition_kb.py``.
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.classifier import hash_features, tfidf_vector
+
+INDPTR_FILE = "postings_indptr.npy"
+DOCS_FILE = "postings_docs.npy"
+WEIGHTS_FILE = "postings_weights.npy"
+IDF_FILE = "idf.npy"
+CONDITIONS_FILE = "conditions.json"
+
+DEFAULT_N_FEATURES = 2 ** 18
+
+@dataclass
+class ConditionMatch:
+    name: str
+    specialty: str
+    score: float
+    follow_up_questions: List[str]
+
+def condition_text(condition: Dict[str, Any]) -> str:
+    """Text that represents a condition in the index"""
+    return " ".join([condition["name"]] + list(condition.get("symptoms", [])))
+
+class ConditionIndex:
+    """Inverted TF-IDF index over knowledge base conditions"""
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        docs: np.ndarray,
+        weights: np.ndarray,
+        idf: np.ndarray,
+        conditions: Sequence[Dict[str, Any]],
+    ):
+        if indptr.shape[0] != idf.shape[0] + 1 or docs.shape != weights.shape:
+            raise ValueError("Condition index arrays are inconsistent")
+        self.indptr = indptr
+        self.docs = docs
+        self.weights = weights
+        self.idf = idf
+        self.conditions = list(conditions)
+
+    def __len__(self) -> int:
+        return len(self.conditions)
+
+    def search(self, text: str, k: int = 3, min_score: float = 0.05) -> List[ConditionMatch]:
+        """Top-k conditions by cosine similarity to text"""
+        q_indices, q_values = tfidf_vector(text, self.idf)
+        if q_indices.shape[0] == 0 or not self.conditions:
+            return []
+
+        # Gather the postings of every query feature
+        doc_parts, weight_parts = [], []
+        for feature, q_value in zip(q_indices, q_values):
+            start, end = self.indptr[feature], self.indptr[feature + 1]
+            if start != end:
+                doc_parts.append(self.docs[start:end])
+                weight_parts.append(self.weights[start:end] * q_value)
+        if not doc_parts:
+            return []
+        docs = np.concatenate(doc_parts)
+        scores = np.bincount(docs, weights=np.concatenate(weight_parts), minlength=len(self.conditions))
+
+        # Partial sort: O(n) selection of the best k, then sort just those
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        matches = []
+        for i in top:
+            score = float(scores[i])
+            if score < min_score:
+                break
+            condition = self.conditions[i]
+            matches.append(ConditionMatch(
+                name=condition["name"],
+                specialty=condition.get("specialty", "General Practice"),
+                score=round(score, 4),
+                follow_up_questions=list(condition.get("follow_up_questions", [])),
+            ))
+        return matches
+
+    @classmethod
+    def build(cls, conditions: Sequence[Dict[str, Any]], n_features: int = DEFAULT_N_FEATURES) -> "ConditionIndex":
+        """Compute the TF-IDF inverted index for a list of conditions"""
+        texts = [condition_text(c) for c in conditions]
+        n_docs = len(texts)
+
+        doc_freq = np.zeros(n_features, dtype=np.float64)
+        for text in texts:
+            indices, _ = hash_features(text, n_features)
+            doc_freq[indices] += 1
+        idf = (np.log((1 + n_docs) / (1 + doc_freq)) + 1.0).astype(np.float32)
+
+        rows, cols, vals = [], [], []
+        for doc, text in enumerate(texts):
+            indices, values = tfidf_vector(text, idf)
+            rows.append(np.full(indices.shape[0], doc, dtype=np.int32))
+            cols.append(indices)
+            vals.append(values.astype(np.float32))
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+        cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+        vals = np.concatenate(vals) if vals else np.empty(0, dtype=np.float32)
+
+        # Sort entries by feature to get the feature-major CSR layout
+        order = np.lexsort((rows, cols))
+        indptr = np.zeros(n_features + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=n_features), out=indptr[1:])
+        return cls(indptr, rows[order], vals[order], idf, conditions)
+
+    def save(self, index_dir: str) -> None:
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, INDPTR_FILE), self.indptr)
+        np.save(os.path.join(index_dir, DOCS_FILE), self.docs)
+        np.save(os.path.join(index_dir, WEIGHTS_FILE), self.weights)
+        np.save(os.path.join(index_dir, IDF_FILE), self.idf)
+        with open(os.path.join(index_dir, CONDITIONS_FILE), "w") as f:
+            json.dump(self.conditions, f)
+
+    @classmethod
+    def load(cls, index_dir: str) -> "ConditionIndex":
+        """Memory-map an index written by save()"""
+        def mmap(name: str) -> np.ndarray:
+            return np.load(os.path.join(index_dir, name), mmap_mode="r")
+
+        with open(os.path.join(index_dir, CONDITIONS_FILE)) as f:
+            conditions = json.load(f)
+        return cls(mmap(INDPTR_FILE), mmap(DOCS_FILE), mmap(WEIGHTS_FILE), mmap(IDF_FILE), conditions)
+
+def load_condition_index(index_dir: str) -> Optional[ConditionIndex]:
+    """Load the knowledge base index if it has been built, otherwise None"""
+    if not os.path.exists(os.path.join(index_dir, INDPTR_FILE)):
+        return None
+    return ConditionIndex.load(index_dir)
+
+# Memory-mapped once at import time and shared by every request
+condition_index = load_condition_index(settings.CONDITION_KB_DIR)
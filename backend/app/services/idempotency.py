@@ -0,0 +1,93 @@
+# backend/app/services/idempotency.py
+"""
+Idempotency-Key support for retried requests.
+
+The first response to a key is kept in a bounded TTL cache and replayed
+for any later request with the same key, without running the request
+again. A duplicate that arrives while the first is still running waits
+for it instead of running in parallel. A key is tied to the request it
+was first sent with (by fingerprint), so reusing it for a different
+request is an error rather than a wrong replay.
+
+Responses are kept in this process only, like the slot calendar.
+"""
+import hashlib
+import json
+import threading
+import time as time_module
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status_code: int
+    body: Any  # JSON-compatible
+
+@dataclass(frozen=True)
+class _Entry:
+    fingerprint: str
+    response: StoredResponse
+
+class IdempotencyKeyReused(Exception):
+    """The key was first used for a different request"""
+
+class IdempotencyTimeout(Exception):
+    """The request first sent with the key is still running"""
+
+def fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+class IdempotencyStore:
+    def __init__(self, maxsize: int, ttl: float, wait_timeout: float):
+        self.responses = TTLCache(maxsize, ttl)
+        self.wait_timeout = wait_timeout
+        self._in_flight: Dict[Hashable, Tuple[str, threading.Event]] = {}
+        self._lock = threading.Lock()
+
+    def run(
+        self, key: Hashable, request_fingerprint: str, handler: Callable[[], StoredResponse]
+    ) -> Tuple[StoredResponse, bool]:
+        """
+        (response, replayed) for key: the stored response, or handler's if
+        this is the first request with the key. Server errors (5xx) and
+        exceptions are not stored, so the next retry runs handler again.
+        """
+        deadline = time_module.monotonic() + self.wait_timeout
+        while True:
+            with self._lock:
+                entry = self.responses.get(key)
+                running = self._in_flight.get(key) if entry is None else None
+                if entry is None and running is None:
+                    done = threading.Event()
+                    self._in_flight[key] = (request_fingerprint, done)
+                    break
+
+            if entry is not None:
+                if entry.fingerprint != request_fingerprint:
+                    raise IdempotencyKeyReused()
+                return entry.response, True
+            running_fingerprint, running_done = running
+            if running_fingerprint != request_fingerprint:
+                raise IdempotencyKeyReused()
+            # Then look again: replay its response, or run it ourselves if it failed
+            if not running_done.wait(max(0.0, deadline - time_module.monotonic())):
+                raise IdempotencyTimeout()
+
+        try:
+            response = handler()
+            if response.status_code < 500:
+                self.responses.set(key, _Entry(request_fingerprint, response))
+            return response, False
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            done.set()
+
+idempotency_store = IdempotencyStore(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_SECONDS,
+)
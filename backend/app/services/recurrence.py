@@ -0,0 +1,62 @@
+# backend/app/services/recurrence.py
+"""
+Expansion of RRULE-like recurrence patterns (FREQ, INTERVAL, COUNT, UNTIL)
+into appointment start times, for recurring bookings.
+
+Monthly series keep the first occurrence's day of the month; months that
+don't have that day are skipped, as RFC 5545 does.
+"""
+from datetime import date, datetime, timedelta
+from itertools import count as count_from
+from typing import List, Optional
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+
+def _nth(first: datetime, frequency: str, steps: int) -> Optional[datetime]:
+    """The occurrence steps periods after first (None for a skipped month)"""
+    if frequency == "daily":
+        return first + timedelta(days=steps)
+    if frequency == "weekly":
+        return first + timedelta(weeks=steps)
+    months = first.month - 1 + steps
+    try:
+        return first.replace(year=first.year + months // 12, month=months % 12 + 1)
+    except ValueError:
+        return None
+
+def expand_recurrence(
+    first: datetime,
+    frequency: str,
+    interval: int = 1,
+    count: Optional[int] = None,
+    until: Optional[date] = None,
+    limit: int = 52,
+) -> List[datetime]:
+    """
+    Start times of the series beginning at first, ending after count
+    occurrences or on until (inclusive), whichever comes first. Raises
+    ValueError for an unknown frequency, a series without an end or one
+    longer than limit occurrences.
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency {frequency!r}, use one of {', '.join(FREQUENCIES)}")
+    if interval < 1:
+        raise ValueError("interval must be at least 1")
+    if count is None and until is None:
+        raise ValueError("A recurrence needs a count or an until date")
+    if count is not None and not 1 <= count <= limit:
+        raise ValueError(f"count must be between 1 and {limit}")
+
+    occurrences: List[datetime] = []
+    for period in count_from():
+        occurrence = _nth(first, frequency, period * interval)
+        if occurrence is None:
+            continue
+        if until is not None and occurrence.date() > until:
+            break
+        occurrences.append(occurrence)
+        if count is not None and len(occurrences) == count:
+            break
+        if len(occurrences) > limit:
+            raise ValueError(f"A recurrence can have at most {limit} occurrences")
+    return occurrences
@@ -0,0 +1,227 @@
+# backend/app/services/schedule.py
+"""
+Doctor working schedules: weekly rules plus date-specific exceptions.
+
+A schedule is a handful of rows per doctor (see app/models/schedule.py)
+and is expanded into concrete slots only for the dates being looked at.
+Doctors who never saved weekly rules work the default Mon-Fri 9:00-17:00
+week; once saved, every weekday has rows (a closed marker at least), so
+an empty schedule stays empty.
+
+A window's slot offsets (minutes after midnight) are one cached NumPy
+``arange``. The availability views expand one day at a time with
+windows_slots(), which adds the cached offsets of the day's windows to the
+day's midnight; a day is only a few dozen slots, too few for array maths
+to beat plain datetime arithmetic.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.schedule import ScheduleException, ScheduleRule
+from app.services.slots import DEFAULT_DAY_END, DEFAULT_DAY_START, DEFAULT_SLOT_MINUTES
+
+@dataclass(frozen=True)
+class Window:
+    """Working window of one day, cut into slots of slot_minutes"""
+    start: time
+    end: time
+    slot_minutes: int = DEFAULT_SLOT_MINUTES
+
+    def offsets(self) -> np.ndarray:
+        """Slot starts in minutes after midnight (only whole slots fit in the window)"""
+        return window_offsets(self)
+
+    def slots(self, day: date) -> List[datetime]:
+        return (np.datetime64(day, "m") + self.offsets().astype("timedelta64[m]")).tolist()
+
+    @property
+    def span_minutes(self) -> Tuple[int, int]:
+        """(first slot start, last slot end) in minutes after midnight"""
+        offsets = self.offsets()
+        if offsets.shape[0] == 0:
+            return 0, 0
+        return int(offsets[0]), int(offsets[-1]) + self.slot_minutes
+
+Windows = Tuple[Window, ...]
+
+def minutes_of(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+@lru_cache(maxsize=4096)
+def window_offsets(window: Window) -> np.ndarray:
+    start, end = minutes_of(window.start), minutes_of(window.end)
+    offsets = np.arange(start, end - window.slot_minutes + 1, window.slot_minutes, dtype=np.int64)
+    offsets.flags.writeable = False
+    return offsets
+
+def windows_grid(windows: Iterable[Window]) -> Tuple[np.ndarray, np.ndarray]:
+    """Slot start offsets and lengths (minutes) of windows, in time order"""
+    windows = sorted(windows, key=lambda w: w.start)
+    if not windows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    offsets = np.concatenate([window.offsets() for window in windows])
+    minutes = np.concatenate([np.full(window.offsets().shape[0], window.slot_minutes, dtype=np.int64) for window in windows])
+    return offsets, minutes
+
+DEFAULT_WEEK: Dict[int, Windows] = {
+    weekday: (Window(DEFAULT_DAY_START, DEFAULT_DAY_END, DEFAULT_SLOT_MINUTES),) for weekday in range(5)
+}
+
+@lru_cache(maxsize=4096)
+def _day_offsets(windows: Windows) -> Tuple[Tuple[timedelta, int], ...]:
+    offsets, minutes = windows_grid(windows)
+    return tuple((timedelta(minutes=offset), length) for offset, length in zip(offsets.tolist(), minutes.tolist()))
+
+def windows_slots(day: date, windows: Iterable[Window]) -> List[Tuple[datetime, int]]:
+    """(start, minutes) of every slot of windows on day, in time order"""
+    midnight = datetime.combine(day, time())
+    return [(midnight + offset, minutes) for offset, minutes in _day_offsets(tuple(windows))]
+
+class DoctorSchedule:
+    """Weekly windows plus per-date overrides, expanded on demand"""
+
+    def __init__(self, weekly: Dict[int, Windows], overrides: Optional[Dict[date, Windows]] = None):
+        self.weekly = weekly
+        self.overrides = overrides or {}
+
+    def windows(self, day: date) -> Windows:
+        if day in self.overrides:
+            return self.overrides[day]
+        return self.weekly.get(day.weekday(), ())
+
+    def day_slots(self, day: date) -> List[Tuple[datetime, int]]:
+        return windows_slots(day, self.windows(day))
+
+def _group_weekly(rules: Iterable[ScheduleRule]) -> Dict[int, Windows]:
+    weekly: Dict[int, List[Window]] = {}
+    for rule in rules:
+        windows = weekly.setdefault(rule.weekday, [])
+        if rule.start_time is not None and rule.end_time is not None:
+            windows.append(Window(rule.start_time, rule.end_time, rule.slot_minutes))
+    return {weekday: tuple(windows) for weekday, windows in weekly.items() if windows}
+
+def _group_overrides(rows: Iterable[ScheduleException]) -> Dict[date, Windows]:
+    overrides: Dict[date, List[Window]] = {}
+    for row in rows:
+        windows = overrides.setdefault(row.date, [])
+        if row.start_time is not None and row.end_time is not None:
+            windows.append(Window(row.start_time, row.end_time, row.slot_minutes))
+    return {day: tuple(windows) for day, windows in overrides.items()}
+
+def load_weekly(db: Session, doctor_id: int) -> Dict[int, Windows]:
+    rules = db.query(ScheduleRule).filter(ScheduleRule.doctor_id == doctor_id).all()
+    return _group_weekly(rules) if rules else DEFAULT_WEEK
+
+def load_schedules(db: Session, doctor_ids: Sequence[int], start: date, end: date) -> Dict[int, DoctorSchedule]:
+    """Schedules of several doctors with exceptions for dates in [start, end], in two queries"""
+    rules: Dict[int, List[ScheduleRule]] = {}
+    for rule in db.query(ScheduleRule).filter(ScheduleRule.doctor_id.in_(doctor_ids)):
+        rules.setdefault(rule.doctor_id, []).append(rule)
+
+    exceptions: Dict[int, List[ScheduleException]] = {}
+    for row in db.query(ScheduleException).filter(
+        ScheduleException.doctor_id.in_(doctor_ids),
+        ScheduleException.date >= start,
+        ScheduleException.date <= end
+    ):
+        exceptions.setdefault(row.doctor_id, []).append(row)
+
+    return {
+        doctor_id: DoctorSchedule(
+            _group_weekly(rules[doctor_id]) if doctor_id in rules else DEFAULT_WEEK,
+            _group_overrides(exceptions.get(doctor_id, ())),
+        )
+        for doctor_id in doctor_ids
+    }
+
+def load_schedule(db: Session, doctor_id: int, start: date, end: date) -> DoctorSchedule:
+    return load_schedules(db, [doctor_id], start, end)[doctor_id]
+
+def profile_windows(start: time, end: time, slot_minutes: int, breaks: Iterable[Tuple[time, time]] = ()) -> Windows:
+    """Working hours minus breaks, as windows of slot_minutes"""
+    windows = []
+    current = start
+    for break_start, break_end in sorted(breaks):
+        if break_end <= current or break_start >= end:
+            continue
+        if break_start > current:
+            windows.append(Window(current, break_start, slot_minutes))
+        current = max(current, break_end)
+    if current < end:
+        windows.append(Window(current, end, slot_minutes))
+    return tuple(windows)
+
+def rule_values(doctor_id: int, weekday: int, windows: Sequence[Window]) -> List[Dict[str, Any]]:
+    """Column values of a weekday's rule rows (a single closed marker if there are no windows)"""
+    if not windows:
+        return [{"doctor_id": doctor_id, "weekday": weekday, "start_time": None, "end_time": None, "slot_minutes": DEFAULT_SLOT_MINUTES}]
+    return [
+        {
+            "doctor_id": doctor_id,
+            "weekday": weekday,
+            "start_time": window.start,
+            "end_time": window.end,
+            "slot_minutes": window.slot_minutes,
+        }
+        for window in windows
+    ]
+
+def replace_weekly(db: Session, doctor_id: int, weekly: Dict[int, Sequence[Window]]) -> None:
+    """
+    Replace a doctor's weekly rules (one DELETE, one multi-row INSERT).
+    Weekdays without windows get a closed marker row. Does not commit.
+    """
+    db.query(ScheduleRule).filter(ScheduleRule.doctor_id == doctor_id).delete(synchronize_session=False)
+    db.execute(
+        insert(ScheduleRule),
+        [values for weekday in range(7) for values in rule_values(doctor_id, weekday, weekly.get(weekday, ()))]
+    )
+
+def merge_slots(slots: Iterable[Tuple[time, int]]) -> List[Window]:
+    """Collapse back-to-back slots of the same length into windows"""
+    windows: List[Window] = []
+    for start, minutes in sorted(set(slots)):
+        end = (datetime.combine(date.min, start) + timedelta(minutes=minutes)).time()
+        last = windows[-1] if windows else None
+        if last is not None and last.end == start and last.slot_minutes == minutes:
+            windows[-1] = Window(last.start, end, minutes)
+        else:
+            windows.append(Window(start, end, minutes))
+    return windows
+
+def exception_values(doctor_id: int, day: date, windows: Sequence[Window]) -> List[Dict[str, Any]]:
+    """Column values of the rows that override day with windows (a single closed marker if there are none)"""
+    if not windows:
+        return [{"doctor_id": doctor_id, "date": day, "start_time": None, "end_time": None, "slot_minutes": DEFAULT_SLOT_MINUTES}]
+    return [
+        {
+            "doctor_id": doctor_id,
+            "date": day,
+            "start_time": window.start,
+            "end_time": window.end,
+            "slot_minutes": window.slot_minutes,
+        }
+        for window in windows
+    ]
+
+def replace_exceptions(db: Session, doctor_id: int, days: Dict[date, Sequence[Window]]) -> None:
+    """
+    Override every date in days with its windows using one DELETE and one
+    multi-row INSERT, whatever the number of dates. Does not commit.
+    """
+    if not days:
+        return
+    db.query(ScheduleException).filter(
+        ScheduleException.doctor_id == doctor_id,
+        ScheduleException.date.in_(list(days))
+    ).delete(synchronize_session=False)
+    db.execute(
+        insert(ScheduleException),
+        [values for day, windows in days.items() for values in exception_values(doctor_id, day, windows)]
+    )
@@ -0,0 +1,319 @@
+# backend/app/services/slot_calendar.py
+"""
+In-memory per-doctor slot calendar.
+
+Each day of a doctor's calendar is a bit array (Python int) ``open`` with
+one bit per TICK_MINUTES of the day, marking the time the doctor works
+according to their schedule (app/services/schedule.py), plus an interval
+index of its confirmed appointments (app/services/booking_index.py). A
+slot is
+
+    booked   if it overlaps any appointment (start to start + duration)
+    held     if it overlaps a patient's hold (app/services/slot_holds.py)
+    free     if all of its bits are set in ``open`` and it is neither
+    blocked  otherwise
+
+so answering a slot is a couple of ANDs and two binary searches. Holds are
+overlaid on the days handed out, never stored in the cached ones.
+
+Days are loaded lazily from the schedule and appointments tables (one
+range query each, shared by every doctor being loaded) and kept up to date by the booking,
+cancellation and availability endpoints after they commit. Because other API workers write
+to the same database, a loaded day is only trusted for
+SLOT_CALENDAR_TTL_SECONDS; ``rebuild()`` drops cached days immediately.
+"""
+import base64
+import threading
+import time as time_module
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.appointment import Appointment, AppointmentStatus
+from app.services.booking_index import Booking, BookingIndex, minute_of_day
+from app.services.schedule import DoctorSchedule, Windows, load_schedules, windows_slots
+from app.services.slot_holds import SlotHold, slot_holds
+from app.services.slots import DEFAULT_SLOT_MINUTES, iter_days
+
+TICK_MINUTES = 5
+TICKS_PER_DAY = 24 * 60 // TICK_MINUTES
+
+SLOT_FREE = "free"
+SLOT_BOOKED = "booked"
+SLOT_HELD = "held"
+SLOT_BLOCKED = "blocked"
+
+def to_tick(value: time) -> int:
+    """Tick of the day a time of day falls in"""
+    return (value.hour * 60 + value.minute) // TICK_MINUTES
+
+def span_ticks(minutes: int) -> int:
+    """Number of ticks needed to cover a duration (at least one)"""
+    return max(1, -(-int(minutes) // TICK_MINUTES))
+
+def span_mask(start_tick: int, n_ticks: int) -> int:
+    """Bit mask covering n_ticks from start_tick, clipped to the day"""
+    n_ticks = min(n_ticks, TICKS_PER_DAY - start_tick)
+    if n_ticks <= 0:
+        return 0
+    return ((1 << n_ticks) - 1) << start_tick
+
+def slot_mask(start: datetime, minutes: int) -> int:
+    return span_mask(to_tick(start.time()), span_ticks(minutes))
+
+def windows_mask(day: date, windows: Windows) -> int:
+    """Open time of windows: from each window's first slot to the end of its last"""
+    mask = 0
+    for window in windows:
+        first, last_end = window.span_minutes
+        if last_end > first:
+            start_tick = first // TICK_MINUTES
+            mask |= span_mask(start_tick, span_ticks(last_end) - start_tick)
+    return mask
+
+def encode_ticks(mask: int) -> str:
+    """Base64 of a day's tick mask: bit n of byte k is tick 8*k + n"""
+    return base64.b64encode(mask.to_bytes(TICKS_PER_DAY // 8, "little")).decode("ascii")
+
+@dataclass(frozen=True)
+class DayCalendar:
+    """One doctor-day. Immutable: updates swap in a new instance, so readers never see a half-applied change"""
+    day: date
+    windows: Windows
+    open: int
+    bookings: BookingIndex = field(default_factory=BookingIndex)
+    held: int = 0
+    loaded_at: float = field(default_factory=time_module.monotonic)
+
+    @classmethod
+    def from_windows(cls, day: date, windows: Windows, **kwargs) -> "DayCalendar":
+        return cls(day=day, windows=windows, open=windows_mask(day, windows), **kwargs)
+
+    def slots(self) -> List[Tuple[datetime, int]]:
+        """(start, minutes) of the scheduled slots, in time order"""
+        return windows_slots(self.day, self.windows)
+
+    def slot_state(self, start: datetime, minutes: int) -> str:
+        if self.booking_at(start, minutes) is not None:
+            return SLOT_BOOKED
+        mask = slot_mask(start, minutes)
+        if self.held & mask:
+            return SLOT_HELD
+        if self.open & mask == mask:
+            return SLOT_FREE
+        return SLOT_BLOCKED
+
+    def is_open(self, start: datetime, minutes: int) -> bool:
+        """Whether the slot lies inside the doctor's working windows"""
+        mask = slot_mask(start, minutes)
+        return self.open & mask == mask
+
+    def is_free(self, start: datetime, minutes: int) -> bool:
+        mask = slot_mask(start, minutes)
+        return self.open & mask == mask and not self.held & mask and self.booking_at(start, minutes) is None
+
+    def free_count(self) -> int:
+        return sum(1 for start, minutes in self.slots() if self.is_free(start, minutes))
+
+    def booking_at(self, start: datetime, minutes: int) -> Optional[Booking]:
+        """A booking overlapping the slot"""
+        first = minute_of_day(start)
+        return self.bookings.conflict(first, first + minutes)
+
+    def with_bookings(self, bookings: Iterable[Booking]) -> "DayCalendar":
+        return replace(self, bookings=BookingIndex(bookings))
+
+    def with_holds(self, holds: Iterable[SlotHold]) -> "DayCalendar":
+        held = 0
+        for hold in holds:
+            held |= slot_mask(hold.start, hold.minutes)
+        return replace(self, held=held)
+
+def apply_holds(doctor_id: int, days: Dict[date, DayCalendar]) -> Dict[date, DayCalendar]:
+    """A doctor's days with their currently held slots marked"""
+    by_day: Dict[date, List[SlotHold]] = {}
+    for hold in slot_holds.doctor_holds(doctor_id):
+        if hold.start.date() in days:
+            by_day.setdefault(hold.start.date(), []).append(hold)
+    if not by_day:
+        return days
+    return {day: calendar.with_holds(by_day[day]) if day in by_day else calendar for day, calendar in days.items()}
+
+class _DoctorCalendar:
+    def __init__(self):
+        self.days: Dict[date, DayCalendar] = {}
+        # Bumped on every incremental update, so a lazy load that raced
+        # with a booking is not cached over it
+        self.version = 0
+
+def _booking_for(apt: Appointment) -> Booking:
+    start = minute_of_day(apt.appointment_datetime)
+    return Booking(
+        appointment_id=apt.id,
+        patient_id=apt.patient_id,
+        start=start,
+        end=start + (apt.duration or DEFAULT_SLOT_MINUTES),
+    )
+
+def build_days(schedule: DoctorSchedule, appointments: Iterable[Appointment], days: Iterable[date]) -> Dict[date, DayCalendar]:
+    """Day calendars from a doctor's schedule and confirmed appointments"""
+    bookings: Dict[date, List[Booking]] = {}
+    for apt in appointments:
+        bookings.setdefault(apt.appointment_datetime.date(), []).append(_booking_for(apt))
+
+    now = time_module.monotonic()
+    result = {}
+    for day in days:
+        calendar = DayCalendar.from_windows(day, schedule.windows(day), loaded_at=now)
+        result[day] = calendar.with_bookings(bookings.get(day, ()))
+    return result
+
+class SlotCalendarStore:
+    """Lazily loaded, incrementally updated slot calendars for the most recently used doctors"""
+
+    def __init__(self, max_doctors: int, ttl: float):
+        self.max_doctors = max_doctors
+        self.ttl = ttl
+        self._doctors: "OrderedDict[int, _DoctorCalendar]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Called with the doctor id (None = everyone) after every change, e.g. to invalidate response caches
+        self._listeners: List[Callable[[Optional[int]], None]] = []
+        self.loads = 0
+
+    def add_listener(self, listener: Callable[[Optional[int]], None]) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, doctor_id: Optional[int]) -> None:
+        for listener in self._listeners:
+            listener(doctor_id)
+
+    def _doctor(self, doctor_id: int) -> _DoctorCalendar:
+        """Caller holds the lock"""
+        calendar = self._doctors.get(doctor_id)
+        if calendar is None:
+            calendar = self._doctors[doctor_id] = _DoctorCalendar()
+            while len(self._doctors) > self.max_doctors:
+                self._doctors.popitem(last=False)
+        self._doctors.move_to_end(doctor_id)
+        return calendar
+
+    def get_days(self, db: Session, doctor_id: int, start: date, n_days: int) -> Dict[date, DayCalendar]:
+        """Calendars for n_days from start"""
+        return self.get_days_many(db, [doctor_id], start, n_days)[doctor_id]
+
+    def get_days_many(
+        self, db: Session, doctor_ids: Sequence[int], start: date, n_days: int
+    ) -> Dict[int, Dict[date, DayCalendar]]:
+        """
+        Calendars of several doctors for n_days from start, with held slots
+        marked. Doctors with missing or stale days are loaded together: one
+        query each for rules, exceptions and appointments, grouped by doctor
+        in memory.
+        """
+        wanted = list(iter_days(start, n_days))
+        now = time_module.monotonic()
+        result: Dict[int, Dict[date, DayCalendar]] = {}
+        pending: Dict[int, Tuple[_DoctorCalendar, int]] = {}
+        with self._lock:
+            for doctor_id in doctor_ids:
+                calendar = self._doctor(doctor_id)
+                days = {
+                    day: calendar.days[day] for day in wanted
+                    if day in calendar.days and now - calendar.days[day].loaded_at < self.ttl
+                }
+                if len(days) == len(wanted):
+                    result[doctor_id] = days
+                else:
+                    pending[doctor_id] = (calendar, calendar.version)
+        if not pending:
+            return {doctor_id: apply_holds(doctor_id, days) for doctor_id, days in result.items()}
+
+        # Query outside the lock so one slow load doesn't stall every doctor
+        pending_ids = list(pending)
+        schedules = load_schedules(db, pending_ids, wanted[0], wanted[-1])
+        appointments: Dict[int, List[Appointment]] = {doctor_id: [] for doctor_id in pending_ids}
+        for apt in db.query(Appointment).filter(
+            Appointment.doctor_id.in_(pending_ids),
+            Appointment.appointment_datetime >= datetime.combine(wanted[0], time.min),
+            Appointment.appointment_datetime < datetime.combine(wanted[-1] + timedelta(days=1), time.min),
+            Appointment.status == AppointmentStatus.CONFIRMED
+        ):
+            appointments[apt.doctor_id].append(apt)
+        loaded = {
+            doctor_id: build_days(schedules[doctor_id], appointments[doctor_id], wanted)
+            for doctor_id in pending_ids
+        }
+
+        with self._lock:
+            self.loads += 1
+            for doctor_id, (calendar, version) in pending.items():
+                # Skip caching if the doctor was updated, rebuilt or evicted meanwhile
+                if self._doctors.get(doctor_id) is calendar and calendar.version == version:
+                    calendar.days.update(loaded[doctor_id])
+        result.update(loaded)
+        return {doctor_id: apply_holds(doctor_id, days) for doctor_id, days in result.items()}
+
+    def _update_day(self, doctor_id: int, day: date, update) -> None:
+        with self._lock:
+            calendar = self._doctors.get(doctor_id)
+            # Doctors and days that were never loaded will be read fresh from the database
+            if calendar is not None:
+                calendar.version += 1
+                current = calendar.days.get(day)
+                if current is not None:
+                    calendar.days[day] = update(current)
+        self._notify(doctor_id)
+
+    def add_booking(self, appointment: Appointment) -> None:
+        """Apply a committed booking"""
+        booking = _booking_for(appointment)
+        self._update_day(
+            appointment.doctor_id,
+            appointment.appointment_datetime.date(),
+            lambda day: day.with_bookings(
+                [b for b in day.bookings if b.appointment_id != booking.appointment_id] + [booking]
+            ),
+        )
+
+    def remove_booking(self, appointment: Appointment) -> None:
+        """Apply a committed cancellation"""
+        self._update_day(
+            appointment.doctor_id,
+            appointment.appointment_datetime.date(),
+            lambda day: day.with_bookings(b for b in day.bookings if b.appointment_id != appointment.id),
+        )
+
+    def set_windows(self, doctor_id: int, day: date, windows: Windows) -> None:
+        """Apply a committed schedule exception: the doctor works windows on day"""
+        windows = tuple(windows)
+        self._update_day(
+            doctor_id,
+            day,
+            lambda current: replace(current, windows=windows, open=windows_mask(day, windows)),
+        )
+
+    def rebuild(self, doctor_id: Optional[int] = None) -> None:
+        """Drop cached days (one doctor, or everyone) so the next read reloads them from the database"""
+        with self._lock:
+            if doctor_id is None:
+                self._doctors.clear()
+            else:
+                self._doctors.pop(doctor_id, None)
+        self._notify(doctor_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "doctors": len(self._doctors),
+                "days": sum(len(c.days) for c in self._doctors.values()),
+                "loads": self.loads,
+            }
+
+slot_calendar = SlotCalendarStore(
+    max_doctors=settings.SLOT_CALENDAR_MAX_DOCTORS,
+    ttl=settings.SLOT_CALENDAR_TTL_SECONDS,
+)
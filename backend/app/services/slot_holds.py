@@ -0,0 +1,208 @@
+# backend/app/services/slot_holds.py
+"""
+Short-lived slot holds.
+
+A patient who picks a slot can hold it for SLOT_HOLD_TTL_SECONDS while
+confirming; availability views show held slots as taken and other
+patients can't book them. Booking with the hold token (or the same slot)
+turns the hold into the appointment.
+
+Holds live in this process, like the slot calendar, and are not shared
+between API workers: with several workers a hold only keeps the slot from
+patients whose requests reach the same worker, and a booking handled by
+another worker can still take it (the database guards still prevent a
+double booking). Holds are only strict with a single API worker.
+
+An expired hold stops counting the moment it expires; actually dropping
+it is left to reap(), which pops everything due from one expiry heap. The
+reaper thread calls it every SLOT_HOLD_REAP_INTERVAL_SECONDS, so there
+are no per-hold timers. Cached public availability shows an expired
+hold's slot again once it is reaped.
+"""
+import heapq
+import logging
+import secrets
+import threading
+import time as time_module
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class SlotHold:
+    token: str
+    doctor_id: int
+    patient_id: int
+    start: datetime
+    minutes: int
+    expires_at: float  # time.monotonic()
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(minutes=self.minutes)
+
+    def expires_in(self, now: Optional[float] = None) -> float:
+        return max(0.0, self.expires_at - (time_module.monotonic() if now is None else now))
+
+class SlotHoldStore:
+    def __init__(self, ttl: float, max_per_patient: int):
+        self.ttl = ttl
+        self.max_per_patient = max_per_patient
+        self._holds: Dict[str, SlotHold] = {}
+        self._by_doctor: Dict[int, Dict[str, SlotHold]] = {}
+        self._by_patient: Dict[int, Dict[str, SlotHold]] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        # Called with the doctor id whenever that doctor's held slots change
+        self._listeners: List[Callable[[Optional[int]], None]] = []
+
+    def add_listener(self, listener: Callable[[Optional[int]], None]) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, doctor_ids) -> None:
+        for doctor_id in set(doctor_ids):
+            for listener in self._listeners:
+                listener(doctor_id)
+
+    def _add(self, hold: SlotHold) -> None:
+        """Caller holds the lock"""
+        self._holds[hold.token] = hold
+        self._by_doctor.setdefault(hold.doctor_id, {})[hold.token] = hold
+        self._by_patient.setdefault(hold.patient_id, {})[hold.token] = hold
+        heapq.heappush(self._expiry, (hold.expires_at, hold.token))
+
+    def _remove(self, token: str) -> Optional[SlotHold]:
+        """Caller holds the lock. Stale heap entries are skipped by reap()"""
+        hold = self._holds.pop(token, None)
+        if hold is None:
+            return None
+        for index, key in ((self._by_doctor, hold.doctor_id), (self._by_patient, hold.patient_id)):
+            holds = index[key]
+            del holds[token]
+            if not holds:
+                del index[key]
+        return hold
+
+    def _active(self, index: Dict[int, Dict[str, SlotHold]], key: int, now: float) -> List[SlotHold]:
+        """Caller holds the lock"""
+        return [hold for hold in index.get(key, {}).values() if hold.expires_at > now]
+
+    def hold(self, doctor_id: int, patient_id: int, start: datetime, minutes: int) -> Optional[SlotHold]:
+        """
+        Hold a slot for patient_id, or renew their hold on it. Returns None
+        if another patient holds an overlapping slot. A patient keeps at
+        most max_per_patient holds; the one expiring first makes room.
+        """
+        now = time_module.monotonic()
+        end = start + timedelta(minutes=minutes)
+        with self._lock:
+            own = None
+            for hold in self._active(self._by_doctor, doctor_id, now):
+                if hold.start < end and start < hold.end:
+                    if hold.patient_id != patient_id:
+                        return None
+                    if hold.start == start and hold.minutes == minutes:
+                        own = hold
+
+            changed = {doctor_id}
+            if own is not None:
+                self._remove(own.token)
+                hold = replace(own, expires_at=now + self.ttl)
+            else:
+                others = sorted(self._active(self._by_patient, patient_id, now), key=lambda h: h.expires_at)
+                for dropped in others[:max(0, len(others) - self.max_per_patient + 1)]:
+                    self._remove(dropped.token)
+                    changed.add(dropped.doctor_id)
+                hold = SlotHold(
+                    token=secrets.token_urlsafe(16),
+                    doctor_id=doctor_id,
+                    patient_id=patient_id,
+                    start=start,
+                    minutes=minutes,
+                    expires_at=now + self.ttl,
+                )
+            self._add(hold)
+        self._notify(changed)
+        return hold
+
+    def get(self, token: str) -> Optional[SlotHold]:
+        """An active hold by token"""
+        with self._lock:
+            hold = self._holds.get(token)
+        if hold is None or hold.expires_at <= time_module.monotonic():
+            return None
+        return hold
+
+    def release(self, token: str) -> Optional[SlotHold]:
+        with self._lock:
+            hold = self._remove(token)
+        if hold is not None:
+            self._notify([hold.doctor_id])
+        return hold
+
+    def release_slot(self, doctor_id: int, patient_id: int, start: datetime) -> None:
+        """Drop a patient's holds on a slot, e.g. once they have booked it"""
+        with self._lock:
+            released = [
+                self._remove(hold.token) for hold in list(self._by_patient.get(patient_id, {}).values())
+                if hold.doctor_id == doctor_id and hold.start == start
+            ]
+        if released:
+            self._notify([doctor_id])
+
+    def conflict(self, doctor_id: int, start: datetime, minutes: int, patient_id: Optional[int] = None) -> Optional[SlotHold]:
+        """An active hold of someone other than patient_id overlapping the slot"""
+        now = time_module.monotonic()
+        end = start + timedelta(minutes=minutes)
+        with self._lock:
+            for hold in self._active(self._by_doctor, doctor_id, now):
+                if hold.patient_id != patient_id and hold.start < end and start < hold.end:
+                    return hold
+        return None
+
+    def doctor_holds(self, doctor_id: int) -> List[SlotHold]:
+        """Active holds on a doctor's slots"""
+        now = time_module.monotonic()
+        with self._lock:
+            return self._active(self._by_doctor, doctor_id, now)
+
+    def reap(self) -> int:
+        """Drop every expired hold in one pass over the expiry heap"""
+        now = time_module.monotonic()
+        reaped = []
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires_at, token = heapq.heappop(self._expiry)
+                hold = self._holds.get(token)
+                # Released or renewed holds leave stale entries behind
+                if hold is not None and hold.expires_at == expires_at:
+                    reaped.append(self._remove(token))
+        self._notify(hold.doctor_id for hold in reaped)
+        return len(reaped)
+
+    def reap_every(self, interval: float) -> threading.Thread:
+        """Reap expired holds every interval seconds in a daemon thread"""
+        def run() -> None:
+            while True:
+                time_module.sleep(interval)
+                try:
+                    self.reap()
+                except Exception:
+                    logger.exception("Failed to reap expired slot holds")
+
+        thread = threading.Thread(target=run, name="slot-hold-reaper", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"holds": len(self._holds), "doctors": len(self._by_doctor), "pending_expiries": len(self._expiry)}
+
+slot_holds = SlotHoldStore(
+    ttl=settings.SLOT_HOLD_TTL_SECONDS,
+    max_per_patient=settings.SLOT_HOLD_MAX_PER_PATIENT,
+)
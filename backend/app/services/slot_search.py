@@ -0,0 +1,66 @@
+# backend/app/services/slot_search.py
+"""
+Earliest free slots across many doctors.
+
+Each doctor's free slots are produced lazily in time order from the slot
+calendar, and the per-doctor streams are combined with a heap-based k-way
+merge (heapq.merge). The search stops at the first N slots, so only the
+slots up to the N-th earliest are ever generated. Calendars are loaded a
+week at a time and later weeks only if the earlier ones ran out.
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.slot_calendar import DayCalendar, slot_calendar
+
+SEARCH_WINDOW_DAYS = 7
+
+@dataclass(frozen=True)
+class SlotOffer:
+    start: datetime
+    doctor_id: int
+    minutes: int
+
+def iter_free_slots(days: Dict[date, DayCalendar], not_before: datetime) -> Iterator[Tuple[datetime, int]]:
+    """(start, minutes) of a doctor's free slots in time order"""
+    for day in sorted(days):
+        calendar = days[day]
+        for start, minutes in calendar.slots():
+            if start >= not_before and calendar.is_free(start, minutes):
+                yield start, minutes
+
+def _offers(doctor_id: int, slots: Iterator[Tuple[datetime, int]]) -> Iterator[SlotOffer]:
+    for start, minutes in slots:
+        yield SlotOffer(start, doctor_id, minutes)
+
+def earliest_free_slots(
+    db: Session,
+    doctor_ids: Sequence[int],
+    limit: int,
+    not_before: datetime,
+    horizon_days: int,
+) -> List[SlotOffer]:
+    """The limit earliest free slots of any of the doctors within horizon_days of not_before"""
+    found: List[SlotOffer] = []
+    if not doctor_ids or limit <= 0:
+        return found
+
+    first_day = not_before.date()
+    for offset in range(0, horizon_days, SEARCH_WINDOW_DAYS):
+        n_days = min(SEARCH_WINDOW_DAYS, horizon_days - offset)
+        calendars = slot_calendar.get_days_many(db, doctor_ids, first_day + timedelta(days=offset), n_days)
+        # Ties on start time go to the lower doctor id, so results are stable
+        streams = [
+            _offers(doctor_id, iter_free_slots(calendars[doctor_id], not_before))
+            for doctor_id in sorted(doctor_ids)
+        ]
+        merged = heapq.merge(*streams, key=lambda offer: (offer.start, offer.doctor_id))
+        found.extend(islice(merged, limit - len(found)))
+        if len(found) >= limit:
+            break
+    return found
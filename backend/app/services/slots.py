@@ -0,0 +1,23 @@
+# backend/app/services/slots.py
+"""
+Shared slot helpers for the availability endpoints.
+
+Which slots a doctor has comes from their schedule (app/services/schedule.py);
+whether a slot is free, booked or blocked is answered by the per-doctor
+bitset calendar in app/services/slot_calendar.py.
+"""
+from datetime import date, time, timedelta
+from typing import Iterator
+
+DEFAULT_DAY_START = time(9, 0)
+DEFAULT_DAY_END = time(17, 0)
+DEFAULT_SLOT_MINUTES = 30  # default week: Mon-Fri 9:00-17:00 in 30 minute slots
+MAX_APPOINTMENT_MINUTES = 240
+
+def slot_id(day: date, index: int) -> int:
+    """Synthetic slot id used by the doctor availability views (YYYYMMDD + 2-digit index)"""
+    return int(f"{day.strftime('%Y%m%d')}{index:02d}")
+
+def iter_days(start: date, days: int) -> Iterator[date]:
+    for offset in range(days):
+        yield start + timedelta(days=offset)
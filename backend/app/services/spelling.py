@@ -0,0 +1,167 @@
+# backend/app/services/spelling.py
+"""
+Typo-tolerant token correction (SymSpell-style symmetric delete index).
+
+Every vocabulary word is expanded once into all strings reachable by
+deleting up to max_distance characters. A misspelled token is corrected by
+generating its own deletes and looking them up in that index, so a lookup
+is a handful of hash probes instead of an edit-distance scan over the
+whole vocabulary. Candidates are then verified with the real distance.
+
+Only tokens that are not real words are corrected: "strike" is an English
+word, not a typo of "stroke", so tokens found in the known word list are
+left alone however close they are to a keyword.
+"""
+import logging
+import re
+from typing import AbstractSet, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+# Tokens shorter than this only get one edit
+LONG_TOKEN_LENGTH = 10
+
+def load_word_list(path: str) -> FrozenSet[str]:
+    """Lowercase words of a one-word-per-line file ("#" starts a comment line)"""
+    try:
+        with open(path) as f:
+            return frozenset(line.strip().lower() for line in f if line.strip() and not line.startswith("#"))
+    except OSError:
+        logger.warning("No word list at %s", path)
+        return frozenset()
+
+def deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings obtained by deleting up to max_distance characters"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count as one edit), capped at max_distance + 1"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if prev_prev is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev_prev[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, row
+    return prev[-1]
+
+class SymSpellIndex:
+    """Symmetric delete index over a fixed vocabulary"""
+
+    def __init__(
+        self,
+        vocabulary: Iterable[str],
+        max_distance: int = 2,
+        min_token_length: int = 5,
+        known_words: AbstractSet[str] = frozenset(),
+        protected_words: Iterable[str] = (),
+        memo_size: int = 50000,
+    ):
+        self.max_distance = max_distance
+        self.min_token_length = min_token_length
+        self.vocabulary: Set[str] = {w for w in vocabulary if len(w) >= min_token_length}
+        # Real words are never corrected: a general English word list (shared,
+        # not copied) plus any extra words the rules protect
+        self.known_words = known_words
+        self.protected_words: Set[str] = set(protected_words)
+
+        self._index: Dict[str, Set[str]] = {}
+        for word in self.vocabulary:
+            for variant in deletes(word, max_distance):
+                self._index.setdefault(variant, set()).add(word)
+
+        # Patients repeat the same words, so remember the verdict per token:
+        # tokens that need no fix, and token -> correction
+        self.memo_size = memo_size
+        self._no_fix: Set[str] = set()
+        self._fixes: Dict[str, str] = {}
+
+    def allowed_distance(self, token: str) -> int:
+        """One edit, or up to max_distance for long tokens"""
+        return min(self.max_distance, 1 if len(token) < LONG_TOKEN_LENGTH else 2)
+
+    def _lookup(self, token: str) -> Optional[str]:
+        """Closest vocabulary word for token, or None if it is fine as is / unknown"""
+        if (
+            len(token) < self.min_token_length
+            or token in self.vocabulary
+            or token in self.known_words
+            or token in self.protected_words
+        ):
+            return None
+
+        max_distance = self.allowed_distance(token)
+        candidates: Set[str] = set()
+        for variant in deletes(token, max_distance):
+            candidates |= self._index.get(variant, set())
+
+        best, best_distance = None, max_distance + 1
+        for candidate in sorted(candidates):
+            distance = edit_distance(token, candidate, max_distance)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+    def correct(self, token: str) -> Optional[str]:
+        """Memoised _lookup"""
+        if token in self._no_fix:
+            return None
+        fix = self._fixes.get(token)
+        if fix is None:
+            fix = self._lookup(token)
+            # Crude bound on memo growth: start over when full
+            if len(self._no_fix) + len(self._fixes) >= self.memo_size:
+                self._no_fix = set()
+                self._fixes = {}
+            if fix is None:
+                self._no_fix.add(token)
+            else:
+                self._fixes[token] = fix
+        return fix
+
+    def correct_text(self, text: str) -> str:
+        """Lowercase text with misspelled vocabulary words replaced"""
+        return self.correct_spans(text)[0]
+
+    def correct_spans(self, text: str) -> Tuple[str, List[Tuple[int, int]]]:
+        """correct_text, plus the (start, end) of every corrected word in the result"""
+        text = text.lower()
+        # Set difference skips every token already known to be fine in one C-level pass
+        pending = set(_TOKEN_RE.findall(text)) - self._no_fix
+        fixes = {}
+        for token in pending:
+            fix = self.correct(token)
+            if fix is not None:
+                fixes[token] = fix
+        if not fixes:
+            return text, []
+
+        parts: List[str] = []
+        spans: List[Tuple[int, int]] = []
+        length = last = 0
+        for match in _TOKEN_RE.finditer(text):
+            fix = fixes.get(match.group(0))
+            if fix is None:
+                continue
+            parts.append(text[last:match.start()])
+            length += match.start() - last
+            parts.append(fix)
+            spans.append((length, length + len(fix)))
+            length += len(fix)
+            last = match.end()
+        parts.append(text[last:])
+        return "".join(parts), spans
@@ -0,0 +1,435 @@
+# backend/app/services/triage.py
+"""
+Keyword triage engine for the symptom checker.
+
+All urgency and specialty keywords are compiled once into a single regular
+expression, so analysing a symptom description is one scan over the text
+no matter how many keywords we track. When a trained specialty
+classifier is available it replaces the keyword vote for the specialty;
+urgency always comes from the keyword rules. Misspelled keywords are
+corrected first, but a corrected word alone never raises the urgency.
+
+Rules live in a versioned JSON file (TRIAGE_RULES_PATH). Editing the file
+hot-swaps a freshly compiled engine into every worker without a restart.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import AbstractSet, Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+from app.services.classifier import SymptomClassifier, load_classifier
+from app.services.spelling import SymSpellIndex, load_word_list
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPECIALTY = "General Practice"
+
+URGENCY_ROUTINE = "routine"
+URGENCY_URGENT = "urgent"
+URGENCY_EMERGENCY = "emergency"
+
+_URGENCY_SEVERITY = {URGENCY_ROUTINE: 0, URGENCY_URGENT: 1, URGENCY_EMERGENCY: 2}
+
+# Real words are never typo-corrected into keywords; loaded once and shared
+# by every engine the rules reloader builds
+english_words = load_word_list(settings.TRIAGE_ENGLISH_WORDS_PATH)
+
+def merge_urgency(a: str, b: str) -> str:
+    """The more severe of two urgency levels"""
+    return a if _URGENCY_SEVERITY[a] >= _URGENCY_SEVERITY[b] else b
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def canonical_text(text: str) -> str:
+    """
+    Lowercased words of a symptom text in their original order, separated
+    by single spaces ("Chest  pain!" == "chest pain"). Word order and every
+    word are kept: multi-word keywords match in order, so "not breathing,
+    dizzy" and "breathing, not dizzy" must not share a result.
+    """
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+# Inflections a keyword may carry and still match ("overdosed", "bloody", "rashes")
+KEYWORD_SUFFIXES = ("", "s", "es", "d", "ed", "y", "ing")
+
+def ends_word(text: str, end: int) -> bool:
+    """Whether a match ending at end ends a word, allowing an inflection from KEYWORD_SUFFIXES"""
+    for suffix in KEYWORD_SUFFIXES:
+        if text.startswith(suffix, end):
+            stop = end + len(suffix)
+            if stop == len(text) or not text[stop].isalnum():
+                return True
+    return False
+
+class KeywordMatcher:
+    """Whole-word matcher over a fixed set of lowercase keywords"""
+
+    def __init__(self, patterns: Sequence[Tuple[str, Any]]):
+        self._payloads: Dict[str, List[Any]] = {}
+        for keyword, payload in patterns:
+            self._payloads.setdefault(keyword, []).append(payload)
+
+        # One compiled lookahead alternation, longest keyword first, finds
+        # every start at which some keyword forms a whole (optionally
+        # inflected) word; the regex engine scans in C, which is several
+        # times faster than stepping an automaton in Python. Only accept
+        # matches on word boundaries so "ear" does not fire inside
+        # "heart", "year" or "early".
+        keywords = sorted(self._payloads, key=len, reverse=True)
+        suffixes = "|".join(re.escape(suffix) for suffix in KEYWORD_SUFFIXES if suffix)
+        self._pattern = re.compile(
+            r"(?<![^\W_])(?=("
+            + "|".join(re.escape(keyword) for keyword in keywords)
+            + r")(?:" + suffixes + r")?(?![^\W_]))"
+        ) if keywords else None
+
+        # The regex reports the longest keyword at each start; shorter
+        # keywords that prefix it ("chest" in "chest pain") are checked
+        # separately
+        self._prefixes: Dict[str, List[str]] = {
+            keyword: [other for other in keywords if len(other) < len(keyword) and keyword.startswith(other)]
+            for keyword in keywords
+        }
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str, Any]]:
+        """Yield (start, keyword, payload) for every keyword occurrence that is a whole word"""
+        if self._pattern is None:
+            return
+        for match in self._pattern.finditer(text):
+            start, keyword = match.start(), match.group(1)
+            for prefix in self._prefixes[keyword]:
+                if ends_word(text, start + len(prefix)):
+                    for payload in self._payloads[prefix]:
+                        yield start, prefix, payload
+            for payload in self._payloads[keyword]:
+                yield start, keyword, payload
+
+def _keyword_list(value: Any, key: str) -> List[str]:
+    """Normalised keywords of a rules file list, which must hold non-empty strings"""
+    # A bare string would otherwise be read as a list of single letters
+    if not isinstance(value, list):
+        raise ValueError(f"{key} must be a list of keywords")
+    keywords = []
+    for kw in value:
+        if not isinstance(kw, str) or not kw.strip():
+            raise ValueError(f"{key} must only contain non-empty keywords, got {kw!r}")
+        keywords.append(kw.strip().lower())
+    return keywords
+
+@dataclass
+class TriageRules:
+    version: str
+    urgent_keywords: List[str]
+    emergency_keywords: List[str]
+    # keyword -> (specialty, weight), in declaration order
+    specialty_keywords: Dict[str, Tuple[str, float]]
+    # Typo correction against the keyword vocabulary
+    fuzzy_enabled: bool = True
+    fuzzy_max_distance: int = 2
+    fuzzy_min_token_length: int = 5
+    fuzzy_protected_words: List[str] = field(default_factory=list)
+
+    @property
+    def vocabulary(self) -> Set[str]:
+        """Individual words used by any keyword"""
+        keywords = self.urgent_keywords + self.emergency_keywords + list(self.specialty_keywords)
+        return {word for kw in keywords for word in kw.split()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TriageRules":
+        """Validate a parsed rules file, raising ValueError naming the offending key"""
+        if not isinstance(data, dict):
+            raise ValueError("Triage rules must be a JSON object")
+        version = data.get("version")
+        if not version:
+            raise ValueError("Triage rules must declare a version")
+
+        specialties = data.get("specialties", {})
+        if not isinstance(specialties, dict):
+            raise ValueError("specialties must map each specialty to its keywords")
+        specialty_keywords: Dict[str, Tuple[str, float]] = {}
+        for spec, keywords in specialties.items():
+            # Either a list of keywords (weight 1) or a keyword -> weight map
+            if isinstance(keywords, list):
+                keywords = {kw: 1.0 for kw in _keyword_list(keywords, f"specialties.{spec}")}
+            elif isinstance(keywords, dict):
+                _keyword_list(list(keywords), f"specialties.{spec}")
+            else:
+                raise ValueError(f"specialties.{spec} must be a list of keywords or a keyword -> weight map")
+            for kw, weight in keywords.items():
+                if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+                    raise ValueError(f"specialties.{spec}.{kw} weight must be a number")
+                specialty_keywords[kw.strip().lower()] = (spec, float(weight))
+
+        fuzzy = data.get("fuzzy_matching", {})
+        if not isinstance(fuzzy, dict):
+            raise ValueError("fuzzy_matching must be an object")
+        try:
+            max_distance = int(fuzzy.get("max_edit_distance", 2))
+            min_token_length = int(fuzzy.get("min_token_length", 5))
+        except (TypeError, ValueError):
+            raise ValueError("fuzzy_matching.max_edit_distance and min_token_length must be integers")
+        return cls(
+            version=str(version),
+            urgent_keywords=_keyword_list(data.get("urgent_keywords", []), "urgent_keywords"),
+            emergency_keywords=_keyword_list(data.get("emergency_keywords", []), "emergency_keywords"),
+            specialty_keywords=specialty_keywords,
+            fuzzy_enabled=bool(fuzzy.get("enabled", True)),
+            fuzzy_max_distance=max_distance,
+            fuzzy_min_token_length=min_token_length,
+            fuzzy_protected_words=_keyword_list(fuzzy.get("protected_words", []), "fuzzy_matching.protected_words"),
+        )
+
+def load_rules(path: str) -> TriageRules:
+    """Read and validate a JSON rules file"""
+    with open(path) as f:
+        return TriageRules.from_dict(json.load(f))
+
+@dataclass
+class TriageResult:
+    urgency: str
+    specialty: str
+    confidence: float = 0.0
+    scores: Dict[str, float] = field(default_factory=dict)
+    matched_keywords: List[str] = field(default_factory=list)
+    rules_version: Optional[str] = None
+
+class TriageEngine:
+    """Compiled keyword rules that score a symptom description in one pass"""
+
+    def __init__(
+        self,
+        rules: TriageRules,
+        classifier: Optional[SymptomClassifier] = None,
+        known_words: Optional[AbstractSet[str]] = None,
+    ):
+        self.rules = rules
+        self.classifier = classifier
+
+        patterns: List[Tuple[str, Any]] = []
+        patterns.extend((kw, ("urgency", URGENCY_URGENT)) for kw in rules.urgent_keywords)
+        patterns.extend((kw, ("urgency", URGENCY_EMERGENCY)) for kw in rules.emergency_keywords)
+        patterns.extend(
+            (kw, ("specialty", spec, weight))
+            for kw, (spec, weight) in rules.specialty_keywords.items()
+        )
+        self._matcher = KeywordMatcher(patterns)
+
+        # Without a word list every near-miss real word would be "corrected",
+        # so fuzzy matching stays off
+        known_words = english_words if known_words is None else known_words
+        self._speller: Optional[SymSpellIndex] = None
+        if rules.fuzzy_enabled and known_words:
+            self._speller = SymSpellIndex(
+                rules.vocabulary,
+                max_distance=rules.fuzzy_max_distance,
+                min_token_length=rules.fuzzy_min_token_length,
+                known_words=known_words,
+                protected_words=rules.fuzzy_protected_words,
+            )
+
+        # Declaration order breaks score ties, matching the old first-match rule
+        self._specialty_rank: Dict[str, int] = {}
+        for spec, _ in rules.specialty_keywords.values():
+            self._specialty_rank.setdefault(spec, len(self._specialty_rank))
+
+    @property
+    def version(self) -> str:
+        return self.rules.version
+
+    def analyze(self, text: str) -> TriageResult:
+        """Score a symptom description and pick urgency and specialty"""
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts: Sequence[str]) -> List[TriageResult]:
+        """Analyze a batch of symptom descriptions"""
+        results = [self.match_keywords(text) for text in texts]
+        if self.classifier is not None:
+            # The model scores the whole batch at once
+            for result, (specialty, probability) in zip(results, self.classifier.classify_many(texts)):
+                result.specialty = specialty
+                result.confidence = probability
+        return results
+
+    def match_keywords(self, text: str) -> TriageResult:
+        """Keyword-only triage of a single text"""
+        urgency = URGENCY_ROUTINE
+        scores: Dict[str, float] = {}
+        matched: List[str] = []
+
+        # Fix misspelled keywords ("cheast pain") before matching
+        text, corrected = self._speller.correct_spans(text) if self._speller else (text.lower(), [])
+        for start, keyword, payload in self._matcher.iter_matches(text):
+            if payload[0] == "urgency":
+                # A guessed correction may only help pick the specialty
+                end = start + len(keyword)
+                if any(s < end and start < e for s, e in corrected):
+                    continue
+                urgency = merge_urgency(urgency, payload[1])
+            else:
+                _, spec, weight = payload
+                scores[spec] = scores.get(spec, 0.0) + weight
+            matched.append(keyword)
+
+        specialty = self.pick_specialty(scores)
+        return TriageResult(
+            urgency=urgency,
+            specialty=specialty,
+            confidence=self.keyword_confidence(scores, specialty),
+            scores=scores,
+            matched_keywords=matched,
+            rules_version=self.version,
+        )
+
+    def pick_specialty(self, scores: Dict[str, float]) -> str:
+        """Return the highest scoring specialty, or the default when nothing matched"""
+        if not scores:
+            return DEFAULT_SPECIALTY
+        return min(scores, key=lambda spec: (-scores[spec], self._specialty_rank.get(spec, len(self._specialty_rank))))
+
+    def keyword_confidence(self, scores: Dict[str, float], specialty: str) -> float:
+        """
+        How strongly the keywords agree on specialty: the rule-of-succession
+        estimate that one more keyword would vote for it. One unambiguous
+        hit gives 0.67, two agreeing hits 0.75, a split vote 0.5, and no
+        keyword at all 0 (the default specialty is a fallback, not a verdict).
+        """
+        total = sum(scores.values())
+        if total <= 0:
+            return 0.0
+        return (scores.get(specialty, 0.0) + 1.0) / (total + 2.0)
+
+class SymptomAnalyzer:
+    """
+    Entry point used by the API: a result cache in front of the active engine.
+
+    Results are cached on the canonical text, which is also what the engine
+    analyzes, so every text sharing a cache entry gets the same verdict.
+    Cached TriageResult objects are shared between requests and must not be
+    mutated by callers.
+    """
+
+    def __init__(self, engine: TriageEngine, cache: TTLCache):
+        self._engine = engine
+        self.cache = cache
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self) -> TriageEngine:
+        return self._engine
+
+    def swap_engine(self, engine: TriageEngine) -> None:
+        """Install a new engine (rules or model changed) and flush cached results"""
+        with self._lock:
+            self._engine = engine
+            self.cache.clear()
+
+    def analyze(self, text: str) -> TriageResult:
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts: Sequence[str]) -> List[TriageResult]:
+        """Analyze texts, only running the engine for cache misses"""
+        engine = self._engine
+        keys = [canonical_text(text) for text in texts]
+        results: List[Optional[TriageResult]] = [self.cache.get(key) for key in keys]
+
+        # Run each distinct missing key once, even if repeated within the batch
+        missing: Dict[str, List[int]] = {}
+        for i, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[i], []).append(i)
+        if missing:
+            fresh = engine.analyze_many(list(missing))
+            for (key, positions), result in zip(missing.items(), fresh):
+                for i in positions:
+                    results[i] = result
+                # Don't repopulate the cache with results from a replaced engine
+                if engine is self._engine:
+                    self.cache.set(key, result)
+        return results
+
+class RulesReloader:
+    """Recompiles the rules file into a new engine when it changes on disk"""
+
+    def __init__(self, analyzer: SymptomAnalyzer, path: str):
+        self.analyzer = analyzer
+        self.path = path
+        self._mtime = self._current_mtime()
+        self._lock = threading.Lock()
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Compile the rules file and swap it in if it changed (or when forced).
+        Returns True if a new engine was installed. In-flight requests keep
+        using the engine they started with.
+        """
+        with self._lock:
+            mtime = self._current_mtime()
+            if not force and mtime == self._mtime:
+                return False
+            # Compile fully before swapping so a bad file never goes live;
+            # remember its mtime either way so the watcher reports it once
+            self._mtime = mtime
+            rules = load_rules(self.path)
+            engine = TriageEngine(rules, classifier=self.analyzer.engine.classifier)
+            self.analyzer.swap_engine(engine)
+            logger.info("Loaded triage rules version %s", rules.version)
+            return True
+
+    def watch(self, interval: float) -> threading.Thread:
+        """Poll the rules file every interval seconds in a daemon thread"""
+        def run() -> None:
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload()
+                except Exception:
+                    logger.exception("Failed to reload triage rules from %s", self.path)
+
+        thread = threading.Thread(target=run, name="triage-rules-watcher", daemon=True)
+        thread.start()
+        return thread
+
+def build_recommendations(urgency: str, specialty: str) -> List[str]:
+    """Patient-facing advice for a triage verdict"""
+    if urgency == URGENCY_EMERGENCY:
+        return [
+            "This appears to be an emergency case - please seek immediate medical attention",
+            "Consider visiting the emergency room or calling emergency services",
+            "If available, I'll help you find urgent care options"
+        ]
+    if urgency == URGENCY_URGENT:
+        return [
+            "Based on your symptoms, this appears to be an urgent case",
+            f"I recommend consulting with a {specialty} specialist as soon as possible",
+            "I'll help you find the earliest available appointments"
+        ]
+    return [
+        "Based on your symptoms, this appears to be a routine consultation",
+        f"I recommend consulting with a {specialty} specialist",
+        "I'll help you find convenient appointment times"
+    ]
+
+# Compiled once at import time and shared by every request; the model
+# weights (if trained) are memory-mapped here
+symptom_analyzer = SymptomAnalyzer(
+    TriageEngine(
+        load_rules(settings.TRIAGE_RULES_PATH),
+        classifier=load_classifier(settings.TRIAGE_MODEL_DIR),
+    ),
+    TTLCache(maxsize=settings.TRIAGE_CACHE_SIZE, ttl=settings.TRIAGE_CACHE_TTL_SECONDS),
+)
+
+rules_reloader = RulesReloader(symptom_analyzer, settings.TRIAGE_RULES_PATH)
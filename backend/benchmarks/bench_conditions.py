@@ -0,0 +1,97 @@
+# backend/benchmarks/bench_conditions.py
+"""
+Top-k retrieval latency of the condition knowledge base at scale
+
+Builds a synthetic knowledge base (default 50k conditions) from the
+corpus phrase banks, saves and memory-maps it like production, then
+times top-k queries over the synthetic symptom corpus.
+
+Usage (from backend/):
+    python benchmarks/bench_conditions.py [--conditions 50000] [--k 5] [--out kb.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add the backend directory to Python path so we can import our app modules
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from bench_triage import git_commit, percentile
+from corpus import FILLER, SPECIALTY_PHRASES, generate_corpus
+
+from app.services.conditions import ConditionIndex
+
+def synthetic_conditions(n: int, seed: int):
+    rng = random.Random(seed)
+    specialties = list(SPECIALTY_PHRASES)
+    words = sorted({w for phrases in SPECIALTY_PHRASES.values() for p in phrases for w in p.split()})
+    conditions = []
+    for i in range(n):
+        specialty = rng.choice(specialties)
+        symptoms = rng.sample(SPECIALTY_PHRASES[specialty], 2) + [rng.choice(FILLER)]
+        # A few random extra words so entries are not exact duplicates
+        symptoms.append(" ".join(rng.sample(words, 3)))
+        conditions.append({
+            "name": f"Condition {i}",
+            "specialty": specialty,
+            "symptoms": symptoms,
+            "follow_up_questions": [],
+        })
+    return conditions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark condition knowledge base retrieval")
+    parser.add_argument("--conditions", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--out", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    print("📚 Condition retrieval benchmark")
+    print("=" * 30)
+
+    started = time.perf_counter()
+    built = ConditionIndex.build(synthetic_conditions(args.conditions, args.seed))
+    build_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        built.save(index_dir)
+        index = ConditionIndex.load(index_dir)
+
+        queries = [s["text"] for s in generate_corpus(args.queries, args.seed) if s["kind"] != "long"]
+        for text in queries[:20]:
+            index.search(text, k=args.k)
+
+        latencies = []
+        for text in queries:
+            t0 = time.perf_counter_ns()
+            index.search(text, k=args.k)
+            latencies.append((time.perf_counter_ns() - t0) / 1e6)
+        latencies.sort()
+
+    report = {
+        "commit": git_commit(),
+        "conditions": args.conditions,
+        "postings": int(built.docs.shape[0]),
+        "k": args.k,
+        "build_seconds": round(build_seconds, 2),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+    print(f"  built {args.conditions} conditions ({report['postings']} postings) in {report['build_seconds']}s")
+    print(f"  top-{args.k}: p50 {report['p50_ms']} ms   p99 {report['p99_ms']} ms")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# backend/benchmarks/bench_slots.py
+"""
+Slot generation: per-slot Python loop vs cached window offsets
+
+Expands a month of a weekly schedule (two windows around a lunch break)
+for many doctors, once with the old ``while current < end`` loop and once
+day by day with DoctorSchedule.day_slots(), the windows_slots() path the
+availability views use through DayCalendar.slots().
+
+Usage (from backend/):
+    python benchmarks/bench_slots.py [--doctors 50] [--days 30] [--out slots.json]
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime, time, timedelta
+from time import perf_counter
+
+# Add the backend directory to Python path so we can import our app modules
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from bench_triage import git_commit
+
+from app.services.schedule import DoctorSchedule, profile_windows
+
+def loop_grid(schedule: DoctorSchedule, start: date, n_days: int):
+    """The generator the availability endpoints used before"""
+    slots = []
+    for offset in range(n_days):
+        day = start + timedelta(days=offset)
+        for window in schedule.windows(day):
+            current = datetime.combine(day, window.start)
+            end = datetime.combine(day, window.end)
+            step = timedelta(minutes=window.slot_minutes)
+            while current + step <= end:
+                slots.append((current, window.slot_minutes))
+                current += step
+    return slots
+
+def day_by_day(schedule: DoctorSchedule, start: date, n_days: int):
+    """The slots the availability views expand, one day at a time"""
+    slots = []
+    for offset in range(n_days):
+        slots.extend(schedule.day_slots(start + timedelta(days=offset)))
+    return slots
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = perf_counter()
+        fn()
+        best = min(best, perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark slot grid generation")
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    print("🗓️  Slot generation benchmark")
+    print("=" * 30)
+
+    windows = profile_windows(time(8, 0), time(18, 0), 15, [(time(12, 0), time(13, 0))])
+    schedules = [DoctorSchedule({weekday: windows for weekday in range(5)}) for _ in range(args.doctors)]
+    start = date.today()
+
+    # Same slots either way
+    slots = day_by_day(schedules[0], start, args.days)
+    assert slots == loop_grid(schedules[0], start, args.days)
+
+    loop_seconds = best_of(lambda: [loop_grid(s, start, args.days) for s in schedules], args.repeat)
+    cached_seconds = best_of(lambda: [day_by_day(s, start, args.days) for s in schedules], args.repeat)
+
+    report = {
+        "commit": git_commit(),
+        "doctors": args.doctors,
+        "days": args.days,
+        "slots_per_doctor": len(slots),
+        "loop_ms": round(loop_seconds * 1000, 3),
+        "cached_ms": round(cached_seconds * 1000, 3),
+        "speedup": round(loop_seconds / cached_seconds, 1),
+    }
+
+    print(f"  {args.doctors} doctors x {args.days} days, {report['slots_per_doctor']} slots each")
+    print(f"  loop:  {report['loop_ms']} ms")
+    print(f"  cached: {report['cached_ms']} ms ({report['speedup']}x)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# backend/benchmarks/bench_spelling.py
+"""
+Cost and quality of typo-tolerant keyword matching
+
+Compares the triage engine with and without fuzzy correction on the
+synthetic corpus (speed) and the labeled fixtures (accuracy, and real
+words wrongly "corrected" into keywords), and the symmetric delete index
+against a naive edit-distance scan over the vocabulary on generated
+misspellings.
+
+Usage (from backend/):
+    python benchmarks/bench_spelling.py [--n 2000] [--seed 1234] [--out spelling.json]
+"""
+import argparse
+import dataclasses
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Add the backend directory to Python path so we can import our app modules
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from bench_triage import git_commit, score_engine, time_engine
+from corpus import generate_corpus, load_fixtures
+
+from app.core.config import settings
+from app.services.spelling import SymSpellIndex, edit_distance
+from app.services.triage import TriageEngine, load_rules
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+def misspell(word: str, rng: random.Random) -> str:
+    """Apply one random delete, insert, substitution or transposition"""
+    i = rng.randrange(len(word))
+    op = rng.choice(["delete", "insert", "substitute", "transpose"])
+    if op == "delete":
+        return word[:i] + word[i + 1:]
+    if op == "insert":
+        return word[:i] + rng.choice(ALPHABET) + word[i:]
+    if op == "substitute":
+        return word[:i] + rng.choice(ALPHABET.replace(word[i], "")) + word[i + 1:]
+    i = min(i, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def naive_correct(token: str, vocabulary: Sequence[str], max_distance: int) -> Optional[str]:
+    """Reference implementation: edit distance against every vocabulary word"""
+    best, best_distance = None, max_distance + 1
+    for word in vocabulary:
+        distance = edit_distance(token, word, max_distance)
+        if distance < best_distance:
+            best, best_distance = word, distance
+    return best
+
+def time_corrector(correct, pairs: Sequence[Tuple[str, str]]) -> Dict[str, float]:
+    hits = 0
+    latencies: List[float] = []
+    for typo, expected in pairs:
+        t0 = time.perf_counter_ns()
+        fixed = correct(typo)
+        latencies.append((time.perf_counter_ns() - t0) / 1000.0)
+        hits += fixed == expected
+    latencies.sort()
+    return {
+        "accuracy": round(hits / len(pairs), 4),
+        "mean_us": round(sum(latencies) / len(latencies), 2),
+        "p99_us": round(latencies[int(0.99 * (len(latencies) - 1))], 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fuzzy keyword correction")
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--out", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    rules = load_rules(settings.TRIAGE_RULES_PATH)
+    exact_rules = dataclasses.replace(rules, fuzzy_enabled=False)
+    fuzzy_engine, exact_engine = TriageEngine(rules), TriageEngine(exact_rules)
+
+    # End-to-end: what does correction add to a request?
+    texts = [sample["text"] for sample in generate_corpus(args.n, args.seed)]
+    end_to_end = {
+        "exact": time_engine(exact_engine, texts),
+        "fuzzy": time_engine(fuzzy_engine, texts),
+    }
+
+    # Quality: typos fixed vs real words turned into keywords
+    fixtures = load_fixtures()
+    near_misses = [sample for sample in fixtures if sample["kind"] == "near_miss"]
+    quality = {
+        name: {"fixtures": score_engine(engine, fixtures), "near_miss": score_engine(engine, near_misses)}
+        for name, engine in (("exact", exact_engine), ("fuzzy", fuzzy_engine))
+    }
+
+    # Token level: index lookups vs scanning the vocabulary
+    rng = random.Random(args.seed)
+    index = SymSpellIndex(
+        rules.vocabulary,
+        max_distance=rules.fuzzy_max_distance,
+        min_token_length=rules.fuzzy_min_token_length,
+    )
+    vocabulary = sorted(index.vocabulary)
+    pairs = []
+    while len(pairs) < 1000:
+        word = rng.choice(vocabulary)
+        typo = misspell(word, rng)
+        if len(typo) >= rules.fuzzy_min_token_length and typo not in index.vocabulary:
+            pairs.append((typo, word))
+
+    token_level = {
+        # _lookup bypasses the memo so every probe is measured cold
+        "symspell": time_corrector(index._lookup, pairs),
+        "naive_scan": time_corrector(
+            lambda t: naive_correct(t, vocabulary, index.allowed_distance(t)), pairs
+        ),
+    }
+
+    report = {
+        "commit": git_commit(),
+        "vocabulary_size": len(vocabulary),
+        "end_to_end": end_to_end,
+        "quality": quality,
+        "token_level": token_level,
+    }
+
+    print("🔤 Fuzzy correction benchmark")
+    print("=" * 30)
+    for name, t in end_to_end.items():
+        print(f"  {name:10s} p50 {t['p50_us']:>8.1f} us   p99 {t['p99_us']:>8.1f} us   {t['requests_per_sec']:>10.1f} req/s")
+    added = end_to_end["fuzzy"]["p50_us"] - end_to_end["exact"]["p50_us"]
+    print(f"  correction adds {added:.1f} us at p50")
+    for name, scores in quality.items():
+        fx, nm = scores["fixtures"], scores["near_miss"]
+        print(
+            f"  {name:10s} fixtures specialty {fx['specialty_accuracy']:.1%}   urgency {fx['urgency_accuracy']:.1%}   "
+            f"near-miss specialty {nm['specialty_accuracy']:.1%}   over-triaged {nm['over_triage']}"
+        )
+    for name, t in token_level.items():
+        print(f"  {name:10s} accuracy {t['accuracy']:.1%}   mean {t['mean_us']:.2f} us   p99 {t['p99_us']:.2f} us")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# backend/benchmarks/bench_triage.py
+"""
+Throughput and accuracy benchmark for the symptom triage engines
+
+Runs each engine over the synthetic corpus and the labeled fixtures and
+reports requests/sec, p50/p99 latency, per-specialty precision/recall and
+over-triage (urgency raised above the label). The "near_miss" fixtures are
+real words a keyword away ("strike", "flood") that must not be flagged.
+The "baseline" engine is the original per-request keyword-list and
+substring logic; every other engine's throughput is also reported as a
+speedup over it. Results are written as JSON so runs can be compared across commits.
+
+Usage (from backend/):
+    python benchmarks/bench_triage.py [--n 2000] [--seed 1234] [--out bench.json]
+    python benchmarks/bench_triage.py --engine mypackage.module:make_engine
+    python benchmarks/bench_triage.py --baseline old.json --out new.json
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+# Add the backend directory to Python path so we can import our app modules
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from corpus import generate_corpus, load_fixtures
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+from app.services.classifier import load_classifier
+from app.services.triage import DEFAULT_SPECIALTY, SymptomAnalyzer, TriageEngine, TriageResult, load_rules
+
+class BaselineTriage:
+    """
+    The original analyze-symptoms logic, kept as the reference row: keyword
+    lists rebuilt on every request, one substring scan per keyword and the
+    first specialty keyword found wins
+    """
+
+    def analyze(self, text: str) -> TriageResult:
+        symptoms_lower = text.lower()
+
+        urgent_keywords = ["chest pain", "severe pain", "difficulty breathing", "blood", "emergency", "heart attack"]
+        emergency_keywords = ["unconscious", "not breathing", "stroke", "overdose"]
+
+        if any(keyword in symptoms_lower for keyword in emergency_keywords):
+            urgency = "emergency"
+        elif any(keyword in symptoms_lower for keyword in urgent_keywords):
+            urgency = "urgent"
+        else:
+            urgency = "routine"
+
+        specialty_mapping = {
+            "heart": "Cardiology", "chest": "Cardiology", "cardiac": "Cardiology",
+            "skin": "Dermatology", "rash": "Dermatology", "acne": "Dermatology",
+            "bone": "Orthopedics", "joint": "Orthopedics", "fracture": "Orthopedics",
+            "mental": "Psychiatry", "anxiety": "Psychiatry", "depression": "Psychiatry",
+            "eye": "Ophthalmology", "vision": "Ophthalmology",
+            "ear": "ENT", "throat": "ENT", "nose": "ENT",
+        }
+
+        specialty = DEFAULT_SPECIALTY
+        for keyword, spec in specialty_mapping.items():
+            if keyword in symptoms_lower:
+                specialty = spec
+                break
+        return TriageResult(urgency=urgency, specialty=specialty)
+
+def keyword_engine() -> TriageEngine:
+    return TriageEngine(load_rules(settings.TRIAGE_RULES_PATH))
+
+def model_engine() -> TriageEngine:
+    classifier = load_classifier(settings.TRIAGE_MODEL_DIR)
+    if classifier is None:
+        raise RuntimeError(f"No trained model in {settings.TRIAGE_MODEL_DIR}")
+    return TriageEngine(load_rules(settings.TRIAGE_RULES_PATH), classifier=classifier)
+
+def cached_analyzer() -> SymptomAnalyzer:
+    return SymptomAnalyzer(keyword_engine(), TTLCache(maxsize=settings.TRIAGE_CACHE_SIZE, ttl=3600))
+
+# Built-in engines; anything exposing analyze(text) -> result with
+# .urgency and .specialty can be added with --engine module:factory
+ENGINES: Dict[str, Callable[[], Any]] = {
+    "baseline": BaselineTriage,
+    "keywords": keyword_engine,
+    "model": model_engine,
+    "cached": cached_analyzer,
+}
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def time_engine(engine: Any, texts: Sequence[str], warmup: int = 50) -> Dict[str, float]:
+    """
+    Latency distribution and throughput of engine.analyze over texts
+    """
+    for text in texts[:warmup]:
+        engine.analyze(text)
+
+    latencies = []
+    started = time.perf_counter()
+    for text in texts:
+        t0 = time.perf_counter_ns()
+        engine.analyze(text)
+        latencies.append((time.perf_counter_ns() - t0) / 1000.0)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_sec": round(len(texts) / elapsed, 1) if elapsed else 0.0,
+        "p50_us": round(percentile(latencies, 50), 2),
+        "p99_us": round(percentile(latencies, 99), 2),
+        "max_us": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+URGENCY_SEVERITY = {"routine": 0, "urgent": 1, "emergency": 2}
+
+def score_engine(engine: Any, samples: Sequence[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Specialty precision/recall, urgency accuracy and over-triage against labeled samples
+    """
+    tp: Dict[str, int] = {}
+    fp: Dict[str, int] = {}
+    fn: Dict[str, int] = {}
+    specialty_hits = urgency_hits = over_triage = 0
+
+    for sample in samples:
+        result = engine.analyze(sample["text"])
+        expected, predicted = sample["specialty"], result.specialty
+        if predicted == expected:
+            specialty_hits += 1
+            tp[expected] = tp.get(expected, 0) + 1
+        else:
+            fp[predicted] = fp.get(predicted, 0) + 1
+            fn[expected] = fn.get(expected, 0) + 1
+        if result.urgency == sample["urgency"]:
+            urgency_hits += 1
+        elif URGENCY_SEVERITY[result.urgency] > URGENCY_SEVERITY[sample["urgency"]]:
+            over_triage += 1
+
+    per_specialty = {}
+    for spec in sorted(set(tp) | set(fp) | set(fn)):
+        t, p, n = tp.get(spec, 0), fp.get(spec, 0), fn.get(spec, 0)
+        per_specialty[spec] = {
+            "precision": round(t / (t + p), 4) if t + p else 0.0,
+            "recall": round(t / (t + n), 4) if t + n else 0.0,
+            "support": t + n,
+        }
+
+    total = len(samples) or 1
+    return {
+        "specialty_accuracy": round(specialty_hits / total, 4),
+        "urgency_accuracy": round(urgency_hits / total, 4),
+        "over_triage": over_triage,
+        "per_specialty": per_specialty,
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def load_engine(spec: str) -> Any:
+    if spec in ENGINES:
+        return ENGINES[spec]()
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+def print_comparison(baseline: Dict[str, Any], report: Dict[str, Any]) -> None:
+    print(f"\n📊 Compared with {baseline.get('commit', '?')}:")
+    for name, current in report["engines"].items():
+        previous = baseline.get("engines", {}).get(name)
+        if not previous or "error" in previous or "error" in current:
+            continue
+        for kind, timing in current["timing"].items():
+            old = previous["timing"].get(kind)
+            if old:
+                change = (timing["p99_us"] - old["p99_us"]) / old["p99_us"] * 100 if old["p99_us"] else 0.0
+                print(f"  {name}/{kind}: p99 {old['p99_us']} -> {timing['p99_us']} us ({change:+.1f}%)")
+        old_acc = previous["accuracy"]["corpus"]["specialty_accuracy"]
+        new_acc = current["accuracy"]["corpus"]["specialty_accuracy"]
+        print(f"  {name}: specialty accuracy {old_acc:.1%} -> {new_acc:.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark symptom triage engines")
+    parser.add_argument("--n", type=int, default=2000, help="Synthetic corpus size")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--engine", action="append", help="Engine name or module:factory (repeatable)")
+    parser.add_argument("--out", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.n, args.seed)
+    fixtures = load_fixtures()
+    by_kind: Dict[str, List[str]] = {}
+    for sample in corpus:
+        by_kind.setdefault(sample["kind"], []).append(sample["text"])
+
+    report: Dict[str, Any] = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "corpus": {"n": args.n, "seed": args.seed, "fixtures": len(fixtures)},
+        "engines": {},
+    }
+
+    for name in args.engine or list(ENGINES):
+        try:
+            engine = load_engine(name)
+        except Exception as e:
+            print(f"⚠️  Skipping {name}: {e}")
+            report["engines"][name] = {"error": str(e)}
+            continue
+
+        timing = {kind: time_engine(engine, texts) for kind, texts in by_kind.items()}
+        accuracy = {
+            "corpus": score_engine(engine, corpus),
+            "fixtures": score_engine(engine, fixtures),
+            "near_miss": score_engine(engine, [s for s in fixtures if s["kind"] == "near_miss"]),
+        }
+        report["engines"][name] = {"timing": timing, "accuracy": accuracy}
+
+        print(f"\n🔬 {name}")
+        for kind, t in timing.items():
+            print(f"  {kind:12s} {t['requests_per_sec']:>10.1f} req/s   p50 {t['p50_us']:>8.1f} us   p99 {t['p99_us']:>8.1f} us")
+        for label, acc in accuracy.items():
+            print(f"  {label:12s} specialty {acc['specialty_accuracy']:.1%}   urgency {acc['urgency_accuracy']:.1%}   over-triaged {acc['over_triage']}")
+
+        reference = report["engines"].get("baseline", {}).get("timing")
+        if reference and name != "baseline":
+            speedup = {
+                kind: round(t["requests_per_sec"] / reference[kind]["requests_per_sec"], 2)
+                for kind, t in timing.items() if reference[kind]["requests_per_sec"]
+            }
+            report["engines"][name]["speedup_vs_baseline"] = speedup
+            print("  vs baseline  " + "   ".join(f"{kind} {x:.2f}x" for kind, x in speedup.items()))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(json.load(f), report)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# backend/benchmarks/corpus.py
+"""
+Deterministic synthetic symptom corpus for triage benchmarks
+
+Every sample carries the specialty and urgency a clinician would expect, so
+the same corpus measures both speed and accuracy. The phrase banks are
+written independently of triage_rules.json on purpose: samples that the
+rules don't cover show up as misses instead of being tuned away.
+"""
+import json
+import os
+import random
+from typing import Dict, List
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SPECIALTY_PHRASES: Dict[str, List[str]] = {
+    "Cardiology": [
+        "my heart is racing", "pressure in my chest", "palpitations at night",
+        "irregular heartbeat", "history of cardiac problems", "chest tightness when walking",
+    ],
+    "Dermatology": [
+        "itchy rash on my arms", "acne that won't clear", "dry flaky skin",
+        "red bumps on my skin", "a mole that changed colour", "skin peeling on my hands",
+    ],
+    "Orthopedics": [
+        "my knee joint is swollen", "I think I have a fracture", "pain in my hip bone",
+        "stiff joint in the morning", "twisted my ankle badly", "lower back pain after lifting",
+    ],
+    "Psychiatry": [
+        "constant anxiety", "feeling depression for weeks", "panic attacks at work",
+        "trouble with my mental health", "can't sleep because of worry", "mood swings",
+    ],
+    "Ophthalmology": [
+        "blurry vision", "my eye is red and sore", "seeing floaters in my eye",
+        "vision getting worse", "eye pain in bright light",
+    ],
+    "ENT": [
+        "sore throat for days", "ear ache on the left side", "blocked nose",
+        "ringing in my ear", "throat feels scratchy", "nose bleeds often",
+    ],
+    "General Practice": [
+        "feeling tired all the time", "mild fever", "headache since yesterday",
+        "general check-up", "lost my appetite", "feeling a bit unwell",
+    ],
+}
+
+URGENT_PHRASES = ["severe pain", "difficulty breathing", "coughing blood", "it feels like an emergency"]
+EMERGENCY_PHRASES = ["he is unconscious", "she is not breathing", "signs of a stroke", "took an overdose"]
+
+FILLER = [
+    "it started a few days ago", "it gets worse in the evening", "I have tried rest",
+    "nothing seems to help", "I am otherwise healthy", "it comes and goes",
+    "my family doctor is away", "I would like advice", "I work long shifts",
+    "I have no allergies", "I took some paracetamol",
+]
+
+# Substring traps: keywords hidden inside unrelated words
+ADVERSARIAL_TRAPS = [
+    "I sit by the hearth every yearly holiday and wear earrings",
+    "my neighbour's bones-themed eyeliner party was fun",
+    "the joints of the skinny fracture-proof heartwood table",
+    "nosey relatives and a rashly planned trip",
+]
+
+def _sample(rng: random.Random, kind: str) -> Dict[str, str]:
+    specialty = rng.choice(list(SPECIALTY_PHRASES))
+    parts = [rng.choice(SPECIALTY_PHRASES[specialty])]
+
+    urgency = "routine"
+    roll = rng.random()
+    if roll < 0.05:
+        urgency = "emergency"
+        parts.append(rng.choice(EMERGENCY_PHRASES))
+    elif roll < 0.20:
+        urgency = "urgent"
+        parts.append(rng.choice(URGENT_PHRASES))
+
+    if kind == "long":
+        # Patients pasting long descriptions: lots of filler, symptoms buried inside
+        filler = [rng.choice(FILLER) for _ in range(rng.randint(40, 120))]
+        for part in parts:
+            filler.insert(rng.randrange(len(filler) + 1), part)
+        parts = filler
+    elif kind == "adversarial":
+        parts.insert(0, rng.choice(ADVERSARIAL_TRAPS))
+        parts = [p.upper() if rng.random() < 0.3 else p for p in parts]
+
+    sep = rng.choice([". ", ", ", "; ", " and ", "!!! "]) if kind == "adversarial" else ". "
+    return {"text": sep.join(parts), "specialty": specialty, "urgency": urgency, "kind": kind}
+
+def generate_corpus(n: int = 2000, seed: int = 1234, mix: Dict[str, float] = None) -> List[Dict[str, str]]:
+    """
+    Return n labeled samples; the same seed always gives the same corpus
+    """
+    mix = mix or {"short": 0.6, "long": 0.25, "adversarial": 0.15}
+    rng = random.Random(seed)
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    return [_sample(rng, rng.choices(kinds, weights)[0]) for _ in range(n)]
+
+def load_fixtures(name: str = "triage_labeled.json") -> List[Dict[str, str]]:
+    """
+    Hand-labeled cases checked into benchmarks/fixtures
+    """
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return json.load(f)
@@ -0,0 +1,51 @@
+# backend/build_condition_kb.py
+"""
+Offline builder for the condition knowledge base
+
+Reads a JSON list of conditions ({"name", "specialty", "symptoms",
+"follow_up_questions"}) and writes the memory-mappable TF-IDF index to
+CONDITION_KB_DIR. Restart the API afterwards to pick up the new index.
+
+Usage:
+    python build_condition_kb.py [--source conditions.json] [--out models/conditions]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the backend directory to Python path so we can import our app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import BACKEND_DIR, settings
+from app.services.conditions import DEFAULT_N_FEATURES, ConditionIndex
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the condition knowledge base index")
+    parser.add_argument("--source", default=os.path.join(BACKEND_DIR, "conditions.json"), help="JSON list of conditions")
+    parser.add_argument("--out", default=settings.CONDITION_KB_DIR, help="Output index directory")
+    parser.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES, help="Hashed feature space size")
+    args = parser.parse_args()
+
+    print("📚 Building condition knowledge base")
+    print("=" * 30)
+
+    with open(args.source) as f:
+        conditions = json.load(f)
+
+    missing = [i for i, c in enumerate(conditions) if not c.get("name") or not c.get("symptoms")]
+    if missing:
+        print(f"❌ Conditions at positions {missing} need a name and symptoms")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    index = ConditionIndex.build(conditions, n_features=args.n_features)
+    index.save(args.out)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Indexed {len(index)} conditions ({index.docs.shape[0]} postings) in {elapsed:.2f}s")
+    print(f"✅ Index written to {args.out}")
+
+if __name__ == "__main__":
+    main()
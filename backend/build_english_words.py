@@ -0,0 +1,53 @@
+# backend/build_english_words.py
+"""
+Offline builder for the English word list used by triage typo correction
+
+Tokens found in this list are real words and are never "corrected" into a
+symptom keyword ("strike" is not a typo of "stroke"). The list is taken
+from pyspellchecker's English frequency dictionary (MIT licensed), keeping
+plain alphabetic words seen at least --min-count times; rarer entries
+include misspellings ("herat", "troat") that should still be corrected.
+
+Usage (needs `pip install pyspellchecker`, only to rebuild the list):
+    python build_english_words.py [--min-count 100] [--out english_words.txt]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+# Add the backend directory to Python path so we can import our app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the English word list for typo correction")
+    parser.add_argument("--min-count", type=int, default=100, help="Minimum corpus frequency of a word")
+    parser.add_argument("--out", default=settings.TRIAGE_ENGLISH_WORDS_PATH, help="Output word list")
+    args = parser.parse_args()
+
+    try:
+        import spellchecker
+    except ImportError:
+        print("❌ pyspellchecker is not installed: pip install pyspellchecker")
+        sys.exit(1)
+
+    source = os.path.join(os.path.dirname(spellchecker.__file__), "resources", "en.json.gz")
+    with gzip.open(source, "rt", encoding="utf-8") as f:
+        frequencies = json.load(f)
+
+    words = sorted(
+        word for word, count in frequencies.items()
+        if count >= args.min_count and word.isascii() and word.isalpha()
+    )
+    with open(args.out, "w") as f:
+        f.write("# English words for triage typo correction, built by build_english_words.py\n")
+        f.write(f"# Source: pyspellchecker en.json.gz (MIT licensed), count >= {args.min_count}\n")
+        f.write("\n".join(words) + "\n")
+
+    print(f"✅ Wrote {len(words)} words to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,7 @@ def create_tables():
     
     # Import all models to ensure they are registered with SQLAlchemy
     from app.models import user  # This registers the User model
+    from app.models import appointment, schedule  # Appointments and doctor schedules
     
     # Create all tables defined in our models
     # Base.metadata contains information about all our table definitions
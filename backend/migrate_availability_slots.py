@@ -0,0 +1,74 @@
+# backend/migrate_availability_slots.py
+"""
+One-off migration of doctor availability to schedule exceptions
+
+Availability used to be stored as one appointments row per free slot
+(status=AVAILABLE, symptoms="AVAILABILITY_SLOT"). This script turns each
+doctor-day of such rows into doctor_schedule_exceptions rows and deletes
+the old appointment rows. Run it once after creating the new tables.
+
+Usage:
+    python migrate_availability_slots.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+# Add the backend directory to Python path so we can import our app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import Base, SessionLocal, engine
+from app.models import user  # noqa: F401 - registers the users table
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.schedule import ScheduleException
+from app.services.schedule import merge_slots, replace_exceptions
+
+def main():
+    parser = argparse.ArgumentParser(description="Move AVAILABLE appointment rows to schedule exceptions")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    print("📋 Migrating availability slots")
+    print("=" * 30)
+
+    Base.metadata.create_all(bind=engine, tables=[ScheduleException.__table__])
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Appointment).filter(Appointment.status == AppointmentStatus.AVAILABLE).all()
+
+        days = {}
+        for apt in rows:
+            key = (apt.doctor_id, apt.appointment_datetime.date())
+            days.setdefault(key, []).append((apt.appointment_datetime.time(), apt.duration or 30))
+
+        # Dates that already have an exception were saved after the switch; keep those
+        existing = {(doctor_id, day) for doctor_id, day in db.query(ScheduleException.doctor_id, ScheduleException.date).distinct()}
+        per_doctor = {}
+        for (doctor_id, day), slots in sorted(days.items()):
+            if (doctor_id, day) not in existing:
+                per_doctor.setdefault(doctor_id, {})[day] = merge_slots(slots)
+
+        migrated = sum(len(doctor_days) for doctor_days in per_doctor.values())
+        print(f"  {len(rows)} availability rows over {len(days)} doctor-days, {migrated} to migrate")
+
+        if args.dry_run:
+            print("\n✅ Dry run, nothing written")
+            return
+
+        for doctor_id, doctor_days in per_doctor.items():
+            replace_exceptions(db, doctor_id, doctor_days)
+        db.query(Appointment).filter(
+            Appointment.status == AppointmentStatus.AVAILABLE
+        ).delete(synchronize_session=False)
+        db.commit()
+        print("\n✅ Migration completed")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Migration failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# backend/migrate_booking_index.py
+"""
+One-off migration: database guards against double bookings
+
+New databases get uq_appointments_doctor_confirmed_start (and, on
+PostgreSQL, the ex_appointments_doctor_confirmed_overlap exclusion
+constraint) from create_all(); this script adds them to an existing
+appointments table. It refuses to run while a doctor has two confirmed
+appointments at the same start time, or on PostgreSQL two overlapping
+ones, and lists them, since neither can be built over such rows - cancel
+or move the extra ones first.
+
+Other databases keep only the unique index: it rejects identical starts,
+but two overlapping bookings with different starts (09:00 for 60 minutes
+and 09:30) are only caught by the endpoints' overlap check.
+
+Usage:
+    python migrate_booking_index.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+# Add the backend directory to Python path so we can import our app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import DDL, and_, func, text
+from sqlalchemy.orm import aliased
+from sqlalchemy.schema import AddConstraint
+
+from app.db.session import SessionLocal, engine
+from app.models import user  # noqa: F401 - registers the users table
+from app.models.appointment import Appointment, AppointmentStatus
+
+INDEX_NAME = "uq_appointments_doctor_confirmed_start"
+CONSTRAINT_NAME = "ex_appointments_doctor_confirmed_overlap"
+
+def overlapping_pairs(db):
+    """Pairs of confirmed appointments of the same doctor whose time ranges overlap (PostgreSQL only)"""
+    other = aliased(Appointment)
+    def end_of(apt):
+        return apt.appointment_datetime + func.make_interval(0, 0, 0, 0, 0, func.coalesce(apt.duration, 30))
+    return db.query(Appointment.doctor_id, Appointment.appointment_datetime, other.appointment_datetime).join(
+        other,
+        and_(
+            other.doctor_id == Appointment.doctor_id,
+            other.id > Appointment.id,
+            other.status == AppointmentStatus.CONFIRMED,
+            other.appointment_datetime < end_of(Appointment),
+            Appointment.appointment_datetime < end_of(other),
+        )
+    ).filter(Appointment.status == AppointmentStatus.CONFIRMED).all()
+
+def main():
+    parser = argparse.ArgumentParser(description="Add the double-booking guards on confirmed appointments")
+    parser.add_argument("--dry-run", action="store_true", help="Only check for double bookings")
+    args = parser.parse_args()
+
+    print("📋 Adding the confirmed-slot guards")
+    print("=" * 30)
+
+    postgres = engine.dialect.name == "postgresql"
+    db = SessionLocal()
+    try:
+        duplicates = db.query(
+            Appointment.doctor_id,
+            Appointment.appointment_datetime,
+            func.count(Appointment.id)
+        ).filter(
+            Appointment.status == AppointmentStatus.CONFIRMED
+        ).group_by(
+            Appointment.doctor_id, Appointment.appointment_datetime
+        ).having(func.count(Appointment.id) > 1).all()
+        overlaps = overlapping_pairs(db) if postgres else []
+    finally:
+        db.close()
+
+    if duplicates or overlaps:
+        print(f"❌ {len(duplicates)} double-booked slots and {len(overlaps)} overlapping pairs, resolve them first:")
+        for doctor_id, start, count in duplicates:
+            print(f"  doctor {doctor_id} at {start}: {count} confirmed appointments")
+        for doctor_id, start, other_start in overlaps:
+            print(f"  doctor {doctor_id}: {start} overlaps {other_start}")
+        sys.exit(1)
+
+    if args.dry_run:
+        print("\n✅ No double bookings, the guards can be created")
+        return
+
+    index = next(index for index in Appointment.__table__.indexes if index.name == INDEX_NAME)
+    index.create(bind=engine, checkfirst=True)
+    print("\n✅ Index created")
+
+    if postgres:
+        constraint = next(c for c in Appointment.__table__.constraints if c.name == CONSTRAINT_NAME)
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": CONSTRAINT_NAME}
+            ).first()
+            if not exists:
+                conn.execute(DDL("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+                conn.execute(AddConstraint(constraint))
+        print("✅ Overlap exclusion constraint created")
+    else:
+        print(f"⚠️  {engine.dialect.name} has no exclusion constraints; overlapping starts rely on the overlap check")
+
+if __name__ == "__main__":
+    main()
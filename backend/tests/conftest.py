@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# Add the backend directory to Python path so we can import our app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
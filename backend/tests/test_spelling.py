@@ -0,0 +1,47 @@
+# backend/tests/test_spelling.py
+import pytest
+
+from app.core.config import settings
+from app.services.spelling import SymSpellIndex
+from app.services.triage import TriageEngine, TriageRules, load_rules
+
+def test_known_words_are_not_corrected():
+    index = SymSpellIndex(["stroke", "blood"], known_words=frozenset({"strike", "flood"}))
+    assert index.correct("strike") is None
+    assert index.correct("flood") is None
+    assert index.correct("strok") == "stroke"
+
+def test_short_tokens_get_one_edit():
+    index = SymSpellIndex(["unconscious", "depression"])
+    assert index.correct("unconscous") == "unconscious"
+    assert index.correct("depresin") is None  # two edits, only eight letters
+
+def test_correct_spans_point_at_corrected_words():
+    index = SymSpellIndex(["chest"])
+    text, spans = index.correct_spans("Bad cheast pain, cheast again")
+    assert text == "bad chest pain, chest again"
+    assert [text[start:end] for start, end in spans] == ["chest", "chest"]
+
+def test_corrected_word_alone_does_not_raise_urgency():
+    rules = TriageRules.from_dict({
+        "version": "test",
+        "urgent_keywords": ["chest pain", "blood"],
+        "specialties": {"Cardiology": ["chest"]},
+    })
+    engine = TriageEngine(rules, known_words=frozenset({"pain", "in", "my", "stool"}))
+    result = engine.analyze("cheast pain")
+    assert (result.specialty, result.urgency) == ("Cardiology", "routine")
+    assert engine.analyze("cheast pain, blood in my stool").urgency == "urgent"
+
+@pytest.mark.parametrize("text", [
+    "he is conscious and talking",
+    "I had a strike at work",
+    "there was a flood in my basement",
+    "dental pain in my molar",
+    "facial expression changes",
+    "death threat made me anxious",
+])
+def test_real_words_are_not_read_as_keywords(text):
+    result = TriageEngine(load_rules(settings.TRIAGE_RULES_PATH)).analyze(text)
+    assert result.matched_keywords == []
+    assert (result.specialty, result.urgency) == ("General Practice", "routine")
@@ -0,0 +1,99 @@
+# backend/tests/test_triage.py
+import json
+
+import pytest
+
+from app.services.cache import TTLCache
+from app.services.triage import KeywordMatcher, RulesReloader, SymptomAnalyzer, TriageEngine, TriageRules
+
+def rules_data(**overrides) -> dict:
+    data = {
+        "version": "test",
+        "urgent_keywords": ["chest pain"],
+        "emergency_keywords": ["stroke"],
+        "specialties": {"Cardiology": ["heart"], "ENT": ["ear"]},
+        "fuzzy_matching": {"enabled": False},
+    }
+    data.update(overrides)
+    return data
+
+def make_engine(**overrides) -> TriageEngine:
+    return TriageEngine(TriageRules.from_dict(rules_data(**overrides)))
+
+def test_keyword_does_not_match_inside_a_longer_word():
+    matcher = KeywordMatcher([("ear", "ENT"), ("heart", "Cardiology")])
+    for text in ["early morning headache", "wear earrings", "the hearth", "every year"]:
+        assert list(matcher.iter_matches(text)) == [], text
+
+@pytest.mark.parametrize("text, urgency, specialty", [
+    ("my friend overdosed", "emergency", "General Practice"),
+    ("bloody stool", "urgent", "General Practice"),
+    ("I fractured my wrist", "routine", "Orthopedics"),
+    ("itchy rashes", "routine", "Dermatology"),
+])
+def test_inflected_keywords_match(text, urgency, specialty):
+    engine = make_engine(
+        urgent_keywords=["blood"],
+        emergency_keywords=["overdose"],
+        specialties={"Orthopedics": ["fracture"], "Dermatology": ["rash"]},
+    )
+    result = engine.analyze(text)
+    assert (result.urgency, result.specialty) == (urgency, specialty)
+
+def test_keyword_matches_whole_words_and_plurals():
+    matcher = KeywordMatcher([("ear", "ENT")])
+    assert [start for start, _, _ in matcher.iter_matches("ear, ears and my ear")] == [0, 5, 17]
+
+def test_words_containing_keywords_do_not_route():
+    result = make_engine().analyze("I sit by the hearth every year and wear earrings")
+    assert result.matched_keywords == []
+    assert result.specialty == "General Practice"
+
+@pytest.mark.parametrize("overrides, key", [
+    ({"urgent_keywords": "chest pain"}, "urgent_keywords"),
+    ({"urgent_keywords": [1]}, "urgent_keywords"),
+    ({"emergency_keywords": ["stroke", " "]}, "emergency_keywords"),
+    ({"specialties": ["heart"]}, "specialties"),
+    ({"specialties": {"Cardiology": "heart"}}, "specialties.Cardiology"),
+    ({"specialties": {"Cardiology": [None]}}, "specialties.Cardiology"),
+    ({"specialties": {"Cardiology": {"heart": "high"}}}, "specialties.Cardiology.heart"),
+    ({"fuzzy_matching": {"max_edit_distance": "two"}}, "fuzzy_matching.max_edit_distance"),
+])
+def test_malformed_rules_are_rejected(overrides, key):
+    with pytest.raises(ValueError, match=key):
+        TriageRules.from_dict(rules_data(**overrides))
+
+def test_failed_reload_keeps_active_rules(tmp_path):
+    path = tmp_path / "triage_rules.json"
+    path.write_text(json.dumps(rules_data()))
+    analyzer = SymptomAnalyzer(make_engine(), TTLCache(maxsize=10, ttl=60))
+    reloader = RulesReloader(analyzer, str(path))
+
+    path.write_text(json.dumps(rules_data(version="broken", urgent_keywords="chest pain")))
+    with pytest.raises(ValueError):
+        reloader.reload(force=True)
+    assert analyzer.engine.version == "test"
+    assert analyzer.analyze("chest pain").urgency == "urgent"
+    assert analyzer.analyze("cold hands").urgency == "routine"
+
+def test_keyword_confidence_reflects_agreement():
+    engine = make_engine(specialties={"Cardiology": ["heart", "chest"], "Dermatology": ["skin"]})
+    assert engine.analyze("chest pain").confidence == pytest.approx(2 / 3)
+    assert engine.analyze("heart and chest").confidence == pytest.approx(3 / 4)
+    assert engine.analyze("chest and skin").confidence == pytest.approx(1 / 2)
+    assert engine.analyze("cold hands").confidence == 0.0
+
+@pytest.mark.parametrize("first, second", [
+    ("I am breathing, not dizzy", "not breathing, dizzy"),
+    ("breathing difficulty", "Difficulty breathing"),
+])
+def test_reordered_texts_do_not_share_cached_results(first, second):
+    engine = make_engine(urgent_keywords=["difficulty breathing"], emergency_keywords=["not breathing"])
+    analyzer = SymptomAnalyzer(engine, TTLCache(maxsize=10, ttl=60))
+    assert analyzer.analyze(first).urgency == "routine"
+    assert analyzer.analyze(second).urgency == engine.analyze(second).urgency != "routine"
+
+def test_cache_key_ignores_case_spacing_and_punctuation():
+    analyzer = SymptomAnalyzer(make_engine(), TTLCache(maxsize=10, ttl=60))
+    assert analyzer.analyze("Chest  pain!") is analyzer.analyze("chest pain")
+    assert analyzer.analyze("chest pain").urgency == "urgent"
@@ -0,0 +1,95 @@
+# backend/train_triage_model.py
+"""
+Offline trainer for the symptom triage specialty model
+
+Pairs historical appointment symptoms with the specialization of the doctor
+the patient booked, fits the hashed TF-IDF linear model and writes it to
+TRIAGE_MODEL_DIR. Restart the API afterwards to pick up the new weights.
+
+Usage:
+    python train_triage_model.py [--out models/triage] [--min-per-class 5]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+# Add the backend directory to Python path so we can import our app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.user import User
+from app.services.classifier import DEFAULT_N_FEATURES, train_hashed_linear
+
+def load_training_data(db, min_per_class: int):
+    """
+    Return (texts, labels) from booked appointments
+    """
+    rows = db.query(Appointment.symptoms, User.specialization).join(
+        User, User.id == Appointment.doctor_id
+    ).filter(
+        Appointment.status.in_([AppointmentStatus.CONFIRMED, AppointmentStatus.COMPLETED]),
+        Appointment.symptoms.isnot(None),
+        Appointment.symptoms != "AVAILABILITY_SLOT",
+        User.specialization.isnot(None)
+    ).all()
+
+    pairs = [(symptoms.strip(), spec) for symptoms, spec in rows if symptoms and symptoms.strip()]
+
+    # Drop specialties with too few examples to learn anything useful
+    counts = Counter(spec for _, spec in pairs)
+    pairs = [(text, spec) for text, spec in pairs if counts[spec] >= min_per_class]
+    return [text for text, _ in pairs], [spec for _, spec in pairs]
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the symptom triage specialty model")
+    parser.add_argument("--out", default=settings.TRIAGE_MODEL_DIR, help="Output model directory")
+    parser.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES, help="Hashed feature space size")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--min-per-class", type=int, default=5)
+    args = parser.parse_args()
+
+    print("🧠 Training symptom triage model")
+    print("=" * 30)
+
+    db = SessionLocal()
+    try:
+        texts, labels = load_training_data(db, args.min_per_class)
+    finally:
+        db.close()
+
+    if len(set(labels)) < 2:
+        print("❌ Need booked appointments for at least two specialties to train a model")
+        sys.exit(1)
+
+    print(f"📋 {len(texts)} examples across {len(set(labels))} specialties")
+    for spec, count in Counter(labels).most_common():
+        print(f"   {spec}: {count}")
+
+    started = time.perf_counter()
+    model = train_hashed_linear(
+        texts, labels,
+        n_features=args.n_features,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate
+    )
+    elapsed = time.perf_counter() - started
+
+    predicted = [label for label, _ in model.classify_many(texts)]
+    accuracy = sum(p == y for p, y in zip(predicted, labels)) / len(labels)
+
+    model.save(args.out, extra_meta={
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "n_examples": len(texts),
+        "train_accuracy": round(accuracy, 4)
+    })
+
+    print(f"✅ Trained in {elapsed:.1f}s, training accuracy {accuracy:.1%}")
+    print(f"✅ Model written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,35 @@
 import { useState, useEffect } from 'react';
 import { Calendar, Clock, Plus, Trash2, Save } from 'lucide-react';
 
+// Expands the compact availability format (one tick bitmask per day) into slot lists
+const expandCompactAvailability = (data) => {
+  const { tickMinutes, slotMinutes } = data.grid;
+  const availability = {};
+  Object.entries(data.availability || {}).forEach(([dateKey, day]) => {
+    const booked = new Map(day.booked.map(([tick, patientId]) => [tick, patientId]));
+    const durations = new Map((day.durations || []).map(([tick, minutes]) => [tick, minutes]));
+    const bytes = atob(day.slots);
+    const slots = [];
+    for (let byte = 0; byte < bytes.length; byte++) {
+      const bits = bytes.charCodeAt(byte);
+      for (let bit = 0; bit < 8; bit++) {
+        if (!(bits & (1 << bit))) continue;
+        const tick = byte * 8 + bit;
+        const minutes = tick * tickMinutes;
+        slots.push({
+          id: `${dateKey}-${tick}`,
+          time: `${String(Math.floor(minutes / 60)).padStart(2, '0')}:${String(minutes % 60).padStart(2, '0')}`,
+          duration: durations.get(tick) || slotMinutes,
+          isBooked: booked.has(tick),
+          patientId: booked.has(tick) ? booked.get(tick) : null
+        });
+      }
+    }
+    availability[dateKey] = slots;
+  });
+  return availability;
+};
+
 const AvailabilityManager = () => {
   const [availability, setAvailability] = useState({});
   const [selectedDate, setSelectedDate] = useState(new Date().toISOString().split('T')[0]);
@@ -24,13 +53,13 @@ const AvailabilityManager = () => {
   const loadAvailability = async () => {
     try {
       // Replace with actual API call
-      const response = await fetch('/api/doctor/availability', {
+      const response = await fetch('/api/doctor/availability?format=compact', {
         headers: {
           'Authorization': `Bearer ${localStorage.getItem('token')}`
         }
       });
       const data = await response.json();
-      setAvailability(data.availability || {});
+      setAvailability(data.format === 'compact' ? expandCompactAvailability(data) : data.availability || {});
     } catch (error) {
       console.error('Error loading availability:', error);
     }
@@ -61,6 +90,36 @@ const AvailabilityManager = () => {
     }
   };
 
+  // Saves many days in one request; days is [{ date, slots }]
+  const saveAvailabilityBulk = async (days) => {
+    try {
+      const response = await fetch('/api/doctor/availability/bulk', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${localStorage.getItem('token')}`
+        },
+        body: JSON.stringify({ days })
+      });
+      
+      if (response.ok) {
+        setAvailability(prev => {
+          const updated = { ...prev };
+          days.forEach(day => {
+            updated[day.date] = day.slots;
+          });
+          return updated;
+        });
+      } else {
+        // A 409 lists the confirmed appointments the change would strand
+        const error = await response.json();
+        console.error('Availability not saved:', error.detail);
+      }
+    } catch (error) {
+      console.error('Error saving availability:', error);
+    }
+  };
+
   const generateTimeSlots = (startTime, endTime, duration) => {
     const slots = [];
     const start = new Date(`2000-01-01T${startTime}:00`);
@@ -94,6 +153,7 @@ const AvailabilityManager = () => {
     // Handle recurring appointments
     if (newSlot.isRecurring && newSlot.recurringDays.length > 0) {
       const selectedDateObj = new Date(selectedDate);
+      const futureDays = [];
       for (let i = 1; i <= 8; i++) { // Next 8 weeks
         const futureDate = new Date(selectedDateObj);
         futureDate.setDate(futureDate.getDate() + (i * 7));
@@ -101,9 +161,13 @@ const AvailabilityManager = () => {
         
         if (newSlot.recurringDays.includes(futureDate.getDay())) {
           const futureSlots = generateTimeSlots(newSlot.startTime, newSlot.endTime, newSlot.duration);
-          saveAvailability(futureDateKey, [...(availability[futureDateKey] || []), ...futureSlots]);
+          futureDays.push({ date: futureDateKey, slots: [...(availability[futureDateKey] || []), ...futureSlots] });
         }
       }
+      // One request for all the weeks instead of one per date
+      if (futureDays.length > 0) {
+        saveAvailabilityBulk(futureDays);
+      }
     }
     
     setNewSlot({
@@ -1,320 +1,358 @@
-// frontend/src/components/doctor/AvailabilityManager.jsx
-import { useState, useEffect } from 'react';
-import { Calendar, Clock, Plus, Trash2, Save } from 'lucide-react';
+// frontend/src/components/patient/MedicalChatbot.jsx
+import { useState, useRef, useEffect } from 'react';
+import { Send, AlertTriangle, Stethoscope, Clock, Loader2, CheckCircle } from 'lucide-react';
+import { appointmentService } from '../../services/appointments';
 
-const AvailabilityManager = () => {
-  const [availability, setAvailability] = useState({});
-  const [selectedDate, setSelectedDate] = useState(new Date().toISOString().split('T')[0]);
-  const [isAddingSlot, setIsAddingSlot] = useState(false);
-  // Removed unused editingSlot state variables
-  const [newSlot, setNewSlot] = useState({
-    startTime: '',
-    endTime: '',
-    duration: 30, // minutes per appointment
-    isRecurring: false,
-    recurringDays: []
-  });
+// Follow-up series a slot can be booked as (frequency and interval of the recurrence)
+const repeatOptions = {
+  none: { label: "Don't repeat" },
+  weekly: { label: 'Every week', frequency: 'weekly', interval: 1 },
+  fortnightly: { label: 'Every 2 weeks', frequency: 'weekly', interval: 2 },
+  monthly: { label: 'Every month', frequency: 'monthly', interval: 1 }
+};
+
+const urgencyStyles = {
+  emergency: 'bg-red-100 text-red-800',
+  urgent: 'bg-orange-100 text-orange-800',
+  routine: 'bg-green-100 text-green-800'
+};
 
-  const daysOfWeek = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'];
+const MedicalChatbot = () => {
+  const [messages, setMessages] = useState([
+    { id: 0, from: 'bot', text: 'Hi! Tell me what symptoms you have and I\'ll find the right doctor for you.' }
+  ]);
+  const [input, setInput] = useState('');
+  const [isStreaming, setIsStreaming] = useState(false);
+  // The slot being booked: held first, then confirmed or released
+  const [booking, setBooking] = useState(null);
+  const nextId = useRef(1);
+  const bottomRef = useRef(null);
+  const heldToken = useRef(null);
 
   useEffect(() => {
-    loadAvailability();
+    bottomRef.current?.scrollIntoView({ behavior: 'smooth' });
+  }, [messages]);
+
+  // Don't keep a slot blocked for other patients after leaving the page
+  useEffect(() => () => {
+    if (heldToken.current) {
+      appointmentService.releaseHold(heldToken.current).catch(() => {});
+    }
   }, []);
 
-  const loadAvailability = async () => {
+  const releaseCurrentHold = async () => {
+    const token = heldToken.current;
+    heldToken.current = null;
+    if (token) {
+      // The hold may already have expired; nothing to undo then
+      await appointmentService.releaseHold(token).catch(() => {});
+    }
+  };
+
+  const selectSlot = async (message, doctor, slot) => {
+    if (booking?.status === 'holding' || booking?.status === 'booking') return;
+    await releaseCurrentHold();
+
+    const selected = { messageId: message.id, doctor, slot, status: 'holding', repeat: 'none', count: 4 };
+    setBooking(selected);
     try {
-      // Replace with actual API call
-      const response = await fetch('/api/doctor/availability', {
-        headers: {
-          'Authorization': `Bearer ${localStorage.getItem('token')}`
-        }
-      });
-      const data = await response.json();
-      setAvailability(data.availability || {});
+      // Hold the slot while the patient confirms, so nobody else takes it
+      const hold = await appointmentService.holdSlot(doctor.doctor_id, slot.date, slot.time, parseInt(slot.duration, 10) || 30);
+      heldToken.current = hold.hold_token;
+      setBooking({ ...selected, hold, status: 'held' });
     } catch (error) {
-      console.error('Error loading availability:', error);
+      setBooking({ ...selected, status: 'error', error: error.message });
     }
   };
 
-  const saveAvailability = async (dateKey, slots) => {
+  const confirmBooking = async (message) => {
+    if (!booking || booking.status !== 'held') return;
+    setBooking(prev => ({ ...prev, status: 'booking' }));
+    const details = {
+      doctor_id: booking.doctor.doctor_id,
+      appointment_date: booking.slot.date,
+      appointment_time: booking.slot.time,
+      duration: booking.hold.duration,
+      symptoms: message.symptoms,
+      urgency: message.triage?.urgency || 'routine'
+    };
+    const repeat = repeatOptions[booking.repeat];
     try {
-      const response = await fetch('/api/doctor/availability', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${localStorage.getItem('token')}`
-        },
-        body: JSON.stringify({
-          date: dateKey,
-          slots: slots
-        })
-      });
-      
-      if (response.ok) {
-        setAvailability(prev => ({
-          ...prev,
-          [dateKey]: slots
-        }));
+      let confirmation;
+      if (repeat.frequency) {
+        // All or nothing: any taken occurrence comes back in error.conflicts
+        const result = await appointmentService.bookRecurringAppointments({
+          ...details,
+          recurrence: { frequency: repeat.frequency, interval: repeat.interval, count: booking.count }
+        });
+        confirmation = result.appointments.map(appointment => appointment.confirmation_code).join(', ');
+      } else {
+        const result = await appointmentService.bookAppointment({ ...details, hold_token: booking.hold.hold_token });
+        confirmation = result.confirmation_code;
       }
+      // Booking turns the hold into the appointment
+      heldToken.current = null;
+      setBooking(prev => ({ ...prev, status: 'booked', confirmation }));
     } catch (error) {
-      console.error('Error saving availability:', error);
+      setBooking(prev => ({ ...prev, status: 'held', error: error.message, conflicts: error.conflicts || [] }));
     }
   };
 
-  const generateTimeSlots = (startTime, endTime, duration) => {
-    const slots = [];
-    const start = new Date(`2000-01-01T${startTime}:00`);
-    const end = new Date(`2000-01-01T${endTime}:00`);
-    
-    let current = new Date(start);
-    while (current < end) {
-      const timeSlot = current.toTimeString().slice(0, 5);
-      slots.push({
-        id: Date.now() + Math.random(),
-        time: timeSlot,
-        duration: duration,
-        isBooked: false,
-        patientId: null
-      });
-      current.setMinutes(current.getMinutes() + duration);
-    }
-    
-    return slots;
+  const cancelBooking = async () => {
+    setBooking(null);
+    await releaseCurrentHold();
   };
 
-  const addTimeSlot = () => {
-    if (!newSlot.startTime || !newSlot.endTime) return;
-    
-    const slots = generateTimeSlots(newSlot.startTime, newSlot.endTime, newSlot.duration);
-    const dateKey = selectedDate;
-    
-    const updatedSlots = [...(availability[dateKey] || []), ...slots];
-    saveAvailability(dateKey, updatedSlots);
-    
-    // Handle recurring appointments
-    if (newSlot.isRecurring && newSlot.recurringDays.length > 0) {
-      const selectedDateObj = new Date(selectedDate);
-      for (let i = 1; i <= 8; i++) { // Next 8 weeks
-        const futureDate = new Date(selectedDateObj);
-        futureDate.setDate(futureDate.getDate() + (i * 7));
-        const futureDateKey = futureDate.toISOString().split('T')[0];
-        
-        if (newSlot.recurringDays.includes(futureDate.getDay())) {
-          const futureSlots = generateTimeSlots(newSlot.startTime, newSlot.endTime, newSlot.duration);
-          saveAvailability(futureDateKey, [...(availability[futureDateKey] || []), ...futureSlots]);
-        }
-      }
-    }
-    
-    setNewSlot({
-      startTime: '',
-      endTime: '',
-      duration: 30,
-      isRecurring: false,
-      recurringDays: []
-    });
-    setIsAddingSlot(false);
+  // Merge streamed fields into one bot message as its events arrive
+  const updateMessage = (id, update) => {
+    setMessages(prev => prev.map(message => (message.id === id ? { ...message, ...update(message) } : message)));
   };
 
-  const deleteSlot = (slotId) => {
-    const dateKey = selectedDate;
-    const updatedSlots = availability[dateKey].filter(slot => slot.id !== slotId);
-    saveAvailability(dateKey, updatedSlots);
-  };
+  const sendSymptoms = async () => {
+    const symptoms = input.trim();
+    if (!symptoms || isStreaming) return;
 
-  const toggleRecurringDay = (dayIndex) => {
-    const updatedDays = newSlot.recurringDays.includes(dayIndex)
-      ? newSlot.recurringDays.filter(d => d !== dayIndex)
-      : [...newSlot.recurringDays, dayIndex];
-    
-    setNewSlot(prev => ({
+    const userId = nextId.current++;
+    const botId = nextId.current++;
+    setMessages(prev => [
       ...prev,
-      recurringDays: updatedDays
-    }));
+      { id: userId, from: 'user', text: symptoms },
+      { id: botId, from: 'bot', symptoms, triage: null, recommendations: [], doctors: [], pending: true }
+    ]);
+    setInput('');
+    setIsStreaming(true);
+
+    try {
+      // The verdict is rendered from the first event; doctors are
+      // appended one by one as the server resolves their availability
+      await appointmentService.streamSymptomAnalysis(symptoms, (event, data) => {
+        if (event === 'triage') {
+          updateMessage(botId, () => ({ triage: data }));
+        } else if (event === 'recommendations') {
+          updateMessage(botId, () => ({ recommendations: data }));
+        } else if (event === 'doctor') {
+          updateMessage(botId, message => ({ doctors: [...message.doctors, data] }));
+        } else if (event === 'error') {
+          updateMessage(botId, () => ({ error: data.detail }));
+        } else if (event === 'done') {
+          updateMessage(botId, () => ({ pending: false }));
+        }
+      });
+    } catch (error) {
+      updateMessage(botId, () => ({ error: error.message }));
+    } finally {
+      updateMessage(botId, () => ({ pending: false }));
+      setIsStreaming(false);
+    }
   };
 
-  const currentSlots = availability[selectedDate] || [];
+  const handleKeyDown = (e) => {
+    if (e.key === 'Enter' && !e.shiftKey) {
+      e.preventDefault();
+      sendSymptoms();
+    }
+  };
 
-  return (
-    <div className="bg-white rounded-lg shadow-md p-6">
-      <div className="flex items-center justify-between mb-6">
-        <h2 className="text-2xl font-bold text-gray-800 flex items-center">
-          <Calendar className="w-6 h-6 mr-2 text-blue-600" />
-          Manage Availability
-        </h2>
-        <button
-          onClick={() => setIsAddingSlot(true)}
-          className="bg-blue-600 text-white px-4 py-2 rounded-lg hover:bg-blue-700 transition-colors flex items-center"
-        >
-          <Plus className="w-4 h-4 mr-2" />
-          Add Time Slot
-        </button>
-      </div>
+  const renderBooking = (message) => {
+    const { slot, status, error, conflicts = [] } = booking;
 
-      {/* Date Selector */}
-      <div className="mb-6">
-        <label className="block text-sm font-medium text-gray-700 mb-2">
-          Select Date
-        </label>
-        <input
-          type="date"
-          value={selectedDate}
-          onChange={(e) => setSelectedDate(e.target.value)}
-          min={new Date().toISOString().split('T')[0]}
-          className="px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
-        />
-      </div>
+    if (status === 'booked') {
+      return (
+        <div className="mt-3 flex items-center text-sm text-green-700">
+          <CheckCircle className="w-4 h-4 mr-2" />
+          {booking.repeat === 'none' ? 'Booked for' : `${booking.count} visits booked from`} {slot.date} {slot.time} · confirmation {booking.confirmation}
+        </div>
+      );
+    }
 
-      {/* Add Time Slot Form */}
-      {isAddingSlot && (
-        <div className="bg-gray-50 p-4 rounded-lg mb-6">
-          <h3 className="text-lg font-semibold mb-4">Add New Time Slot</h3>
-          <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
-            <div>
-              <label className="block text-sm font-medium text-gray-700 mb-1">
-                Start Time
-              </label>
-              <input
-                type="time"
-                value={newSlot.startTime}
-                onChange={(e) => setNewSlot(prev => ({ ...prev, startTime: e.target.value }))}
-                className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
-              />
-            </div>
-            <div>
-              <label className="block text-sm font-medium text-gray-700 mb-1">
-                End Time
-              </label>
-              <input
-                type="time"
-                value={newSlot.endTime}
-                onChange={(e) => setNewSlot(prev => ({ ...prev, endTime: e.target.value }))}
-                className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
-              />
-            </div>
-            <div>
-              <label className="block text-sm font-medium text-gray-700 mb-1">
-                Duration (minutes)
-              </label>
+    return (
+      <div className="mt-3 p-2 rounded-lg bg-blue-50 text-sm space-y-2">
+        {status === 'holding' && (
+          <div className="flex items-center text-gray-600">
+            <Loader2 className="w-4 h-4 mr-2 animate-spin" />
+            Reserving {slot.date} {slot.time}...
+          </div>
+        )}
+        {(status === 'held' || status === 'booking') && (
+          <div className="space-y-2">
+            <p className="text-gray-700">
+              {slot.date} {slot.time} is reserved for you for {Math.ceil(booking.hold.expires_in / 60)} minutes.
+            </p>
+            <div className="flex items-center gap-2 text-xs text-gray-700">
               <select
-                value={newSlot.duration}
-                onChange={(e) => setNewSlot(prev => ({ ...prev, duration: parseInt(e.target.value) }))}
-                className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
+                value={booking.repeat}
+                onChange={(e) => setBooking(prev => ({ ...prev, repeat: e.target.value, conflicts: [] }))}
+                disabled={status === 'booking'}
+                className="px-2 py-1 border border-gray-300 rounded-lg"
               >
-                <option value={15}>15 minutes</option>
-                <option value={30}>30 minutes</option>
-                <option value={45}>45 minutes</option>
-                <option value={60}>60 minutes</option>
+                {Object.entries(repeatOptions).map(([value, option]) => (
+                  <option key={value} value={value}>{option.label}</option>
+                ))}
               </select>
+              {booking.repeat !== 'none' && (
+                <label className="flex items-center gap-1">
+                  for
+                  <input
+                    type="number"
+                    min={2}
+                    max={12}
+                    value={booking.count}
+                    onChange={(e) => setBooking(prev => ({ ...prev, count: Math.min(12, Math.max(2, parseInt(e.target.value, 10) || 2)) }))}
+                    disabled={status === 'booking'}
+                    className="w-14 px-2 py-1 border border-gray-300 rounded-lg"
+                  />
+                  visits
+                </label>
+              )}
+            </div>
+            <div className="flex gap-2">
+              <button
+                onClick={() => confirmBooking(message)}
+                disabled={status === 'booking'}
+                className="px-3 py-1 rounded-lg bg-blue-600 text-white text-xs hover:bg-blue-700 disabled:opacity-50"
+              >
+                {status === 'booking' ? 'Booking...' : 'Confirm booking'}
+              </button>
+              <button
+                onClick={cancelBooking}
+                disabled={status === 'booking'}
+                className="px-3 py-1 rounded-lg border border-gray-300 text-xs text-gray-700 hover:bg-gray-100 disabled:opacity-50"
+              >
+                Cancel
+              </button>
             </div>
           </div>
+        )}
+        {error && <p className="text-red-600">{error}</p>}
+        {conflicts.length > 0 && (
+          <ul className="list-disc list-inside text-xs text-red-600">
+            {conflicts.map((conflict) => (
+              <li key={conflict.appointment_datetime}>
+                {conflict.appointment_datetime.replace('T', ' ').slice(0, 16)}: {conflict.reason}
+              </li>
+            ))}
+          </ul>
+        )}
+      </div>
+    );
+  };
+
+  const renderBotMessage = (message) => {
+    if (message.text) {
+      return <p className="text-sm">{message.text}</p>;
+    }
 
-          {/* Recurring Options */}
-          <div className="mt-4">
-            <label className="flex items-center">
-              <input
-                type="checkbox"
-                checked={newSlot.isRecurring}
-                onChange={(e) => setNewSlot(prev => ({ ...prev, isRecurring: e.target.checked }))}
-                className="mr-2"
-              />
-              <span className="text-sm font-medium text-gray-700">Make this recurring</span>
-            </label>
-            
-            {newSlot.isRecurring && (
-              <div className="mt-2">
-                <p className="text-sm text-gray-600 mb-2">Select recurring days:</p>
-                <div className="flex flex-wrap gap-2">
-                  {daysOfWeek.map((day, index) => (
-                    <button
-                      key={day}
-                      onClick={() => toggleRecurringDay(index + 1)}
-                      className={`px-3 py-1 rounded-full text-sm ${
-                        newSlot.recurringDays.includes(index + 1)
-                          ? 'bg-blue-600 text-white'
-                          : 'bg-gray-200 text-gray-700 hover:bg-gray-300'
-                      }`}
-                    >
-                      {day.slice(0, 3)}
-                    </button>
-                  ))}
-                </div>
-              </div>
-            )}
+    return (
+      <div className="space-y-3">
+        {!message.triage && message.pending && (
+          <div className="flex items-center text-sm text-gray-500">
+            <Loader2 className="w-4 h-4 mr-2 animate-spin" />
+            Analyzing your symptoms...
           </div>
+        )}
 
-          <div className="flex justify-end mt-4 space-x-2">
-            <button
-              onClick={() => setIsAddingSlot(false)}
-              className="px-4 py-2 text-gray-600 hover:text-gray-800 transition-colors"
-            >
-              Cancel
-            </button>
-            <button
-              onClick={addTimeSlot}
-              className="bg-blue-600 text-white px-4 py-2 rounded-lg hover:bg-blue-700 transition-colors flex items-center"
-            >
-              <Save className="w-4 h-4 mr-2" />
-              Save Slot
-            </button>
+        {message.triage && (
+          <div className="flex items-center gap-2">
+            {message.triage.urgency !== 'routine' && <AlertTriangle className="w-4 h-4 text-red-600" />}
+            <span className={`inline-block px-2 py-1 rounded-full text-xs font-medium ${urgencyStyles[message.triage.urgency] || urgencyStyles.routine}`}>
+              {message.triage.urgency}
+            </span>
+            <span className="text-sm font-medium text-gray-800">{message.triage.specialty}</span>
           </div>
-        </div>
-      )}
+        )}
 
-      {/* Current Slots */}
-      <div>
-        <h3 className="text-lg font-semibold mb-4">
-          Available Slots for {new Date(selectedDate).toLocaleDateString()}
-        </h3>
-        
-        {currentSlots.length === 0 ? (
-          <p className="text-gray-500 text-center py-8">No time slots available for this date</p>
-        ) : (
-          <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
-            {currentSlots.map((slot) => (
-              <div
-                key={slot.id}
-                className={`p-4 rounded-lg border-2 ${
-                  slot.isBooked 
-                    ? 'border-red-200 bg-red-50' 
-                    : 'border-green-200 bg-green-50'
-                }`}
-              >
-                <div className="flex items-center justify-between">
-                  <div className="flex items-center">
-                    <Clock className="w-4 h-4 mr-2 text-gray-600" />
-                    <span className="font-medium">{slot.time}</span>
-                  </div>
-                  <div className="flex items-center space-x-2">
-                    {!slot.isBooked && (
-                      <button
-                        onClick={() => deleteSlot(slot.id)}
-                        className="text-red-600 hover:text-red-800 transition-colors"
-                      >
-                        <Trash2 className="w-4 h-4" />
-                      </button>
-                    )}
-                  </div>
-                </div>
-                <div className="mt-2 text-sm text-gray-600">
-                  Duration: {slot.duration} minutes
-                </div>
-                <div className="mt-1">
-                  <span className={`inline-block px-2 py-1 rounded-full text-xs ${
-                    slot.isBooked 
-                      ? 'bg-red-100 text-red-800' 
-                      : 'bg-green-100 text-green-800'
-                  }`}>
-                    {slot.isBooked ? 'Booked' : 'Available'}
-                  </span>
-                </div>
-              </div>
+        {message.recommendations.length > 0 && (
+          <ul className="list-disc list-inside text-sm text-gray-700 space-y-1">
+            {message.recommendations.map((recommendation) => (
+              <li key={recommendation}>{recommendation}</li>
             ))}
+          </ul>
+        )}
+
+        {message.doctors.map((doctor) => (
+          <div key={doctor.doctor_id} className="p-3 rounded-lg border border-blue-200 bg-white">
+            <div className="flex items-center mb-2">
+              <Stethoscope className="w-4 h-4 mr-2 text-blue-600" />
+              <span className="font-medium text-sm">Dr. {doctor.doctor_name}</span>
+              <span className="ml-auto text-xs text-gray-500">{doctor.experience} · ★ {doctor.rating}</span>
+            </div>
+            <div className="flex flex-wrap gap-2">
+              {doctor.available_slots.map((slot) => {
+                const selected = booking?.messageId === message.id
+                  && booking.doctor.doctor_id === doctor.doctor_id
+                  && booking.slot.date === slot.date
+                  && booking.slot.time === slot.time;
+                return (
+                  <button
+                    key={`${slot.date} ${slot.time}`}
+                    onClick={() => selectSlot(message, doctor, slot)}
+                    disabled={booking?.status === 'booked' && booking.messageId === message.id}
+                    className={`flex items-center px-2 py-1 rounded-full text-xs transition-colors disabled:cursor-default ${
+                      selected ? 'bg-blue-600 text-white' : 'bg-green-100 text-green-800 hover:bg-green-200'
+                    }`}
+                  >
+                    <Clock className="w-3 h-3 mr-1" />
+                    {slot.date} {slot.time}
+                  </button>
+                );
+              })}
+            </div>
+            {booking?.messageId === message.id && booking.doctor.doctor_id === doctor.doctor_id && renderBooking(message)}
+          </div>
+        ))}
+
+        {message.triage && message.pending && (
+          <div className="flex items-center text-xs text-gray-500">
+            <Loader2 className="w-3 h-3 mr-2 animate-spin" />
+            Finding available doctors...
           </div>
         )}
+
+        {!message.pending && message.triage && message.doctors.length === 0 && !message.error && (
+          <p className="text-sm text-gray-500">No doctors with open slots this week.</p>
+        )}
+
+        {message.error && <p className="text-sm text-red-600">{message.error}</p>}
+      </div>
+    );
+  };
+
+  return (
+    <div className="bg-white rounded-lg shadow-sm border flex flex-col h-[32rem]">
+      <div className="flex-1 overflow-y-auto p-4 space-y-4">
+        {messages.map((message) => (
+          <div key={message.id} className={`flex ${message.from === 'user' ? 'justify-end' : 'justify-start'}`}>
+            <div
+              className={`max-w-[85%] px-4 py-2 rounded-lg ${
+                message.from === 'user' ? 'bg-blue-600 text-white' : 'bg-gray-100 text-gray-800'
+              }`}
+            >
+              {message.from === 'user' ? <p className="text-sm">{message.text}</p> : renderBotMessage(message)}
+            </div>
+          </div>
+        ))}
+        <div ref={bottomRef} />
+      </div>
+
+      <div className="border-t p-3 flex items-center gap-2">
+        <textarea
+          value={input}
+          onChange={(e) => setInput(e.target.value)}
+          onKeyDown={handleKeyDown}
+          rows={1}
+          placeholder="Describe your symptoms..."
+          className="flex-1 px-3 py-2 border border-gray-300 rounded-lg resize-none focus:outline-none focus:ring-2 focus:ring-blue-500"
+        />
+        <button
+          onClick={sendSymptoms}
+          disabled={isStreaming || !input.trim()}
+          className="bg-blue-600 text-white p-2 rounded-lg hover:bg-blue-700 transition-colors disabled:opacity-50"
+        >
+          <Send className="w-4 h-4" />
+        </button>
       </div>
     </div>
   );
 };
 
-export default AvailabilityManager;
\ No newline at end of file
+export default MedicalChatbot;
@@ -40,6 +40,50 @@ export const appointmentService = {
     return response.json();
   },
 
+  // Stream symptom analysis (SSE). onEvent(eventName, data) fires for
+  // "triage", "recommendations", each "doctor", "error" and "done".
+  streamSymptomAnalysis: async (symptoms, onEvent, date) => {
+    const query = date ? `?date=${encodeURIComponent(date)}` : '';
+    const response = await fetch(`${API_BASE_URL}/appointments/analyze-symptoms/stream${query}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'text/event-stream',
+        'Authorization': `Bearer ${localStorage.getItem('token')}`
+      },
+      body: JSON.stringify({ symptoms })
+    });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to analyze symptoms');
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const chunk = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        
+        let eventName = 'message';
+        let data = '';
+        chunk.split('\n').forEach((line) => {
+          if (line.startsWith('event: ')) eventName = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        });
+        onEvent(eventName, data ? JSON.parse(data) : null);
+      }
+    }
+  },
+
   // Get available doctors by specialty
   getAvailableDoctors: async (specialty) => {
     const response = await fetch(`${API_BASE_URL}/availability/doctors/by-specialty/${encodeURIComponent(specialty)}`, {
@@ -72,9 +116,51 @@ export const appointmentService = {
     return response.json();
   },
 
-  // Book appointment with demographics
+  // Hold a slot for a few minutes while the patient confirms; pass the
+  // returned hold_token along with the booking
+  holdSlot: async (doctorId, appointmentDate, appointmentTime, duration = 30) => {
+    const response = await fetch(`${API_BASE_URL}/appointments/holds`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${localStorage.getItem('token')}`
+      },
+      body: JSON.stringify({
+        doctor_id: doctorId,
+        appointment_date: appointmentDate,
+        appointment_time: appointmentTime,
+        duration
+      })
+    });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to hold slot');
+    }
+    
+    return response.json();
+  },
+
+  // Release a slot hold the patient no longer needs
+  releaseHold: async (holdToken) => {
+    const response = await fetch(`${API_BASE_URL}/appointments/holds/${holdToken}`, {
+      method: 'DELETE',
+      headers: {
+        'Authorization': `Bearer ${localStorage.getItem('token')}`
+      }
+    });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to release hold');
+    }
+    
+    return response.json();
+  },
+
+  // Book an appointment; appointmentData may carry the hold_token from holdSlot
   bookAppointment: async (appointmentData) => {
-    const response = await fetch(`${API_BASE_URL}/appointments/book-appointment-enhanced`, {
+    const response = await fetch(`${API_BASE_URL}/appointments/book-appointment`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -91,6 +177,30 @@ export const appointmentService = {
     return response.json();
   },
 
+  // Book a series of visits with one doctor; all or nothing. seriesData has
+  // either occurrences [{ appointment_date, appointment_time }] or the first
+  // appointment_date/appointment_time plus recurrence { frequency, interval, count, until }
+  bookRecurringAppointments: async (seriesData) => {
+    const response = await fetch(`${API_BASE_URL}/appointments/book-recurring`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${localStorage.getItem('token')}`
+      },
+      body: JSON.stringify(seriesData)
+    });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      // Conflicts come back per occurrence in error.detail.conflicts
+      const err = new Error(error.detail?.message || error.detail || 'Failed to book appointments');
+      err.conflicts = error.detail?.conflicts || [];
+      throw err;
+    }
+    
+    return response.json();
+  },
+
   // Get user's appointments
   getMyAppointments: async () => {
     const response = await fetch(`${API_BASE_URL}/appointments/my-appointments`, {